@@ -13,6 +13,8 @@ class AgentContext:
         self.business_id = business_id
         self.history: List[Dict[str, Any]] = []
         self.metadata: Dict[str, Any] = {}
+        # Business record and strategy memory (db_utils.BusinessContext), loaded once per plan
+        self.business_context: Optional[Any] = None
     
     def log_step(self, agent_name: str, action: str, data: Any):
         """Log what each agent did"""
@@ -1,7 +1,7 @@
 from typing import List
 from .base import BaseAgent, AgentContext
 from ..schemas import ScoredExperiment, GrowthPlan
-from ..llm_strategy import generate_strategy_commentary
+from ..llm_strategy import generate_strategy_commentary_with_model
 
 
 class JudgeAgent(BaseAgent):
@@ -59,9 +59,10 @@ class JudgeAgent(BaseAgent):
             f"For {plan.chosen_experiment.experiment.name}"
         )
         
-        # For now, use standard Gemini (multi-model support coming in Phase 4.2)
-        base_commentary = generate_strategy_commentary(plan)
-        context.metadata['llm_model_used'] = "GOOGLE/gemini-2.0-flash-exp"
+        # Served by the active JudgeAgent models, with failover between them
+        base_commentary, model = await generate_strategy_commentary_with_model(plan)
+        if model is not None:
+            context.metadata['llm_model_used'] = model.label
         
         # Enhance with revenue opportunity
         if context.metadata.get('revenue_opportunity'):
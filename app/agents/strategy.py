@@ -1,9 +1,9 @@
-import json
-from typing import List
+import asyncio
+from typing import List, Optional
 from .base import BaseAgent, AgentContext
 from ..schemas import BusinessProfile, GrowthGoal, FunnelInsight, GrowthExperiment
 from ..logic import propose_experiments
-from ..db_utils import get_business_strategy_memory, get_db_session, ensure_business_exists
+from ..db_utils import load_business_context
 
 
 class StrategyAgent(BaseAgent):
@@ -12,12 +12,37 @@ class StrategyAgent(BaseAgent):
     def __init__(self):
         super().__init__("Strategy")
     
+    async def prefetch_memory(self, business: BusinessProfile, context: AgentContext) -> Optional[dict]:
+        """
+        Load the business record and its strategy memory, creating the record if needed.
+        
+        Uses context.business_context when the caller already loaded it; otherwise
+        one DB round trip runs in a worker thread (so the orchestrator can start this
+        while the Analyst runs) and the result is kept on the context.
+        Returns None if the memory couldn't be read.
+        """
+        if context.business_context is None:
+            try:
+                context.business_context = await asyncio.to_thread(
+                    load_business_context, business.business_id, business
+                )
+            except Exception as e:
+                # Memory retrieval is optional - don't fail if it errors
+                self.log_action(context, "Memory Warning", f"Could not retrieve memory: {str(e)[:50]}")
+                return None
+        return context.business_context.strategy_memory
+    
     async def process(
         self, 
         input_data: dict, 
         context: AgentContext
     ) -> List[GrowthExperiment]:
-        """Generate context-aware experiments, filtered by strategy memory"""
+        """
+        Generate context-aware experiments, filtered by strategy memory
+        
+        input_data may carry 'memory' from prefetch_memory; otherwise it is
+        loaded here.
+        """
         
         business = input_data['business']
         goal = input_data['goal']
@@ -28,48 +53,41 @@ class StrategyAgent(BaseAgent):
             "Proposing experiments",
             f"For {insight.from_step}→{insight.to_step} bottleneck"
         )
-
-        # Ensure business record exists in database
-        ensure_business_exists(business)
+        
+        if 'memory' in input_data:
+            memory = input_data['memory']
+        else:
+            memory = await self.prefetch_memory(business, context)
 
         # Generate initial experiments using existing logic
         experiments = propose_experiments(business, goal, insight)
         
-        # Retrieve strategy memory to filter out past failures
-        try:
-            memory_json = get_business_strategy_memory(business.business_id)
-            if memory_json:
-                memory = json.loads(memory_json)
-                failed_experiments = memory.get('failed_experiments', [])
-                
-                if failed_experiments:
-                    self.log_action(
-                        context,
-                        "Memory Check",
-                        f"Found {len(failed_experiments)} past failed experiments to avoid"
-                    )
-                    
-                    # Filter out failed experiments
-                    filtered = [
-                        exp for exp in experiments
-                        if exp.name not in failed_experiments
-                    ]
-                    
-                    if len(filtered) < len(experiments):
-                        removed = len(experiments) - len(filtered)
-                        self.log_action(
-                            context,
-                            "Memory Filter Applied",
-                            f"Removed {removed} previously failed experiment(s)"
-                        )
-                        context.metadata['experiments_filtered_by_memory'] = removed
-                    
-                    # Use filtered list if we still have experiments
-                    experiments = filtered if filtered else experiments
-        
-        except Exception as e:
-            # Memory retrieval is optional - don't fail if it errors
-            self.log_action(context, "Memory Warning", f"Could not retrieve memory: {str(e)[:50]}")
+        # Use strategy memory to filter out past failures
+        failed_experiments = (memory or {}).get('failed_experiments', [])
+        if failed_experiments:
+            self.log_action(
+                context,
+                "Memory Check",
+                f"Found {len(failed_experiments)} past failed experiments to avoid"
+            )
+            
+            # Filter out failed experiments
+            filtered = [
+                exp for exp in experiments
+                if exp.name not in failed_experiments
+            ]
+            
+            if len(filtered) < len(experiments):
+                removed = len(experiments) - len(filtered)
+                self.log_action(
+                    context,
+                    "Memory Filter Applied",
+                    f"Removed {removed} previously failed experiment(s)"
+                )
+                context.metadata['experiments_filtered_by_memory'] = removed
+            
+            # Use filtered list if we still have experiments
+            experiments = filtered if filtered else experiments
         
         self.log_action(
             context,
@@ -81,4 +99,3 @@ class StrategyAgent(BaseAgent):
         context.metadata['proposed_experiments'] = len(experiments)
         
         return experiments
-
@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .schemas import GrowthExperiment
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = Path(os.getenv(
+    "EXPERIMENT_CATALOG_PATH",
+    str(Path(__file__).resolve().parent / "catalogs" / "experiments.json"),
+))
+
+# How often (seconds) get_catalog() checks the catalog file for changes
+CATALOG_RELOAD_INTERVAL = float(os.getenv("EXPERIMENT_CATALOG_RELOAD_INTERVAL", "5"))
+
+ANY_INDUSTRY = "*"
+
+CatalogKey = Tuple[str, str, str]
+
+
+class ExperimentCatalog:
+    """
+    Immutable index of pre-built experiments keyed by (from_step, to_step, industry).
+
+    Industry-specific entries are listed ahead of the generic ('*') entries for
+    the same bottleneck, and both are merged when the catalog is built, so a
+    proposal is a single dict lookup. The returned GrowthExperiment instances
+    are shared between calls and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        index: Mapping[CatalogKey, Tuple[GrowthExperiment, ...]],
+        default_bottleneck: Tuple[str, str],
+        fallback: Tuple[GrowthExperiment, ...],
+        version: Optional[int] = None,
+    ):
+        self._index = MappingProxyType(dict(index))
+        self.default_bottleneck = default_bottleneck
+        self.fallback = fallback
+        self.version = version
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ExperimentCatalog":
+        generic: Dict[Tuple[str, str], List[GrowthExperiment]] = {}
+        specific: Dict[CatalogKey, List[GrowthExperiment]] = {}
+
+        for entry in data["experiments"]:
+            entry = dict(entry)
+            from_step = entry.pop("from_step").lower()
+            to_step = entry.pop("to_step").lower()
+            industry = entry.pop("industry", ANY_INDUSTRY).strip().lower()
+            experiment = GrowthExperiment(**entry)
+            if industry == ANY_INDUSTRY:
+                generic.setdefault((from_step, to_step), []).append(experiment)
+            else:
+                specific.setdefault((from_step, to_step, industry), []).append(experiment)
+
+        index: Dict[CatalogKey, Tuple[GrowthExperiment, ...]] = {
+            (from_step, to_step, ANY_INDUSTRY): tuple(exps)
+            for (from_step, to_step), exps in generic.items()
+        }
+        for (from_step, to_step, industry), exps in specific.items():
+            index[(from_step, to_step, industry)] = tuple(exps) + tuple(generic.get((from_step, to_step), ()))
+
+        from_step, to_step = data.get("default_bottleneck", ("signups", "purchases"))
+        return cls(
+            index=index,
+            default_bottleneck=(from_step.lower(), to_step.lower()),
+            fallback=tuple(GrowthExperiment(**e) for e in data.get("fallback", [])),
+            version=data.get("version"),
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "ExperimentCatalog":
+        with path.open("r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def lookup(self, from_step: str, to_step: str, industry: Optional[str] = None) -> Tuple[GrowthExperiment, ...]:
+        """Experiments for a bottleneck, most specific first; unknown bottlenecks use the default one."""
+        from_step, to_step = from_step.lower(), to_step.lower()
+        industry = (industry or ANY_INDUSTRY).strip().lower()
+
+        experiments = (
+            self._index.get((from_step, to_step, industry))
+            or self._index.get((from_step, to_step, ANY_INDUSTRY))
+        )
+        if experiments is None:
+            default_from, default_to = self.default_bottleneck
+            experiments = (
+                self._index.get((default_from, default_to, industry))
+                or self._index.get((default_from, default_to, ANY_INDUSTRY))
+            )
+        return experiments or self.fallback
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "keys": len(self._index),
+            "experiments": sum(len(exps) for exps in self._index.values()),
+        }
+
+
+_catalog: Optional[ExperimentCatalog] = None
+_catalog_mtime: Optional[float] = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def reload_catalog(force: bool = False) -> ExperimentCatalog:
+    """
+    Rebuild the catalog from CATALOG_PATH if the file changed (or if forced).
+
+    The new index is swapped in atomically; if the file is invalid the previous
+    catalog stays active and the error is logged (or raised if there is none).
+    """
+    global _catalog, _catalog_mtime, _last_check
+    with _reload_lock:
+        _last_check = time.monotonic()
+        mtime = CATALOG_PATH.stat().st_mtime
+        if _catalog is not None and not force and mtime == _catalog_mtime:
+            return _catalog
+        try:
+            catalog = ExperimentCatalog.from_file(CATALOG_PATH)
+        except Exception as e:
+            if _catalog is None:
+                raise
+            logger.error(f"Keeping previous experiment catalog; failed to load {CATALOG_PATH}: {e}")
+            return _catalog
+        _catalog, _catalog_mtime = catalog, mtime
+        logger.info(f"Loaded experiment catalog: {catalog.stats()}")
+        return catalog
+
+
+def get_catalog() -> ExperimentCatalog:
+    """The active catalog, re-checking the file at most every CATALOG_RELOAD_INTERVAL seconds."""
+    catalog = _catalog
+    if catalog is None or time.monotonic() - _last_check >= CATALOG_RELOAD_INTERVAL:
+        try:
+            catalog = reload_catalog()
+        except OSError as e:
+            if catalog is None:
+                raise
+            logger.error(f"Experiment catalog file unavailable, keeping previous catalog: {e}")
+    return catalog
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from .schemas import GrowthPlan
+
+logger = logging.getLogger(__name__)
+
+# Concurrent background commentary generations per process
+COMMENTARY_WORKER_CONCURRENCY = int(os.getenv("COMMENTARY_WORKER_CONCURRENCY", "8"))
+
+# How long finished jobs stay retrievable
+COMMENTARY_JOB_TTL_SECONDS = float(os.getenv("COMMENTARY_JOB_TTL_SECONDS", "3600"))
+
+PENDING, READY, FAILED = "pending", "ready", "failed"
+
+
+class CommentaryJob:
+    """Deferred LLM commentary for one plan."""
+
+    def __init__(self, plan: GrowthPlan):
+        self.commentary_id = uuid.uuid4().hex
+        self.business_id = plan.business_profile.business_id
+        self.plan = plan
+        self.status = PENDING
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.completed_at: Optional[float] = None
+        self.done = asyncio.Event()
+        self.task: Optional["asyncio.Task[None]"] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "commentary_id": self.commentary_id,
+            "business_id": self.business_id,
+            "status": self.status,
+            "commentary": self.plan.llm_strategy_commentary,
+            "error": self.error,
+            "created_at": self.created_at,
+            "completed_at": self.completed_at,
+        }
+
+
+class CommentaryJobManager:
+    """
+    Runs deferred commentary generations in the background of the event loop.
+
+    submit() returns immediately; a worker task (at most ``concurrency`` at a
+    time) awaits the generator, fills in the plan's commentary and status and
+    then calls ``on_complete(plan)`` (e.g. to write the plan log). Jobs live
+    in this process only and are forgotten ``ttl_seconds`` after finishing.
+
+    Not thread-safe: every method must be called from the event loop (in
+    FastAPI, from ``async def`` endpoints, not the threadpool).
+    """
+
+    def __init__(
+        self,
+        concurrency: int = COMMENTARY_WORKER_CONCURRENCY,
+        ttl_seconds: float = COMMENTARY_JOB_TTL_SECONDS,
+    ):
+        self.concurrency = concurrency
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, CommentaryJob] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._counters = {"submitted": 0, "ready": 0, "failed": 0}
+
+    def submit(
+        self,
+        plan: GrowthPlan,
+        generate: Callable[[GrowthPlan], Awaitable[str]],
+        on_complete: Optional[Callable[[GrowthPlan], None]] = None,
+    ) -> CommentaryJob:
+        """Start generating commentary for ``plan``; must be called from the event loop."""
+        self._prune()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        job = CommentaryJob(plan)
+        plan.commentary_id = job.commentary_id
+        plan.commentary_status = PENDING
+        self._jobs[job.commentary_id] = job
+        self._counters["submitted"] += 1
+        job.task = asyncio.get_running_loop().create_task(self._run(job, generate, on_complete))
+        return job
+
+    async def _run(self, job: CommentaryJob, generate, on_complete) -> None:
+        try:
+            async with self._semaphore:
+                job.plan.llm_strategy_commentary = await generate(job.plan)
+            job.status = READY
+        except asyncio.CancelledError:
+            job.status, job.error = FAILED, "cancelled at shutdown"
+        except Exception as e:
+            logger.error(f"Deferred commentary {job.commentary_id} failed: {e}")
+            job.status, job.error = FAILED, str(e)
+        finally:
+            job.completed_at = time.time()
+            job.plan.commentary_status = job.status
+            self._counters[job.status] += 1
+            if on_complete is not None:
+                try:
+                    on_complete(job.plan)
+                except Exception as e:
+                    logger.error(f"Deferred commentary {job.commentary_id} completion hook failed: {e}")
+            job.done.set()
+
+    def get(self, commentary_id: str) -> Optional[CommentaryJob]:
+        self._prune()
+        return self._jobs.get(commentary_id)
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            cid for cid, job in self._jobs.items()
+            if job.completed_at is not None and job.completed_at < cutoff
+        ]
+        for cid in expired:
+            del self._jobs[cid]
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Give pending jobs ``timeout`` seconds, then cancel the rest (their plans are still completed)."""
+        pending = [job.task for job in self._jobs.values() if job.task is not None and not job.task.done()]
+        if not pending:
+            return
+        _, still_running = await asyncio.wait(pending, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            await asyncio.gather(*still_running, return_exceptions=True)
+
+    def stats(self) -> dict:
+        pending = sum(1 for job in self._jobs.values() if job.status == PENDING)
+        return {**self._counters, "pending": pending, "tracked": len(self._jobs)}
+
+
+# Singleton instance
+commentary_jobs = CommentaryJobManager()
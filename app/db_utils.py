@@ -1,9 +1,38 @@
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 import json
 from .database import SessionLocal
 from . import models
-from .schemas import ExperimentResultUpdate
+from .plan_cache import plan_cache
+from .schemas import BusinessProfile, ExperimentResultUpdate
+
+
+@dataclass
+class BusinessContext:
+    """A business record and its strategy memory, loaded once per request."""
+    business_id: str
+    name: str
+    industry: str
+    tone: str
+    strategy_memory: Dict[str, Any] = field(default_factory=dict)
+    created: bool = False  # The record was created by this request
+
+    @property
+    def failed_experiments(self) -> List[str]:
+        return self.strategy_memory.get('failed_experiments', [])
+
+    def to_business_profile(self) -> BusinessProfile:
+        """Profile for a stored business (region and channels aren't stored)."""
+        return BusinessProfile(
+            business_id=self.business_id,
+            name=self.name,
+            industry=self.industry,
+            region="Unknown",
+            main_channels=[],
+            tone_of_voice=self.tone,
+        )
 
 
 def get_business_strategy_memory(business_id: str) -> Optional[str]:
@@ -66,6 +95,9 @@ def update_business_strategy_memory(
         business.strategy_memory = memory
         db.commit()
         
+        # Cached plans for this business were built against the old memory
+        plan_cache.invalidate_business(business_id)
+        
         print(f"📝 Added '{failed_experiment_name}' to failed experiments for {business_id}")
         
         return memory
@@ -138,34 +170,71 @@ def get_db_session():
 
 
 
-def ensure_business_exists(business_profile) -> None:
+def load_business_context(
+    business_id: str,
+    business_profile: Optional[BusinessProfile] = None
+) -> Optional[BusinessContext]:
     """
-    Creates a business record if it doesn't exist.
+    Loads a business and its strategy memory with a single query.
+    
+    If the business doesn't exist it is created from business_profile
+    (one INSERT); without a profile, None is returned instead.
+    
     Args:
-        business_profile: BusinessProfile schema object
+        business_id: Business identifier
+        business_profile: BusinessProfile to create the record from if missing
+    
+    Returns:
+        BusinessContext or None
     """
     db = SessionLocal()
     try:
-        from . import models
-        
-        # Check if business exists
-        existing = db.query(models.Business).filter(
-            models.Business.business_id == business_profile.business_id
-        ).first()
-        
-        if not existing:
-            # Create new business record
-            new_business = models.Business(
-                business_id=business_profile.business_id,
-                name=business_profile.name,
-                industry=business_profile.industry,
-                tone=business_profile.tone_of_voice or 'professional'
+        business = db.get(models.Business, business_id)
+        if business is not None:
+            return BusinessContext(
+                business_id=business.business_id,
+                name=business.name,
+                industry=business.industry,
+                tone=business.tone,
+                strategy_memory=business.strategy_memory or {},
             )
-            db.add(new_business)
+        
+        if business_profile is None:
+            return None
+        
+        loaded = BusinessContext(
+            business_id=business_id,
+            name=business_profile.name,
+            industry=business_profile.industry,
+            tone=business_profile.tone_of_voice or 'professional',
+            created=True,
+        )
+        db.add(models.Business(
+            business_id=business_id,
+            name=loaded.name,
+            industry=loaded.industry,
+            tone=loaded.tone,
+        ))
+        try:
             db.commit()
-            print(f"? Created business record for {business_profile.business_id}")
-    except Exception as e:
-        db.rollback()
-        print(f"?? Error creating business: {e}")
+        except IntegrityError:
+            # Created concurrently by another request; use the stored record
+            db.rollback()
+            return load_business_context(business_id)
+        print(f"✅ Created business record for {business_id}")
+        return loaded
+        
     finally:
         db.close()
+
+
+def ensure_business_exists(business_profile) -> None:
+    """
+    Creates a business record if it doesn't exist.
+    Args:
+        business_profile: BusinessProfile schema object
+    """
+    try:
+        load_business_context(business_profile.business_id, business_profile)
+    except Exception as e:
+        print(f"?? Error creating business: {e}")
@@ -11,18 +11,22 @@ class EmailNotifier:
         self.enabled = os.getenv("EMAIL_NOTIFICATIONS_ENABLED", "false").lower() == "true"
         self.test_mode = os.getenv("EMAIL_TEST_MODE", "true").lower() == "true"
         
-        # Only import SendGrid if not in test mode
-        if not self.test_mode and self.api_key:
-            try:
-                from sendgrid import SendGridAPIClient
-                from sendgrid.helpers.mail import Mail
-                self.client = SendGridAPIClient(self.api_key)
-                self.Mail = Mail
-            except ImportError:
-                print("⚠️ sendgrid not installed, using test mode")
-                self.test_mode = True
-        else:
-            self.client = None
+        # SendGrid is imported on the first real send, not at startup
+        self.client = None
+        self.Mail = None
+    
+    def _load_client(self) -> None:
+        """Create the SendGrid client on first use (outside test mode)."""
+        if self.test_mode or self.client is not None or not self.api_key:
+            return
+        try:
+            from sendgrid import SendGridAPIClient
+            from sendgrid.helpers.mail import Mail
+            self.client = SendGridAPIClient(self.api_key)
+            self.Mail = Mail
+        except ImportError:
+            print("⚠️ sendgrid not installed, using test mode")
+            self.test_mode = True
     
     def send_plan_email(
         self, 
@@ -53,6 +57,8 @@ class EmailNotifier:
         html_content = self._build_html_email(plan, trace_id)
         text_content = self._build_text_email(plan, trace_id)
         
+        self._load_client()
+        
         # Test mode - just print to console
         if self.test_mode:
             print("\n" + "="*60)
@@ -1,6 +1,6 @@
 import os
 import json
-from typing import Optional
+from typing import List, Optional
 from ..schemas import GrowthPlan
 
 class SlackNotifier:
@@ -11,17 +11,19 @@ class SlackNotifier:
         self.enabled = os.getenv("SLACK_NOTIFICATIONS_ENABLED", "false").lower() == "true"
         self.test_mode = os.getenv("SLACK_TEST_MODE", "true").lower() == "true"
         
-        # Only import and create client if not in test mode
-        if not self.test_mode and self.webhook_url:
-            try:
-                from slack_sdk.webhook import WebhookClient
-                self.client = WebhookClient(self.webhook_url)
-            except ImportError:
-                print("⚠️ slack-sdk not installed, using test mode")
-                self.test_mode = True
-                self.client = None
-        else:
-            self.client = None
+        # slack-sdk is imported on the first real send, not at startup
+        self.client = None
+    
+    def _load_client(self) -> None:
+        """Create the webhook client on first use (outside test mode)."""
+        if self.test_mode or self.client is not None or not self.webhook_url:
+            return
+        try:
+            from slack_sdk.webhook import WebhookClient
+            self.client = WebhookClient(self.webhook_url)
+        except ImportError:
+            print("⚠️ slack-sdk not installed, using test mode")
+            self.test_mode = True
     
     def send_plan_notification(self, plan: GrowthPlan, trace_id: str) -> bool:
         """
@@ -40,6 +42,8 @@ class SlackNotifier:
         # Build the message
         blocks = self._build_message_blocks(plan, trace_id)
         
+        self._load_client()
+        
         # Test mode - just print to console
         if self.test_mode:
             print("\n" + "="*60)
@@ -89,6 +93,67 @@ class SlackNotifier:
             print(f"❌ Slack notification error: {e}")
             return False
     
+    def send_batch_summary(self, plans: List[GrowthPlan], trace_id: str, failed: int = 0) -> bool:
+        """
+        Send one summary notification for a batch of growth plans
+        
+        Args:
+            plans: The successfully generated plans
+            trace_id: Trace ID for the batch
+            failed: Number of batch items that failed
+            
+        Returns:
+            True if sent successfully, False otherwise
+        """
+        if not self.enabled:
+            return False
+        
+        lines = [
+            f"• {plan.business_profile.name}: {plan.chosen_experiment.experiment.name} "
+            f"(Score: {plan.chosen_experiment.priority_score:.1f})"
+            for plan in plans[:20]
+        ]
+        if len(plans) > 20:
+            lines.append(f"…and {len(plans) - 20} more")
+        summary = f"🚀 Batch of {len(plans)} growth plans generated ({failed} failed)"
+        
+        self._load_client()
+        
+        # Test mode - just print to console
+        if self.test_mode:
+            print("\n" + "="*60)
+            print("📢 SLACK BATCH NOTIFICATION (TEST MODE)")
+            print("="*60)
+            print(summary)
+            print("\n".join(lines))
+            print(f"\n🔗 Trace ID: {trace_id}")
+            print("="*60)
+            print("✅ Slack notification sent (test mode)\n")
+            return True
+        
+        # Real mode - send to Slack
+        try:
+            response = self.client.send(
+                text=summary,
+                blocks=[
+                    {"type": "section", "text": {"type": "mrkdwn", "text": f"*{summary}*\n" + "\n".join(lines)}},
+                    {"type": "context", "elements": [
+                        {"type": "mrkdwn", "text": f"Trace ID: `{trace_id}` | Generated by SME Growth Co-Pilot"}
+                    ]},
+                ]
+            )
+            
+            if response.status_code == 200:
+                print(f"✅ Slack batch notification sent for trace {trace_id}")
+                return True
+            else:
+                print(f"⚠️ Slack batch notification failed: {response.status_code}")
+                return False
+                
+        except Exception as e:
+            print(f"❌ Slack notification error: {e}")
+            return False
+    
     def _build_message_blocks(self, plan: GrowthPlan, trace_id: str) -> list:
         """Build Slack Block Kit message"""
         
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .storage import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_MAX_DISK_ENTRIES = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "10000"))
+
+# SQLite tier; set LLM_CACHE_PATH to an empty string to keep the cache in memory only
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", str(DATA_DIR / "llm_cache.sqlite3")) or None
+
+
+def response_cache_key(model: str, prompt: str, config: Optional[Dict[str, Any]] = None) -> str:
+    """Hash of (model, prompt, generation config); any change to one of them is a miss."""
+    payload = json.dumps(
+        {"model": model, "prompt": prompt, "config": config or {}},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the provider doesn't report usage."""
+    return max(1, len(text) // 4)
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of LLM completions keyed by ``response_cache_key``.
+
+    Hot entries live in an in-memory LRU; every entry is also written to a
+    local SQLite table shared by all workers. Both tiers expire entries after
+    ``ttl_seconds`` and the SQLite tier is trimmed to ``max_disk_entries``
+    (least recently used first). Only successful completions should be stored.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = LLM_CACHE_PATH,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_disk_entries: int = LLM_CACHE_MAX_DISK_ENTRIES,
+        enabled: bool = LLM_CACHE_ENABLED,
+    ):
+        self.path = Path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.enabled = enabled
+        # key -> (created_at, text, output_tokens)
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "tokens_saved": 0,
+        }
+
+    # --- SQLite tier ---
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection; commits on success and is always closed."""
+        if not self._schema_ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=5)
+        try:
+            if not self._schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS llm_responses (
+                        key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used_at REAL NOT NULL,
+                        output_tokens INTEGER NOT NULL,
+                        response TEXT NOT NULL
+                    )
+                    """
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used_at)")
+                self._schema_ready = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _disk_get(self, key: str, now: float) -> Optional[Tuple[float, str, int]]:
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT created_at, response, output_tokens FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[0] >= self.ttl_seconds:
+                    conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                    return None
+                conn.execute("UPDATE llm_responses SET last_used_at = ? WHERE key = ?", (now, key))
+                return row[0], row[1], row[2]
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def _disk_put(self, key: str, model: str, created_at: float, text: str, output_tokens: int) -> int:
+        """Store an entry and trim the table; returns the number of rows evicted."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, created_at, created_at, output_tokens, text),
+                )
+                expired = conn.execute(
+                    "DELETE FROM llm_responses WHERE created_at <= ?", (created_at - self.ttl_seconds,)
+                ).rowcount
+                overflow = conn.execute(
+                    """
+                    DELETE FROM llm_responses WHERE key IN (
+                        SELECT key FROM llm_responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_disk_entries,),
+                ).rowcount
+                return expired + overflow
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+            return 0
+
+    # --- Public API ---
+
+    def get(self, model: str, prompt: str, config: Optional[Dict[str, Any]] = None, bypass: bool = False) -> Optional[str]:
+        """Cached completion for this call, or None on a miss (or when bypassed/disabled)."""
+        if not self.enabled or bypass:
+            with self._lock:
+                self._counters["bypassed"] += 1
+            return None
+
+        key = response_cache_key(model, prompt, config)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    self._counters["tokens_saved"] += entry[2]
+                    return entry[1]
+                del self._entries[key]
+                self._counters["expirations"] += 1
+
+        entry = self._disk_get(key, now) if self.path else None
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            self._counters["disk_hits"] += 1
+            self._counters["tokens_saved"] += entry[2]
+            self._remember_locked(key, entry)
+        return entry[1]
+
+    def put(
+        self,
+        model: str,
+        prompt: str,
+        config: Optional[Dict[str, Any]],
+        text: str,
+        output_tokens: Optional[int] = None,
+    ) -> None:
+        """Store a successful completion."""
+        if not self.enabled or not text:
+            return
+        key = response_cache_key(model, prompt, config)
+        entry = (time.time(), text, output_tokens or estimate_tokens(text))
+        with self._lock:
+            self._remember_locked(key, entry)
+            self._counters["stores"] += 1
+        if self.path:
+            evicted = self._disk_put(key, model, entry[0], text, entry[2])
+            with self._lock:
+                self._counters["evictions"] += evicted
+
+    def _remember_locked(self, key: str, entry: Tuple[float, str, int]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM llm_responses")
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache clear failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "memory_entries": size,
+            "max_entries": self.max_entries,
+            "max_disk_entries": self.max_disk_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": str(self.path) if self.path else None,
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+llm_response_cache = LLMResponseCache()
@@ -1,87 +1,343 @@
+import asyncio
+import bisect
+import hashlib
 import os
-from typing import Optional
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
 from sqlalchemy.orm import Session
 from .database import SessionLocal
 from . import models
+from .llm_cache import estimate_tokens, response_cache_key
+from .single_flight import llm_single_flight
+from .monitoring.llm_usage import llm_usage_business, record_llm_call
 
 
-def select_model_for_agent(agent_type: str) -> models.LLMModel:
-    """
-    Selects which LLM model to use for a given agent type.
-    Uses traffic_weight for A/B testing between models.
-    
-    Args:
-        agent_type: 'JudgeAgent', 'StrategyAgent', 'CopywriterAgent', etc.
+# How often (seconds) the in-memory routing table is reloaded from llm_models
+LLM_ROUTING_REFRESH_SECONDS = float(os.getenv("LLM_ROUTING_REFRESH_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class RoutedModel:
+    """Immutable snapshot of an active LLMModel row, safe to share across threads."""
+    model_id: int
+    model_name: str
+    provider: str
+    agent_type: str
+    traffic_weight: float
     
-    Returns:
-        LLMModel configuration with provider and model_name
+    @property
+    def label(self) -> str:
+        return f"{self.provider.upper()}/{self.model_name}"
+
+
+def _load_active_models() -> List[RoutedModel]:
+    """Read every active model from the database in one query."""
+    db = SessionLocal()
+    try:
+        rows = db.query(models.LLMModel).filter(models.LLMModel.is_active == True).all()
+        return [
+            RoutedModel(
+                model_id=row.model_id,
+                model_name=row.model_name,
+                provider=row.provider,
+                agent_type=row.agent_type,
+                traffic_weight=float(row.traffic_weight or 0),
+            )
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+
+def _unit_hash(value: str) -> float:
+    """Deterministic float in [0, 1) for sticky assignment."""
+    return int(hashlib.sha256(value.encode("utf-8")).hexdigest()[:15], 16) / float(16 ** 15)
+
+
+class ModelRoutingTable:
+    """
+    In-memory routing table of active LLM models per agent type.
     
-    Raises:
-        ValueError: If no active model found for agent_type
+    Loaded with a single query and refreshed every ``refresh_seconds`` (or via
+    reload()), so selection never touches the database on the request path.
+    Selection is weighted random by traffic_weight; with a business_id the
+    draw is a hash of (agent_type, business_id), so a business keeps the same
+    model for as long as the weights don't change. Per-model call counts,
+    errors and latency are kept for A/B comparison.
     """
-    db = SessionLocal()
     
-    try:
-        # Get all active models for this agent type
-        active_models = db.query(models.LLMModel).filter(
-            models.LLMModel.agent_type == agent_type,
-            models.LLMModel.is_active == True
-        ).order_by(models.LLMModel.traffic_weight.desc()).all()
+    def __init__(
+        self,
+        loader: Callable[[], List[RoutedModel]] = _load_active_models,
+        refresh_seconds: float = LLM_ROUTING_REFRESH_SECONDS,
+    ):
+        self._loader = loader
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        # agent_type -> (models by weight desc, cumulative weights)
+        self._routes: Dict[str, Tuple[Tuple[RoutedModel, ...], Tuple[float, ...]]] = {}
+        self._loaded_at: Optional[float] = None
+        self._calls: Dict[str, Dict[str, float]] = {}
+    
+    def reload(self) -> dict:
+        """
+        Rebuild the table from the loader; keeps the previous table if loading
+        fails. A failed first load leaves the table empty until the next interval.
+        """
+        try:
+            rows = self._loader()
+        except Exception as e:
+            with self._lock:
+                # Retry after the next interval rather than on every call
+                self._loaded_at = time.monotonic()
+            print(f"⚠️ Keeping previous LLM routing table; reload failed: {type(e).__name__}")
+            return self.stats()
         
-        if not active_models:
-            raise ValueError(f"No active LLM model configured for {agent_type}")
+        grouped: Dict[str, List[RoutedModel]] = {}
+        for row in rows:
+            grouped.setdefault(row.agent_type, []).append(row)
         
-        # For now, return the model with highest traffic weight
-        # TODO: Implement weighted random selection for true A/B testing
-        selected = active_models[0]
+        routes = {}
+        for agent_type, candidates in grouped.items():
+            candidates.sort(key=lambda m: m.traffic_weight, reverse=True)
+            cumulative, total = [], 0.0
+            for candidate in candidates:
+                total += max(candidate.traffic_weight, 0.0)
+                cumulative.append(total)
+            routes[agent_type] = (tuple(candidates), tuple(cumulative))
         
-        return selected
+        with self._lock:
+            self._routes = routes
+            self._loaded_at = time.monotonic()
+        return self.stats()
+    
+    def _current_routes(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at >= self.refresh_seconds:
+            self.reload()
+        return self._routes
+    
+    def select(self, agent_type: str, business_id: Optional[str] = None) -> RoutedModel:
+        route = self._current_routes().get(agent_type)
+        if not route:
+            raise ValueError(f"No active LLM model configured for {agent_type}")
         
-    finally:
-        db.close()
+        candidates, cumulative = route
+        total = cumulative[-1]
+        if total <= 0:
+            # No weights configured: keep the old "first row" behaviour
+            return candidates[0]
+        
+        draw = _unit_hash(f"{agent_type}:{business_id}") if business_id else random.random()
+        index = bisect.bisect_right(cumulative, draw * total)
+        return candidates[min(index, len(candidates) - 1)]
+    
+    def models_for(self, agent_type: str) -> Tuple[RoutedModel, ...]:
+        """Active models for an agent type, highest traffic weight first."""
+        route = self._current_routes().get(agent_type)
+        return route[0] if route else ()
+    
+    def record_call(self, llm_model, latency_ms: float, success: bool, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        """Record which model served a call and how it went."""
+        label = f"{llm_model.provider.upper()}/{llm_model.model_name}"
+        with self._lock:
+            entry = self._calls.setdefault(label, {
+                "calls": 0, "errors": 0, "total_latency_ms": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0,
+            })
+            entry["calls"] += 1
+            entry["errors"] += 0 if success else 1
+            entry["total_latency_ms"] += latency_ms
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+    
+    def stats(self) -> dict:
+        with self._lock:
+            routes = {
+                agent_type: [
+                    {"model": m.label, "traffic_weight": m.traffic_weight}
+                    for m in candidates
+                ]
+                for agent_type, (candidates, _) in self._routes.items()
+            }
+            calls = {
+                label: {
+                    **entry,
+                    "avg_latency_ms": round(entry["total_latency_ms"] / entry["calls"], 1) if entry["calls"] else 0.0,
+                }
+                for label, entry in self._calls.items()
+            }
+        return {"routes": routes, "calls": calls, "refresh_seconds": self.refresh_seconds}
 
 
-def get_llm_client(llm_model: models.LLMModel):
+# Singleton instance
+model_router = ModelRoutingTable()
+
+
+def select_model_for_agent(agent_type: str, business_id: Optional[str] = None) -> RoutedModel:
     """
-    Returns the appropriate LLM client based on provider.
+    Selects which LLM model to use for a given agent type.
+    Uses traffic_weight for A/B testing between models.
     
     Args:
-        llm_model: LLMModel configuration from database
+        agent_type: 'JudgeAgent', 'StrategyAgent', 'CopywriterAgent', etc.
+        business_id: Optional; pins the business to one model (sticky assignment)
     
     Returns:
-        Initialized client (Gemini, OpenAI, or Anthropic)
-    """
-    provider = llm_model.provider.upper()
+        RoutedModel with provider and model_name
     
+    Raises:
+        ValueError: If no active model found for agent_type
+    """
+    return model_router.select(agent_type, business_id)
+
+
+# Environment variable holding the API key for each provider
+_PROVIDER_KEY_ENV = {
+    "GOOGLE": "GOOGLE_API_KEY",
+    "OPENAI": "OPENAI_API_KEY",
+    "ANTHROPIC": "ANTHROPIC_API_KEY",
+}
+
+SUPPORTED_PROVIDERS = tuple(_PROVIDER_KEY_ENV)
+
+
+def provider_configured(provider: str) -> bool:
+    """True when the provider is supported and its API key is set."""
+    env_var = _PROVIDER_KEY_ENV.get(provider.upper())
+    return bool(env_var and os.getenv(env_var))
+
+
+def _create_client(provider: str, api_key: str):
+    """Build a new SDK client for a provider."""
     if provider == "GOOGLE":
         from google import genai
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not set")
         return genai.Client(api_key=api_key)
     
     elif provider == "OPENAI":
         from openai import OpenAI
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not set")
         return OpenAI(api_key=api_key)
     
     elif provider == "ANTHROPIC":
         from anthropic import Anthropic
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not set")
         return Anthropic(api_key=api_key)
     
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
 
 
+class LLMClientRegistry:
+    """
+    Process-wide pool of provider clients keyed by (provider, credentials).
+    
+    Each SDK client owns an HTTP connection pool, so reusing it skips the SDK
+    import, client construction and TLS handshakes on every call. When a
+    provider's API key changes in the environment a new client is created;
+    the old one is retired (left usable for calls already holding it) and
+    closed with the rest on shutdown.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Tuple[str, Any]] = {}  # provider -> (key fingerprint, client)
+        self._retired: List[Any] = []
+        self._counters = {"created": 0, "reused": 0, "refreshed": 0}
+    
+    def get(self, provider: str):
+        provider = provider.upper()
+        env_var = _PROVIDER_KEY_ENV.get(provider)
+        if env_var is None:
+            raise ValueError(f"Unsupported LLM provider: {provider}")
+        api_key = os.getenv(env_var)
+        if not api_key:
+            raise ValueError(f"{env_var} not set")
+        fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        
+        with self._lock:
+            current = self._clients.get(provider)
+            if current is not None and current[0] == fingerprint:
+                self._counters["reused"] += 1
+                return current[1]
+            
+            client = _create_client(provider, api_key)
+            if current is not None:
+                self._retired.append(current[1])
+                self._counters["refreshed"] += 1
+            self._clients[provider] = (fingerprint, client)
+            self._counters["created"] += 1
+            return client
+    
+    def _drain(self) -> List[Any]:
+        with self._lock:
+            clients = [client for _, client in self._clients.values()] + self._retired
+            self._clients.clear()
+            self._retired = []
+        return clients
+    
+    def close(self) -> None:
+        """Close every pooled client (sync transports only)."""
+        for client in self._drain():
+            _close_client(client)
+    
+    async def aclose(self) -> None:
+        """Close every pooled client, including async transports (e.g. Gemini's client.aio)."""
+        for client in self._drain():
+            aio = getattr(client, "aio", None)
+            if aio is not None and hasattr(aio, "aclose"):
+                try:
+                    await aio.aclose()
+                except Exception as e:
+                    print(f"⚠️ Error closing async LLM client: {e}")
+            _close_client(client)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "providers": sorted(self._clients),
+                "retired": len(self._retired),
+            }
+
+
+def _close_client(client) -> None:
+    close = getattr(client, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception as e:
+            print(f"⚠️ Error closing LLM client: {e}")
+
+
+# Singleton instance
+llm_clients = LLMClientRegistry()
+
+
+def get_llm_client(llm_model: models.LLMModel):
+    """
+    Returns the pooled LLM client for the model's provider.
+    
+    Args:
+        llm_model: LLMModel configuration from database
+    
+    Returns:
+        Initialized client (Gemini, OpenAI, or Anthropic), shared across calls
+    """
+    return llm_clients.get(llm_model.provider)
+
+
 def call_llm(llm_model: models.LLMModel, prompt: str, system_prompt: Optional[str] = None) -> str:
     """
     Universal LLM calling function that works across providers.
     
+    Concurrent calls with the same model and prompt share one in-flight
+    request and its result (or error).
+    
     Args:
         llm_model: LLMModel configuration
         prompt: User prompt
@@ -90,6 +346,45 @@ def call_llm(llm_model: models.LLMModel, prompt: str, system_prompt: Optional[st
     Returns:
         LLM response text
     """
+    key = response_cache_key(
+        f"{llm_model.provider.upper()}/{llm_model.model_name}",
+        prompt,
+        {"system_prompt": system_prompt},
+    )
+    return llm_single_flight.do_sync(key, lambda: _call_llm(llm_model, prompt, system_prompt))
+
+
+def _call_llm(llm_model: models.LLMModel, prompt: str, system_prompt: Optional[str] = None) -> str:
+    """Make the provider call for call_llm and record which model served it."""
+    start = time.perf_counter()
+    text = None
+    try:
+        text = _call_provider(llm_model, prompt, system_prompt)
+        return text
+    finally:
+        latency_ms = (time.perf_counter() - start) * 1000
+        prompt_tokens = estimate_tokens(prompt + (system_prompt or ""))
+        completion_tokens = estimate_tokens(text) if text else 0
+        model_router.record_call(
+            llm_model,
+            latency_ms,
+            success=text is not None,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+        record_llm_call(
+            "call_llm",
+            llm_model.provider,
+            llm_model.model_name,
+            latency_ms,
+            input_tokens=prompt_tokens,
+            output_tokens=completion_tokens,
+            status="SUCCESS" if text is not None else "ERROR",
+        )
+        print(f"🧭 LLM call served by {llm_model.provider.upper()}/{llm_model.model_name} in {latency_ms:.0f}ms")
+
+
+def _call_provider(llm_model: models.LLMModel, prompt: str, system_prompt: Optional[str] = None) -> str:
     client = get_llm_client(llm_model)
     provider = llm_model.provider.upper()
     
@@ -132,4 +427,339 @@ def call_llm(llm_model: models.LLMModel, prompt: str, system_prompt: Optional[st
     except Exception as e:
         # Log error and re-raise
         print(f"LLM call failed for {llm_model.model_name}: {e}")
-        raise
\ No newline at end of file
+        raise
+
+# --- Failover, circuit breakers and hedged requests ---
+
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "3"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# A second (hedged) request is sent once the first has run longer than its
+# model's p95 latency, or this delay until enough samples exist
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "5"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Total LLM time budget for one plan, shared by every call made while building it
+PLAN_LLM_DEADLINE_SECONDS = float(os.getenv("PLAN_LLM_DEADLINE_SECONDS", "45"))
+
+_plan_deadline: ContextVar[Optional[float]] = ContextVar("plan_llm_deadline", default=None)
+
+
+class LLMUnavailableError(RuntimeError):
+    """No provider produced a response within the failover policy and deadline."""
+
+
+class LLMDeadlineExceededError(LLMUnavailableError):
+    """The caller's timeout or plan deadline ran out before any provider answered."""
+
+
+@contextmanager
+def plan_deadline(seconds: float = PLAN_LLM_DEADLINE_SECONDS):
+    """
+    Bound the LLM time of everything inside the block (e.g. one plan).
+    
+    Nested blocks can only shorten an enclosing deadline. The deadline follows
+    the async context, so tasks started inside the block share it.
+    """
+    deadline = time.monotonic() + seconds
+    current = _plan_deadline.get()
+    token = _plan_deadline.set(deadline if current is None else min(deadline, current))
+    try:
+        yield
+    finally:
+        _plan_deadline.reset(token)
+
+
+def remaining_plan_budget() -> Optional[float]:
+    """Seconds left before the current plan deadline, or None outside plan_deadline()."""
+    deadline = _plan_deadline.get()
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker: opens after ``failure_threshold`` consecutive
+    failures, then lets a single probe through after ``reset_seconds``.
+    """
+    
+    def __init__(
+        self,
+        failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = LLM_BREAKER_RESET_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._probing = False
+    
+    def record_cancelled(self) -> None:
+        """The call was abandoned (deadline, lost hedge); says nothing about the provider."""
+        with self._lock:
+            self._probing = False
+
+
+class _LatencyWindow:
+    """Recent successful latencies for one model, for p95-based hedging."""
+    
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+    
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+    
+    def p95(self) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class FailoverPolicy:
+    """
+    Calls the active models for an agent type with failover and hedging.
+    
+    The routed model goes first, then the remaining active models by traffic
+    weight, skipping providers whose circuit breaker is open. A failure moves
+    straight on to the next model; a call running past its model's p95 latency
+    gets one hedged request to the next model, and whichever answers first
+    wins. Everything is bounded by the caller's timeout and the plan deadline;
+    calls still running then are abandoned without counting against their
+    provider's breaker.
+    
+    Blocking provider calls run in worker threads, so a losing or timed-out
+    call is abandoned (its result ignored) rather than interrupted; async
+    ones (a coroutine function passed as ``invoke``) are cancelled.
+    """
+    
+    def __init__(
+        self,
+        router: Optional[ModelRoutingTable] = None,
+        call: Optional[Callable[[Any, str, Optional[str]], str]] = None,
+        failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = LLM_BREAKER_RESET_SECONDS,
+        default_hedge_delay: float = LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+    ):
+        self._router = router
+        self._call = call
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, _LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0, "deadline_exceeded": 0, "unavailable": 0}
+    
+    @property
+    def router(self) -> ModelRoutingTable:
+        return self._router or model_router
+    
+    def breaker(self, provider: str) -> CircuitBreaker:
+        provider = provider.upper()
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+            return self._breakers[provider]
+    
+    def _window(self, model: RoutedModel) -> _LatencyWindow:
+        with self._lock:
+            return self._latency.setdefault(model.label, _LatencyWindow())
+    
+    def hedge_delay(self, model: RoutedModel) -> float:
+        window = self._window(model)
+        p95 = window.p95() if len(window) >= self.min_samples else None
+        return p95 if p95 is not None else self.default_hedge_delay
+    
+    def candidates(self, agent_type: str, business_id: Optional[str] = None) -> List[RoutedModel]:
+        """Active models for an agent type in failover order (routed model first)."""
+        primary = self.router.select(agent_type, business_id)
+        others = [m for m in self.router.models_for(agent_type) if m != primary]
+        return [primary] + others
+    
+    def _bump(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+    
+    async def call(
+        self,
+        agent_type: str,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        business_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        models: Optional[Sequence[RoutedModel]] = None,
+        invoke: Optional[Callable[[RoutedModel, str, Optional[str]], Any]] = None,
+    ) -> Tuple[Any, RoutedModel]:
+        """
+        Return (response, model that served it) or raise LLMUnavailableError.
+        
+        ``models`` replaces the routed candidates (tried in the given order) and
+        ``invoke(model, prompt, system_prompt)`` the provider call; it may be a
+        coroutine function.
+        """
+        self._bump("calls")
+        call = invoke or self._call or _call_llm
+        queue = list(models) if models is not None else self.candidates(agent_type, business_id)
+        
+        budgets = [b for b in (timeout, remaining_plan_budget()) if b is not None]
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + min(budgets) if budgets else None
+        
+        running: Dict["asyncio.Task[str]", Tuple[RoutedModel, float]] = {}
+        errors: List[str] = []
+        hedged = set()
+        
+        def launch() -> Optional["asyncio.Task[str]"]:
+            while queue:
+                model = queue.pop(0)
+                if not self.breaker(model.provider).allow():
+                    errors.append(f"{model.label}: circuit open")
+                    continue
+                # The task (and its worker thread) inherits the context, so its metrics are billed to the business
+                with llm_usage_business(business_id):
+                    if asyncio.iscoroutinefunction(call):
+                        task = asyncio.ensure_future(call(model, prompt, system_prompt))
+                    else:
+                        task = asyncio.ensure_future(asyncio.to_thread(call, model, prompt, system_prompt))
+                running[task] = (model, loop.time())
+                return task
+            return None
+        
+        try:
+            launch()
+            while running:
+                now = loop.time()
+                waits = []
+                if deadline_at is not None:
+                    waits.append(deadline_at - now)
+                if queue and len(running) == 1:
+                    (model, started), = running.values()
+                    waits.append(started + self.hedge_delay(model) - now)
+                
+                done, _ = await asyncio.wait(
+                    running, timeout=max(0.0, min(waits)) if waits else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                
+                for task in done:
+                    model, started = running.pop(task)
+                    try:
+                        text = task.result()
+                    except Exception as e:
+                        self.breaker(model.provider).record_failure()
+                        errors.append(f"{model.label}: {type(e).__name__}: {e}")
+                        continue
+                    self.breaker(model.provider).record_success()
+                    self._window(model).add(loop.time() - started)
+                    if task in hedged:
+                        self._bump("hedge_wins")
+                    return text, model
+                
+                if deadline_at is not None and loop.time() >= deadline_at:
+                    # Out of time is not the providers' fault; the calls are released below
+                    self._bump("deadline_exceeded")
+                    raise LLMDeadlineExceededError(
+                        f"LLM deadline exceeded for {agent_type}; tried: {', '.join(errors) or 'no response yet'}"
+                    )
+                
+                if done and not running:
+                    # Every in-flight call failed: fail over to the next model
+                    if launch():
+                        self._bump("failovers")
+                elif not done and queue and len(running) == 1:
+                    # Still waiting past p95: hedge with the next model
+                    task = launch()
+                    if task is not None:
+                        hedged.add(task)
+                        self._bump("hedges")
+            
+            self._bump("unavailable")
+            raise LLMUnavailableError(f"All LLM providers failed for {agent_type}: {'; '.join(errors)}")
+        finally:
+            for task, (model, _) in running.items():
+                task.cancel()
+                self.breaker(model.provider).record_cancelled()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            breakers = {p: {"state": b.state, "failures": b.failures} for p, b in self._breakers.items()}
+            latency = {
+                label: {"samples": len(w), "p95_ms": round(w.p95() * 1000, 1) if len(w) else None}
+                for label, w in self._latency.items()
+            }
+            counters = dict(self._counters)
+        return {**counters, "breakers": breakers, "latency": latency}
+
+
+# Singleton instance
+llm_failover = FailoverPolicy()
+
+
+def failover_candidates(agent_type: str, business_id: Optional[str] = None) -> List[RoutedModel]:
+    """
+    Active models for an agent type in the order call_llm_with_failover tries them.
+    
+    Raises:
+        ValueError: If no active model found for agent_type
+    """
+    return llm_failover.candidates(agent_type, business_id)
+
+
+async def call_llm_with_failover(
+    agent_type: str,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    business_id: Optional[str] = None,
+    timeout: Optional[float] = None,
+    models: Optional[Sequence[RoutedModel]] = None,
+    invoke: Optional[Callable[[RoutedModel, str, Optional[str]], Any]] = None,
+) -> Tuple[Any, RoutedModel]:
+    """
+    Call the routed model for an agent type, failing over / hedging across
+    the other active models (see FailoverPolicy).
+    
+    Args:
+        models: Candidates to try instead of the routed ones, in order
+        invoke: Provider call used instead of call_llm; may be async
+    
+    Returns:
+        (response text, or whatever ``invoke`` returned; model that served it)
+    
+    Raises:
+        LLMUnavailableError: every candidate failed, was circuit-open, or the deadline passed
+    """
+    return await llm_failover.call(
+        agent_type, prompt, system_prompt, business_id, timeout, models=models, invoke=invoke
+    )
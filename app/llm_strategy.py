@@ -1,26 +1,52 @@
+import asyncio
+import functools
 import os
-from typing import List
-
-from google import genai
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, List, Optional, Tuple
 
 from .schemas import GrowthPlan
+from .llm_cache import estimate_tokens, llm_response_cache, response_cache_key
+from .monitoring.llm_usage import record_llm_call
+from .single_flight import llm_single_flight
+from .llm_router import (
+    LLMDeadlineExceededError,
+    LLMUnavailableError,
+    RoutedModel,
+    SUPPORTED_PROVIDERS,
+    call_llm,
+    call_llm_with_failover,
+    failover_candidates,
+    llm_clients,
+    provider_configured,
+    remaining_plan_budget,
+)
 
 
 # Environment variable name for your key
 _API_ENV_VAR = "GOOGLE_API_KEY"
 
-_api_key = os.getenv(_API_ENV_VAR)
+# Gemini client override (tests); by default the pooled client from
+# llm_router.llm_clients is used, created on the first commentary request so
+# importing this module doesn't pull in the google-genai SDK
+_UNSET = object()
+_client: Any = _UNSET
+
+
+def _get_client():
+    """The Gemini client, or None when no API key is configured."""
+    if _client is not _UNSET:
+        return _client
+    if not os.getenv(_API_ENV_VAR):
+        return None
+    try:
+        return llm_clients.get("GOOGLE")
+    except Exception as e:
+        print(f"⚠️ Could not create Gemini client: {type(e).__name__}: {e}")
+        return None
 
-# --- DEBUGGING BLOCK START ---
-if _api_key:
-    # Key is found, try to initialize client
-    _client = genai.Client(api_key=_api_key)
-    print("✅ Gemini Client successfully initialized.")
-else:
-    # Key is not found, client remains None
-    _client = None
-    print(f"⚠️ API Key not found in environment variable: {_API_ENV_VAR}. Using fallback strategy.")
-# --- DEBUGGING BLOCK END ---
 
 _SYSTEM_PROMPT = """
 You are a McKinsey-level growth strategist specializing in SME scale-up strategies. Your analyses have helped 200+ businesses achieve 3-5x revenue growth.
@@ -83,15 +109,39 @@ FORMAT: Use markdown headers (##) and bullet points for readability.
 """.strip()
 
 
-def generate_strategy_commentary(plan: GrowthPlan) -> str:
-    """
-    Use Gemini to generate executive-level strategic commentary.
-    Falls back to a simple deterministic explanation if no API key is set.
-    """
+# Strategy commentary is served by the active llm_models rows for this agent type
+COMMENTARY_AGENT_TYPE = "JudgeAgent"
+
+# Model used when no JudgeAgent row is configured, and sampling settings
+_COMMENTARY_MODEL = "gemini-2.0-flash-exp"
+_DEFAULT_COMMENTARY_MODEL = RoutedModel(
+    model_id=0,
+    model_name=_COMMENTARY_MODEL,
+    provider="GOOGLE",
+    agent_type=COMMENTARY_AGENT_TYPE,
+    traffic_weight=1.0,
+)
+# Cache / single-flight namespace: one commentary per prompt, whichever model served it
+_CACHE_MODEL = f"{COMMENTARY_AGENT_TYPE}/strategy_commentary"
+_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "max_output_tokens": 1024,
+}
+
+# Upper bound on one commentary call; slower responses use the fallback text
+LLM_COMMENTARY_TIMEOUT_SECONDS = float(os.getenv("LLM_COMMENTARY_TIMEOUT_SECONDS", "30"))
+
+# Recent streams kept for the time-to-first-token percentiles
+COMMENTARY_STREAM_SAMPLE_SIZE = int(os.getenv("COMMENTARY_STREAM_SAMPLE_SIZE", "500"))
+
+
+def fallback_commentary(plan: GrowthPlan) -> str:
+    """Deterministic explanation used when the LLM is unavailable."""
     chosen = plan.chosen_experiment
 
     # Fallback message
-    fallback_message = (
+    return (
         f"## Strategic Recommendation\n\n"
         f"**Priority:** {chosen.experiment.name}\n\n"
         f"**Channel:** {chosen.experiment.channel}\n\n"
@@ -102,10 +152,10 @@ def generate_strategy_commentary(plan: GrowthPlan) -> str:
         f"the identified revenue opportunity."
     )
 
-    # Fallback if no API key configured
-    if _client is None:  # ← Should be at this level, NOT indented further
-        print("⚠️ No GOOGLE_API_KEY found - using fallback strategy")
-        return fallback_message
+
+def _build_prompt(plan: GrowthPlan) -> str:
+    """Build the commentary prompt from the plan's metrics and experiments."""
+    chosen = plan.chosen_experiment
 
     # Safe helper functions
     def safe_pct(numerator, denominator, default=0):
@@ -160,7 +210,7 @@ def generate_strategy_commentary(plan: GrowthPlan) -> str:
         for i, se in enumerate(plan.experiments[:5])  # Top 5 only
     )
 
-    prompt = f"""
+    return f"""
 BUSINESS CONTEXT:
 Company: {plan.business_profile.name}
 Industry: {plan.business_profile.industry}
@@ -208,37 +258,497 @@ Resource Requirement: {chosen.effort}/5
 Generate a 400-word executive strategic brief following the 3-section structure in your system prompt. Use their specific numbers. Be concrete, actionable, and professional.
 """.strip()
 
+
+def _response_text(response) -> str:
+    """Extract commentary text from a Gemini response ("" if it came back empty)."""
+    text = (response.text or "").strip()
+    
+    # Enhanced logging
+    if not text:
+        print(f"⚠️ Gemini returned empty response")
+        if hasattr(response, 'candidates'):
+            print(f"Candidates: {response.candidates}")
+        if hasattr(response, 'prompt_feedback'):
+            print(f"Prompt feedback: {response.prompt_feedback}")
+        return text
+    
+    print(f"✅ Gemini generated {len(text)} characters of strategy commentary")
+    return text
+
+
+def _output_tokens(response) -> Optional[int]:
+    """Completion token count reported by Gemini, if any."""
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "candidates_token_count", None) if usage else None
+
+
+def _usage_tokens(response, prompt: str, text: str) -> Tuple[int, int]:
+    """(input, output) tokens reported by Gemini, estimated when it doesn't say."""
+    usage = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(usage, "prompt_token_count", None) if usage else None
+    output_tokens = _output_tokens(response) if response is not None else None
+    return (
+        input_tokens or estimate_tokens(prompt),
+        output_tokens or (estimate_tokens(text) if text else 0),
+    )
+
+
+def _record_call(
+    business_id: Optional[str],
+    started: float,
+    status: str = "SUCCESS",
+    tokens: Tuple[int, int] = (0, 0),
+    cache_hit: bool = False,
+    model: RoutedModel = _DEFAULT_COMMENTARY_MODEL,
+) -> None:
+    record_llm_call(
+        "strategy_commentary",
+        model.provider,
+        model.model_name,
+        (time.perf_counter() - started) * 1000,
+        input_tokens=tokens[0],
+        output_tokens=tokens[1],
+        cache_hit=cache_hit,
+        status=status,
+        business_id=business_id,
+    )
+
+
+def _provider_available(provider: str) -> bool:
+    if provider.upper() == "GOOGLE":
+        return _get_client() is not None
+    return provider_configured(provider)
+
+
+def _commentary_models(business_id: Optional[str]) -> List[RoutedModel]:
+    """
+    Active JudgeAgent models in failover order, limited to providers with an
+    API key. Without a configured JudgeAgent row the default Gemini model is used.
+    """
+    if not any(_provider_available(provider) for provider in SUPPORTED_PROVIDERS):
+        # No client to call - don't consult the routing table at all
+        return []
     try:
-        print(f"🤖 Calling Gemini API for strategy commentary...")
-        print(f"📝 Prompt length: {len(prompt)} characters")
-        
-        response = _client.models.generate_content(
-            model="gemini-2.0-flash-exp",
+        candidates = failover_candidates(COMMENTARY_AGENT_TYPE, business_id)
+    except ValueError:
+        candidates = [_DEFAULT_COMMENTARY_MODEL]
+    return [m for m in candidates if _provider_available(m.provider)]
+
+
+def _cached_commentary(prompt: str, bypass_cache: bool, business_id: Optional[str] = None) -> Optional[str]:
+    started = time.perf_counter()
+    cached = llm_response_cache.get(_CACHE_MODEL, prompt, _GENERATION_CONFIG, bypass=bypass_cache)
+    if cached is not None:
+        print(f"♻️ Using cached strategy commentary ({len(cached)} characters)")
+        _record_call(business_id, started, cache_hit=True)
+    return cached
+
+
+def _store_commentary(prompt: str, model: RoutedModel, text: str, output_tokens: Optional[int] = None) -> str:
+    """Cache a completion and return it; an empty one fails the call so the next model is tried."""
+    if not text:
+        raise ValueError(f"{model.label} returned an empty response")
+    llm_response_cache.put(_CACHE_MODEL, prompt, _GENERATION_CONFIG, text, output_tokens)
+    return text
+
+
+def _flight_key(prompt: str) -> str:
+    """Concurrent calls with the same key share one in-flight failover call."""
+    return response_cache_key(_CACHE_MODEL, prompt, _GENERATION_CONFIG)
+
+
+def _fetch_commentary(
+    model: RoutedModel,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    business_id: Optional[str] = None,
+) -> str:
+    """Failover invoke for the blocking path: one commentary call to ``model``."""
+    if model.provider.upper() != "GOOGLE":
+        return _store_commentary(prompt, model, call_llm(model, prompt, system_prompt))
+    
+    started = time.perf_counter()
+    try:
+        response = _get_client().models.generate_content(
+            model=model.model_name,
+            contents=prompt,
+            config=_GENERATION_CONFIG,
+        )
+    except Exception:
+        _record_call(business_id, started, "ERROR", (estimate_tokens(prompt), 0), model=model)
+        raise
+    text = _response_text(response)
+    _record_call(business_id, started, "SUCCESS" if text else "ERROR", _usage_tokens(response, prompt, text), model=model)
+    return _store_commentary(prompt, model, text, _output_tokens(response))
+
+
+async def _fetch_commentary_async(
+    model: RoutedModel,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    business_id: Optional[str] = None,
+) -> str:
+    """
+    Failover invoke for the async path: one commentary call to ``model``.
+    
+    Gemini uses its async client, so a timed-out or losing call is cancelled;
+    other providers go through llm_router.call_llm in a worker thread.
+    """
+    if model.provider.upper() != "GOOGLE":
+        text = await asyncio.to_thread(call_llm, model, prompt, system_prompt)
+        return _store_commentary(prompt, model, text)
+    
+    started = time.perf_counter()
+    try:
+        response = await _get_client().aio.models.generate_content(
+            model=model.model_name,
             contents=prompt,
-            config={
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "max_output_tokens": 1024,
-            }
+            config=_GENERATION_CONFIG,
         )
+    except Exception:
+        _record_call(business_id, started, "ERROR", (estimate_tokens(prompt), 0), model=model)
+        raise
+    text = _response_text(response)
+    _record_call(business_id, started, "SUCCESS" if text else "ERROR", _usage_tokens(response, prompt, text), model=model)
+    return _store_commentary(prompt, model, text, _output_tokens(response))
+
+
+def _commentary_timeout(timeout: Optional[float]) -> float:
+    """``timeout`` (default LLM_COMMENTARY_TIMEOUT_SECONDS) capped by the remaining plan deadline."""
+    timeout = LLM_COMMENTARY_TIMEOUT_SECONDS if timeout is None else timeout
+    budget = remaining_plan_budget()
+    return timeout if budget is None else min(timeout, max(budget, 0.0))
+
+
+def _record_timeout(business_id: Optional[str], started: float, prompt: str, model: RoutedModel) -> None:
+    # Calls abandoned at the deadline can't report their own outcome
+    _record_call(business_id, started, "TIMEOUT", (estimate_tokens(prompt), 0), model=model)
+
+
+def generate_strategy_commentary(plan: GrowthPlan, bypass_cache: bool = False) -> str:
+    """
+    Use the active JudgeAgent models to generate executive-level strategic commentary.
+    Falls back to a simple deterministic explanation if no provider is configured
+    or every model fails (see llm_router.call_llm_with_failover).
+
+    Identical prompts are answered from the LLM response cache unless
+    ``bypass_cache`` is set (a fresh completion still refreshes the cache).
+
+    Blocks the calling thread (and must not be called from a running event
+    loop); async code should use generate_strategy_commentary_async instead.
+    """
+    fallback_message = fallback_commentary(plan)
+    business_id = plan.business_profile.business_id
+
+    # Fallback if no API key configured
+    models = _commentary_models(business_id)
+    if not models:
+        print("⚠️ No LLM provider configured for strategy commentary - using fallback strategy")
+        return fallback_message
+
+    prompt = _build_prompt(plan)
+    cached = _cached_commentary(prompt, bypass_cache, business_id)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    try:
+        print(f"🤖 Calling {models[0].label} for strategy commentary...")
+        print(f"📝 Prompt length: {len(prompt)} characters")
         
-        text = (response.text or "").strip()
+        text, _ = llm_single_flight.do_sync(_flight_key(prompt), lambda: asyncio.run(call_llm_with_failover(
+            COMMENTARY_AGENT_TYPE, prompt, business_id=business_id,
+            models=models, invoke=functools.partial(_fetch_commentary, business_id=business_id),
+        )))
+        return text
         
-        # Enhanced logging
-        if not text:
-            print(f"⚠️ Gemini returned empty response")
-            if hasattr(response, 'candidates'):
-                print(f"Candidates: {response.candidates}")
-            if hasattr(response, 'prompt_feedback'):
-                print(f"Prompt feedback: {response.prompt_feedback}")
-            return fallback_message
+    except LLMDeadlineExceededError as e:
+        _record_timeout(business_id, started, prompt, models[0])
+        print(f"⏱️ {e} - using fallback strategy")
+        return fallback_message
+    except LLMUnavailableError as e:
+        print(f"❌ {e} - using fallback strategy")
+        return fallback_message
+
+
+async def generate_strategy_commentary_with_model(
+    plan: GrowthPlan,
+    timeout: Optional[float] = None,
+    bypass_cache: bool = False,
+) -> Tuple[str, Optional[RoutedModel]]:
+    """
+    Same as generate_strategy_commentary_async, but also returns the model
+    that served the commentary (None for cached or fallback text).
+    """
+    fallback_message = fallback_commentary(plan)
+    business_id = plan.business_profile.business_id
+
+    models = _commentary_models(business_id)
+    if not models:
+        print("⚠️ No LLM provider configured for strategy commentary - using fallback strategy")
+        return fallback_message, None
+
+    prompt = _build_prompt(plan)
+    cached = _cached_commentary(prompt, bypass_cache, business_id)
+    if cached is not None:
+        return cached, None
+    # Never outlive the plan's LLM deadline (see llm_router.plan_deadline)
+    timeout = _commentary_timeout(timeout)
+    if timeout <= 0:
+        print("⏱️ Plan LLM deadline already spent - using fallback strategy")
+        return fallback_message, None
+
+    started = time.perf_counter()
+    try:
+        print(f"🤖 Calling {models[0].label} (async) for strategy commentary...")
+        print(f"📝 Prompt length: {len(prompt)} characters")
         
-        print(f"✅ Gemini generated {len(text)} characters of strategy commentary")
-        return text
+        return await llm_single_flight.do(_flight_key(prompt), lambda: call_llm_with_failover(
+            COMMENTARY_AGENT_TYPE, prompt, business_id=business_id, timeout=timeout,
+            models=models, invoke=functools.partial(_fetch_commentary_async, business_id=business_id),
+        ))
         
+    except LLMDeadlineExceededError as e:
+        _record_timeout(business_id, started, prompt, models[0])
+        print(f"⏱️ {e} - using fallback strategy")
+        return fallback_message, None
+    except LLMUnavailableError as e:
+        print(f"❌ {e} - using fallback strategy")
+        return fallback_message, None
+
+
+async def generate_strategy_commentary_async(
+    plan: GrowthPlan,
+    timeout: Optional[float] = None,
+    bypass_cache: bool = False,
+) -> str:
+    """
+    Async version of generate_strategy_commentary.
+
+    The call never blocks the event loop. Models are tried through
+    llm_router.call_llm_with_failover (failover, hedging, circuit breakers);
+    after ``timeout`` seconds (default LLM_COMMENTARY_TIMEOUT_SECONDS, capped
+    by the remaining plan deadline) the calls are cancelled and the fallback
+    text is returned instead. Identical prompts already in flight share one
+    request; it is cancelled once every caller waiting on it has been cancelled.
+    """
+    text, _ = await generate_strategy_commentary_with_model(plan, timeout, bypass_cache)
+    return text
+
+
+class CommentaryStreamStats:
+    """Time-to-first-token and outcome counters for streamed commentary."""
+
+    def __init__(self, sample_size: int = COMMENTARY_STREAM_SAMPLE_SIZE):
+        self._lock = threading.Lock()
+        self._ttft = deque(maxlen=sample_size)
+        self._durations = deque(maxlen=sample_size)
+        self._counters = {"streams": 0, "completed": 0, "cached": 0, "fallbacks": 0, "truncated": 0}
+
+    def record(self, outcome: str, ttft: Optional[float] = None, duration: Optional[float] = None) -> None:
+        with self._lock:
+            self._counters["streams"] += 1
+            self._counters[outcome] += 1
+            if ttft is not None:
+                self._ttft.append(ttft)
+            if duration is not None:
+                self._durations.append(duration)
+
+    @staticmethod
+    def _percentile(samples: List[float], pct: float) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return round(ordered[min(len(ordered) - 1, int(pct * len(ordered)))], 4)
+
+    def stats(self) -> dict:
+        with self._lock:
+            ttft, durations = list(self._ttft), list(self._durations)
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "ttft_seconds": {
+                "samples": len(ttft),
+                "p50": self._percentile(ttft, 0.50),
+                "p95": self._percentile(ttft, 0.95),
+                "max": round(max(ttft), 4) if ttft else None,
+            },
+            "stream_seconds": {
+                "p50": self._percentile(durations, 0.50),
+                "p95": self._percentile(durations, 0.95),
+            },
+        }
+
+
+# Singleton instance
+commentary_stream_stats = CommentaryStreamStats()
+
+
+async def _close_stream(chunks) -> None:
+    aclose = getattr(chunks, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception as e:
+            print(f"⚠️ Error closing commentary stream: {e}")
+
+
+async def _open_commentary_stream(
+    model: RoutedModel,
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    business_id: Optional[str] = None,
+):
+    """
+    Failover invoke for streaming: open ``model``'s stream and wait for its first token.
+
+    Returns (first text chunk, remaining chunks, usage metadata so far). Only
+    Gemini streams; other providers answer in one piece with no remaining chunks.
+    The stream is closed if this call fails or is cancelled.
+    """
+    if model.provider.upper() != "GOOGLE":
+        return await _fetch_commentary_async(model, prompt, system_prompt, business_id), None, None
+
+    started = time.perf_counter()
+    chunks = None
+    try:
+        stream = await _get_client().aio.models.generate_content_stream(
+            model=model.model_name,
+            contents=prompt,
+            config=_GENERATION_CONFIG,
+        )
+        chunks = stream.__aiter__()
+        usage = None
+        while True:
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                raise ValueError(f"{model.label} returned an empty response")
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if chunk.text:
+                return chunk.text, chunks, usage
+    except asyncio.CancelledError:
+        if chunks is not None:
+            await _close_stream(chunks)
+        raise
+    except Exception:
+        _record_call(business_id, started, "ERROR", (estimate_tokens(prompt), 0), model=model)
+        if chunks is not None:
+            await _close_stream(chunks)
+        raise
+
+
+async def stream_strategy_commentary(
+    plan: GrowthPlan,
+    timeout: Optional[float] = None,
+    bypass_cache: bool = False,
+) -> AsyncIterator[str]:
+    """
+    Stream the strategy commentary as the serving model produces it.
+
+    Uses the same prompt and models as generate_strategy_commentary and yields
+    text chunks; joining them gives the full commentary. The stream is opened
+    through llm_router.call_llm_with_failover, so a model that fails or is slow
+    to its first token is failed over or hedged. A cached completion is
+    yielded in one piece, and the fallback text is yielded when there is no
+    provider or every model fails before the first token. If the stream breaks
+    off midway the fallback is appended so the brief never ends silently.
+    The whole stream is bounded by ``timeout`` (default
+    LLM_COMMENTARY_TIMEOUT_SECONDS, capped by the remaining plan deadline).
+    The upstream stream is closed when it ends, fails, times out or the
+    consumer stops iterating.
+    """
+    fallback_message = fallback_commentary(plan)
+    business_id = plan.business_profile.business_id
+
+    models = _commentary_models(business_id)
+    if not models:
+        print("⚠️ No LLM provider configured for strategy commentary - using fallback strategy")
+        commentary_stream_stats.record("fallbacks")
+        yield fallback_message
+        return
+
+    prompt = _build_prompt(plan)
+    cached = _cached_commentary(prompt, bypass_cache, business_id)
+    if cached is not None:
+        commentary_stream_stats.record("cached")
+        yield cached
+        return
+
+    timeout = _commentary_timeout(timeout)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    started = time.perf_counter()
+    ttft: Optional[float] = None
+    parts: List[str] = []
+    error: Optional[str] = None
+    status = "SUCCESS"
+
+    print(f"🤖 Streaming strategy commentary from {models[0].label}...")
+    print(f"📝 Prompt length: {len(prompt)} characters")
+    try:
+        (first, chunks, usage), model = await call_llm_with_failover(
+            COMMENTARY_AGENT_TYPE, prompt, business_id=business_id, timeout=timeout,
+            models=models, invoke=functools.partial(_open_commentary_stream, business_id=business_id),
+        )
+    except LLMDeadlineExceededError as e:
+        _record_timeout(business_id, started, prompt, models[0])
+        print(f"❌ Commentary stream failed ({e}) - using fallback strategy")
+        commentary_stream_stats.record("fallbacks")
+        yield fallback_message
+        return
+    except LLMUnavailableError as e:
+        print(f"❌ Commentary stream failed ({e}) - using fallback strategy")
+        commentary_stream_stats.record("fallbacks")
+        yield fallback_message
+        return
+
+    try:
+        ttft = time.perf_counter() - started
+        print(f"⚡ First commentary token from {model.label} after {ttft * 1000:.0f}ms")
+        parts.append(first)
+        yield first
+        while chunks is not None:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0.0))
+            except StopAsyncIteration:
+                break
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            text = chunk.text
+            if not text:
+                continue
+            parts.append(text)
+            yield text
+    except asyncio.TimeoutError:
+        error, status = f"timed out after {timeout:.1f}s", "TIMEOUT"
     except Exception as e:
-        # Detailed error logging
-        print(f"❌ Gemini API error: {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return fallback_message
\ No newline at end of file
+        error, status = f"{type(e).__name__}: {str(e)}", "ERROR"
+    finally:
+        # Also when the consumer stops iterating, so the upstream HTTP stream isn't left open
+        if chunks is not None:
+            await _close_stream(chunks)
+
+    duration = time.perf_counter() - started
+    full_text = "".join(parts).strip()
+    if chunks is not None:
+        # Other providers' one-piece answers were already metered and cached by call_llm
+        _record_call(
+            business_id,
+            started,
+            status,
+            _usage_tokens(SimpleNamespace(usage_metadata=usage), prompt, full_text),
+            model=model,
+        )
+    if error is None:
+        print(f"✅ {model.label} streamed {len(full_text)} characters of strategy commentary")
+        if chunks is not None:
+            llm_response_cache.put(
+                _CACHE_MODEL, prompt, _GENERATION_CONFIG, full_text,
+                getattr(usage, "candidates_token_count", None) if usage else None,
+            )
+        commentary_stream_stats.record("completed", ttft, duration)
+        return
+
+    print(f"❌ Commentary stream from {model.label} failed ({error}) - using fallback strategy")
+    commentary_stream_stats.record("truncated", ttft, duration)
+    yield "\n\n" + fallback_message
@@ -1,4 +1,6 @@
-from typing import List
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from .schemas import (
     BusinessProfile,
@@ -8,8 +10,10 @@ from .schemas import (
     GrowthExperiment,
     ScoredExperiment,
     GrowthPlan,
+    PlanRequest,
 )
-from .llm_strategy import generate_strategy_commentary
+from .catalog import get_catalog
+from .llm_strategy import generate_strategy_commentary, generate_strategy_commentary_async
 
 
 def _conversion(numerator: int, denominator: int) -> float:
@@ -18,6 +22,20 @@ def _conversion(numerator: int, denominator: int) -> float:
     return numerator / float(denominator)
 
 
+_FUNNEL_STEPS = (
+    ("visits", "leads"),
+    ("leads", "signups"),
+    ("signups", "purchases"),
+)
+
+
+def _funnel_comment(from_step: str, to_step: str, conversion: float, drop_rate: float) -> str:
+    return (
+        f"Biggest drop is from {from_step} to {to_step}: "
+        f"conversion={conversion:.1%}, drop={drop_rate:.1%}."
+    )
+
+
 def diagnose_funnel(kpis: KpiSnapshot) -> FunnelInsight:
     """Find the biggest drop-off in the simple visits→leads→signups→purchases funnel."""
 
@@ -34,121 +52,146 @@ def diagnose_funnel(kpis: KpiSnapshot) -> FunnelInsight:
     from_step, to_step, conversion = min(steps, key=lambda x: x[2])
     drop_rate = 1.0 - conversion
 
-    comment = (
-        f"Biggest drop is from {from_step} to {to_step}: "
-        f"conversion={conversion:.1%}, drop={drop_rate:.1%}."
-    )
-
     return FunnelInsight(
         from_step=from_step,
         to_step=to_step,
         drop_rate=drop_rate,
-        comment=comment,
+        comment=_funnel_comment(from_step, to_step, conversion, drop_rate),
     )
 
 
+def diagnose_funnel_batch(visits, leads, signups, purchases) -> Dict[str, Any]:
+    """
+    Vectorized diagnose_funnel over column arrays (lists, NumPy arrays or pandas Series).
+
+    Returns a dict of equal-length NumPy arrays:
+    - visit_to_lead, lead_to_signup, signup_to_purchase: conversion rates
+    - bottleneck: index into the funnel steps (0=visits→leads, 1=leads→signups, 2=signups→purchases)
+    - from_step, to_step: step names for the bottleneck
+    - conversion, drop_rate: conversion and drop at the bottleneck
+
+    Zero/negative denominators give a 0.0 conversion and ties pick the earliest
+    step, exactly like the scalar version. Use funnel_insights_from_batch() to
+    get FunnelInsight objects.
+    """
+    import numpy as np
+
+    counts = [np.asarray(col, dtype=np.int64) for col in (visits, leads, signups, purchases)]
+    if len({c.shape for c in counts}) != 1 or counts[0].ndim != 1:
+        raise ValueError("visits, leads, signups and purchases must be 1-D arrays of equal length")
+
+    # rates[:, i] is the conversion from counts[i] to counts[i + 1]
+    numerators = np.stack(counts[1:], axis=1).astype(np.float64)
+    denominators = np.stack(counts[:-1], axis=1).astype(np.float64)
+    rates = np.zeros_like(numerators)
+    np.divide(numerators, denominators, out=rates, where=denominators > 0)
+
+    bottleneck = np.argmin(rates, axis=1)
+    conversion = rates[np.arange(len(rates)), bottleneck]
+    from_names = np.array([step[0] for step in _FUNNEL_STEPS], dtype=object)
+    to_names = np.array([step[1] for step in _FUNNEL_STEPS], dtype=object)
+
+    return {
+        "visit_to_lead": rates[:, 0],
+        "lead_to_signup": rates[:, 1],
+        "signup_to_purchase": rates[:, 2],
+        "bottleneck": bottleneck,
+        "from_step": from_names[bottleneck],
+        "to_step": to_names[bottleneck],
+        "conversion": conversion,
+        "drop_rate": 1.0 - conversion,
+    }
+
+
+def funnel_insights_from_batch(batch: Dict[str, Any]) -> List[FunnelInsight]:
+    """Materialize diagnose_funnel_batch() output as FunnelInsight objects."""
+    return [
+        FunnelInsight(
+            from_step=from_step,
+            to_step=to_step,
+            drop_rate=drop_rate,
+            comment=_funnel_comment(from_step, to_step, conversion, drop_rate),
+        )
+        for from_step, to_step, conversion, drop_rate in zip(
+            batch["from_step"],
+            batch["to_step"],
+            batch["conversion"].tolist(),
+            batch["drop_rate"].tolist(),
+        )
+    ]
+
+
 def propose_experiments(
     business: BusinessProfile,
     goal: GrowthGoal,
     insight: FunnelInsight,
 ) -> List[GrowthExperiment]:
-    """Very simple rule-based experiment generator.
+    """Rule-based experiment generator backed by the experiment catalog.
 
-    Later we can let a Gemini agent propose experiments, but this keeps
-    the system deterministic and easy to test.
+    Experiments come from catalogs/experiments.json, indexed by bottleneck and
+    industry (see catalog.py), which keeps the system deterministic and easy
+    to test. Later we can let a Gemini agent propose experiments.
     """
-    exps: List[GrowthExperiment] = []
-
-    bottleneck = (insight.from_step, insight.to_step)
-
-    if bottleneck == ("visits", "leads"):
-        exps.append(
-            GrowthExperiment(
-                name="Lead Magnet Landing Page",
-                channel="website",
-                hypothesis=(
-                    "A focused landing page with a clear lead magnet will "
-                    "convert more visitors into captured leads."
-                ),
-                description=(
-                    "Launch a simple landing page offering a freebie or "
-                    "discount in exchange for email sign-up."
-                ),
-            )
-        )
-        exps.append(
-            GrowthExperiment(
-                name="Referral Program",
-                channel="email",
-                hypothesis=(
-                    "Existing customers will refer similar customers when given "
-                    "a clear, simple reward."
-                ),
-                description=(
-                    "Introduce a 'Give $5, Get $5' referral link in receipts "
-                    "and follow-up emails."
-                ),
-            )
-        )
+    return list(get_catalog().lookup(insight.from_step, insight.to_step, business.industry))
+
+
+# ICE rule table, in priority order: the first rule with any keyword in the
+# (lowercased) experiment name sets impact and confidence.
+ICE_RULES: List[Tuple[Tuple[str, ...], int, int]] = [
+    (("referral",), 5, 3),
+    (("loyalty", "punch card"), 4, 4),
+    (("win-back", "winback"), 4, 3),
+    (("onboarding", "nurture"), 5, 4),
+    (("demo", "live"), 4, 3),
+    (("lead magnet", "landing page"), 5, 4),
+    (("feedback", "survey"), 3, 5),
+]
+ICE_DEFAULT_SCORES = (4, 3)  # unmatched experiments
+
+# Effort heuristic: email < website < in-store/events
+CHANNEL_EFFORT: Dict[str, int] = {
+    "email": 2,
+    "website": 3,
+    "online": 3,
+}
+DEFAULT_CHANNEL_EFFORT = 4
+
+
+def _compile_ice_rules(rules: List[Tuple[Tuple[str, ...], int, int]]) -> "re.Pattern[str]":
+    """One regex for every rule keyword.
+
+    Each rule is a named group r<index>, wrapped in a zero-width lookahead so
+    finditer tries every position and reports overlapping keywords too; the
+    winner is the lowest rule index seen, which matches the old if/elif order.
+    """
+    alternatives = "|".join(
+        f"(?P<r{i}>{'|'.join(re.escape(k) for k in keywords)})"
+        for i, (keywords, _, _) in enumerate(rules)
+    )
+    return re.compile(f"(?=(?:{alternatives}))")
 
-    elif bottleneck == ("leads", "signups"):
-        exps.append(
-            GrowthExperiment(
-                name="Onboarding Nurture Sequence",
-                channel="email",
-                hypothesis=(
-                    "A short, value-packed email sequence will turn more leads "
-                    "into account signups."
-                ),
-            )
-        )
-        exps.append(
-            GrowthExperiment(
-                name="Live Demo / Taster Session",
-                channel="events",
-                hypothesis=(
-                    "Low-friction live demos reduce uncertainty and increase "
-                    "signup conversions."
-                ),
-            )
-        )
 
-    else:  # ("signups", "purchases") or anything else
-        exps.append(
-            GrowthExperiment(
-                name="Loyalty Punch Card",
-                channel="in-store",
-                hypothesis=(
-                    "Rewarding repeat visits with a punch card will increase "
-                    "purchase frequency."
-                ),
-            )
-        )
-        exps.append(
-            GrowthExperiment(
-                name="Win-Back Campaign",
-                channel="email",
-                hypothesis=(
-                    "Targeted offers to lapsed customers will reactivate a "
-                    "portion of them."
-                ),
-            )
-        )
+_ICE_MATCHER = _compile_ice_rules(ICE_RULES)
+
+
+@lru_cache(maxsize=4096)
+def _ice_rule_scores(name: str) -> Tuple[int, int]:
+    """(impact, confidence) for an experiment name."""
+    best: Optional[int] = None
+    for match in _ICE_MATCHER.finditer(name.lower()):
+        rule = int(match.lastgroup[1:])
+        if best is None or rule < best:
+            best = rule
+            if best == 0:
+                break
+    if best is None:
+        return ICE_DEFAULT_SCORES
+    _, impact, confidence = ICE_RULES[best]
+    return impact, confidence
 
-    if not exps:
-        # Fallback safety net
-        exps.append(
-            GrowthExperiment(
-                name="Customer Feedback Survey",
-                channel="email",
-                hypothesis=(
-                    "Understanding customer friction points will reveal the "
-                    "highest-leverage growth opportunities."
-                ),
-            )
-        )
 
-    return exps
+def _channel_effort(channel: str) -> int:
+    return CHANNEL_EFFORT.get(channel.lower(), DEFAULT_CHANNEL_EFFORT)
 
 
 def score_experiments_ice(experiments: List[GrowthExperiment]) -> List[ScoredExperiment]:
@@ -157,36 +200,8 @@ def score_experiments_ice(experiments: List[GrowthExperiment]) -> List[ScoredExp
     scored: List[ScoredExperiment] = []
 
     for exp in experiments:
-        name = exp.name.lower()
-        channel = exp.channel.lower()
-
-        # Default scores for unmatched experiments
-        impact = 4
-        confidence = 3
-
-        # Adjust scores based on experiment type
-        if "referral" in name:
-            impact, confidence = 5, 3
-        elif "loyalty" in name or "punch card" in name:
-            impact, confidence = 4, 4
-        elif "win-back" in name or "winback" in name:
-            impact, confidence = 4, 3
-        elif "onboarding" in name or "nurture" in name:
-            impact, confidence = 5, 4
-        elif "demo" in name or "live" in name:
-            impact, confidence = 4, 3
-        elif "lead magnet" in name or "landing page" in name:
-            impact, confidence = 5, 4
-        elif "feedback" in name or "survey" in name:
-            impact, confidence = 3, 5
-
-        # Effort heuristic: email < website < in-store/events
-        if channel == "email":
-            effort = 2
-        elif channel in {"website", "online"}:
-            effort = 3
-        else:
-            effort = 4
+        impact, confidence = _ice_rule_scores(exp.name)
+        effort = _channel_effort(exp.channel)
 
         priority_score = (impact * confidence) / float(effort)
 
@@ -204,6 +219,55 @@ def score_experiments_ice(experiments: List[GrowthExperiment]) -> List[ScoredExp
     return scored
 
 
+def ice_score_arrays(experiments: List[GrowthExperiment]) -> Dict[str, Any]:
+    """
+    Vectorized ICE scores for a large candidate list, in input order.
+
+    Returns NumPy arrays 'impact', 'confidence', 'effort' and 'priority_score'
+    with the same values score_experiments_ice would assign.
+    """
+    import numpy as np
+
+    rule_scores = np.array([_ice_rule_scores(exp.name) for exp in experiments], dtype=np.int64).reshape(-1, 2)
+    effort = np.fromiter((_channel_effort(exp.channel) for exp in experiments), dtype=np.int64, count=len(experiments))
+    impact, confidence = rule_scores[:, 0], rule_scores[:, 1]
+
+    return {
+        "impact": impact,
+        "confidence": confidence,
+        "effort": effort,
+        "priority_score": (impact * confidence) / effort.astype(np.float64),
+    }
+
+
+def top_k_experiments(experiments: List[GrowthExperiment], k: int) -> List[ScoredExperiment]:
+    """
+    The k highest-priority experiments, identical to score_experiments_ice(experiments)[:k].
+
+    Scores are computed with ice_score_arrays and only the winners are turned
+    into ScoredExperiment objects. Ties keep input order, like the stable sort.
+    """
+    import numpy as np
+
+    if k <= 0 or not experiments:
+        return []
+
+    scores = ice_score_arrays(experiments)
+    priority = scores["priority_score"]
+    order = np.argsort(-priority, kind="stable")[:k]
+
+    return [
+        ScoredExperiment(
+            experiment=experiments[i],
+            impact=int(scores["impact"][i]),
+            confidence=int(scores["confidence"][i]),
+            effort=int(scores["effort"][i]),
+            priority_score=float(priority[i]),
+        )
+        for i in order.tolist()
+    ]
+
+
 def generate_copy(
     business: BusinessProfile,
     goal: GrowthGoal,
@@ -228,19 +292,19 @@ def generate_copy(
     )
 
 
-def build_growth_plan(
+def _assemble_plan(
     business: BusinessProfile,
     kpis: KpiSnapshot,
     goal: GrowthGoal,
+    funnel_insight: FunnelInsight,
 ) -> GrowthPlan:
-    """Top-level orchestration for the non-LLM version of the agent."""
-    funnel_insight = diagnose_funnel(kpis)
+    """Deterministic stages after diagnosis: propose, score, pick and write copy."""
     experiments = propose_experiments(business, goal, funnel_insight)
     scored = score_experiments_ice(experiments)
     chosen = scored[0]
     copy = generate_copy(business, goal, chosen)
 
-    plan = GrowthPlan(
+    return GrowthPlan(
         business_profile=business,
         kpis=kpis,
         goal=goal,  # 👈 ADDED THIS
@@ -249,8 +313,63 @@ def build_growth_plan(
         chosen_experiment=chosen,
         copy_suggestion=copy,
     )
+
+
+def build_deterministic_plan(
+    business: BusinessProfile,
+    kpis: KpiSnapshot,
+    goal: GrowthGoal,
+) -> GrowthPlan:
+    """Every stage except the LLM commentary (which is left empty)."""
+    return _assemble_plan(business, kpis, goal, diagnose_funnel(kpis))
+
+
+def build_growth_plan(
+    business: BusinessProfile,
+    kpis: KpiSnapshot,
+    goal: GrowthGoal,
+) -> GrowthPlan:
+    """Top-level orchestration for the non-LLM version of the agent."""
+    plan = build_deterministic_plan(business, kpis, goal)
     
     # Ask the LLM to add a strategy commentary
     plan.llm_strategy_commentary = generate_strategy_commentary(plan)
     
-    return plan
\ No newline at end of file
+    return plan
+
+
+async def build_growth_plan_async(
+    business: BusinessProfile,
+    kpis: KpiSnapshot,
+    goal: GrowthGoal,
+) -> GrowthPlan:
+    """Same as build_growth_plan, but awaits the LLM commentary without blocking the event loop."""
+    plan = build_deterministic_plan(business, kpis, goal)
+    plan.llm_strategy_commentary = await generate_strategy_commentary_async(plan)
+    return plan
+
+
+def build_growth_plans_batch(requests: List[PlanRequest]) -> List[Union[GrowthPlan, Exception]]:
+    """
+    Run the deterministic pipeline for many requests at once (no LLM commentary).
+
+    Funnel diagnosis is vectorized across the whole batch. Returns one entry per
+    request, in order: the plan, or the exception that stopped that item.
+    """
+    if not requests:
+        return []
+
+    batch = diagnose_funnel_batch(
+        [r.kpis.visits for r in requests],
+        [r.kpis.leads for r in requests],
+        [r.kpis.signups for r in requests],
+        [r.kpis.purchases for r in requests],
+    )
+
+    results: List[Union[GrowthPlan, Exception]] = []
+    for request, insight in zip(requests, funnel_insights_from_batch(batch)):
+        try:
+            results.append(_assemble_plan(request.business_profile, request.kpis, request.goal, insight))
+        except Exception as e:
+            results.append(e)
+    return results
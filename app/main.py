@@ -1,16 +1,32 @@
+import asyncio
+import json
 import logging
 import os
+import time
 import uuid
+from contextlib import asynccontextmanager
 from typing import List, Optional
-from fastapi import FastAPI, UploadFile, File, Request
+from fastapi import FastAPI, UploadFile, File, Request, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from .schemas import PlanRequest, GrowthPlan, ExperimentResultUpdate, WebhookKpiData, WebhookResponse, BusinessProfile, KpiSnapshot, GrowthGoal
-from .logic import build_growth_plan
-from .storage import log_plan, load_plans_for_business
+from .schemas import BatchPlanRequest, BatchPlanItemResult, BatchPlanResponse, CommentaryStatusResponse
+from .logic import build_growth_plan_async, build_growth_plans_batch, build_deterministic_plan
+from .llm_strategy import generate_strategy_commentary_async, stream_strategy_commentary, commentary_stream_stats
+from .storage import log_plan, log_plans, iter_plans_for_business, plan_log_writer
+from .catalog import reload_catalog
+from .db_utils import BusinessContext, load_business_context
+from .llm_router import llm_clients, model_router, llm_failover, plan_deadline
+from .plan_cache import plan_cache
+from .llm_cache import llm_response_cache
+from .single_flight import llm_single_flight
+from .commentary_jobs import commentary_jobs
+from .monitoring.llm_usage import llm_metrics_writer, get_llm_usage_by_model, get_llm_usage_by_business
+from .monitoring.performance_tracker import agent_metrics_writer
 from .parsers import parse_csv_to_plan_request
 from .orchestrator import GrowthCoPilotOrchestrator
+from .agents.base import AgentContext
 from .integrations.slack_notifier import slack_notifier
 from .integrations.email_notifier import email_notifier
 
@@ -24,11 +40,32 @@ logging.basicConfig(
 USE_MULTI_AGENT = os.getenv("USE_MULTI_AGENT", "false").lower() == "true"
 orchestrator = GrowthCoPilotOrchestrator() if USE_MULTI_AGENT else None
 
+# Batch endpoint limits
+PLAN_BATCH_MAX_ITEMS = int(os.getenv("PLAN_BATCH_MAX_ITEMS", "500"))
+PLAN_BATCH_LLM_CONCURRENCY = int(os.getenv("PLAN_BATCH_LLM_CONCURRENCY", "8"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the experiment catalog index before serving traffic
+    reload_catalog()
+    yield
+    # Finish (or cancel) deferred commentary so those plans still get logged
+    await commentary_jobs.close()
+    # Drain buffered plan log records, LLM call and agent metrics before the process exits
+    plan_log_writer.close()
+    llm_metrics_writer.close()
+    agent_metrics_writer.close()
+    # Close pooled LLM provider clients and their connection pools
+    await llm_clients.aclose()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="SME Growth Co-Pilot",
     description="Enterprise agent that turns SME KPIs into a ranked growth plan.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Mount static files and templates
@@ -36,6 +73,85 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
 
 
+def _plan_cache_namespace() -> str:
+    return "multi-agent" if USE_MULTI_AGENT and orchestrator else "monolithic"
+
+
+async def _generate_plan(request: PlanRequest, business_context: Optional[BusinessContext] = None) -> GrowthPlan:
+    """
+    Build a plan for the request, reusing the cached plan for an identical payload.
+    
+    A business_context the caller already loaded is passed on to the orchestrator.
+    """
+    namespace = _plan_cache_namespace()
+    plan = plan_cache.get(request, namespace)
+    if plan is not None:
+        return plan
+    
+    started_at = time.time()
+    if USE_MULTI_AGENT and orchestrator:
+        plan = await orchestrator.execute_plan(request, business_context=business_context)
+    else:
+        with plan_deadline():
+            plan = await build_growth_plan_async(
+                business=request.business_profile,
+                kpis=request.kpis,
+                goal=request.goal,
+            )
+    plan_cache.put(request, plan, namespace, started_at)
+    return plan
+
+
+async def _generate_commentary(plan: GrowthPlan, context: Optional[AgentContext] = None) -> str:
+    """Commentary for a plan built without it, using the same pipeline as _generate_plan."""
+    if USE_MULTI_AGENT and orchestrator:
+        return await orchestrator.generate_commentary(plan, context)
+    with plan_deadline():
+        return await generate_strategy_commentary_async(plan)
+
+
+async def _generate_plan_deferred(
+    request: PlanRequest,
+    trace_id: str,
+    recipient_emails: Optional[List[str]] = None,
+) -> GrowthPlan:
+    """
+    Return the plan without waiting for the LLM commentary.
+    
+    The commentary is generated by a background job; once it completes the
+    plan is logged, cached and notified exactly as a synchronous plan would be.
+    A cached (complete) plan is returned as-is and handled by the caller.
+    """
+    namespace = _plan_cache_namespace()
+    started_at = time.time()
+    # The Judge's commentary reads what the earlier agents recorded on the context
+    context = AgentContext(trace_id, request.business_profile.business_id)
+    
+    if USE_MULTI_AGENT and orchestrator:
+        plan = await orchestrator.execute_plan(request, include_commentary=False, context=context)
+    else:
+        plan = build_deterministic_plan(
+            business=request.business_profile,
+            kpis=request.kpis,
+            goal=request.goal,
+        )
+    
+    async def generate(pending: GrowthPlan) -> str:
+        return await _generate_commentary(pending, context)
+    
+    def on_complete(completed: GrowthPlan) -> None:
+        log_plan(request, completed)
+        if completed.commentary_status == "ready":
+            plan_cache.put(request, completed, namespace, started_at)
+        slack_notifier.send_plan_notification(completed, trace_id)
+        if recipient_emails:
+            email_notifier.send_plan_email(completed, trace_id, recipient_emails)
+    
+    commentary_jobs.submit(plan, generate, on_complete)
+    # The job keeps mutating its own plan; respond with a snapshot
+    return plan.model_copy()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard_home(request: Request):
     """Serve the main dashboard"""
@@ -50,22 +166,28 @@ async def analyze_page(request: Request):
 async def create_plan(
     request: PlanRequest,
     send_email: bool = False,
-    recipient_emails: Optional[List[str]] = None
+    recipient_emails: Optional[List[str]] = None,
+    defer_commentary: bool = False,
 ) -> GrowthPlan:
-    """Create a growth plan and log it."""
+    """
+    Create a growth plan and log it.
     
-    # Use multi-agent if enabled
-    if USE_MULTI_AGENT and orchestrator:
-        plan = await orchestrator.execute_plan(request)
-        trace_id = str(uuid.uuid4())[:8]
+    With defer_commentary=true the plan is returned as soon as the deterministic
+    stages are done, with commentary_status "pending" and a commentary_id. Fetch
+    the commentary from GET /plans/commentary/{commentary_id} (or its /events
+    SSE stream); the plan is logged and notified once the commentary is ready.
+    """
+    trace_id = str(uuid.uuid4())[:8] if USE_MULTI_AGENT and orchestrator else "monolithic"
+    
+    if defer_commentary:
+        plan = plan_cache.get(request, _plan_cache_namespace())
+        if plan is None:
+            return await _generate_plan_deferred(
+                request, trace_id, recipient_emails if send_email else None
+            )
     else:
-        # Use monolithic logic (current system)
-        plan = build_growth_plan(
-            business=request.business_profile,
-            kpis=request.kpis,
-            goal=request.goal,
-        )
-        trace_id = "monolithic"
+        # Use multi-agent if enabled, monolithic logic otherwise
+        plan = await _generate_plan(request)
     
     log_plan(request, plan)
     
@@ -79,22 +201,111 @@ async def create_plan(
     return plan
 
 
-@app.post("/plan/from-csv", response_model=GrowthPlan)
-async def create_plan_from_csv(file: UploadFile = File(...)) -> GrowthPlan:
-    """Upload a CSV file with business KPIs and get a growth plan."""
-    request = parse_csv_to_plan_request(file)
+# commentary_jobs is only safe on the event loop, so its endpoints are async
+@app.get("/plans/commentary/{commentary_id}", response_model=CommentaryStatusResponse)
+async def get_deferred_commentary(commentary_id: str):
+    """Get the status (and, once ready, the text) of a deferred commentary"""
+    job = commentary_jobs.get(commentary_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired commentary_id")
+    return job.to_dict()
+
+
+@app.get("/plans/commentary/{commentary_id}/events")
+async def stream_deferred_commentary(commentary_id: str):
+    """Server-sent events: a single 'commentary' event when the job finishes"""
+    job = commentary_jobs.get(commentary_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired commentary_id")
     
-    # Use multi-agent if enabled
-    if USE_MULTI_AGENT and orchestrator:
-        plan = await orchestrator.execute_plan(request)
-        trace_id = str(uuid.uuid4())[:8]
+    async def events():
+        while not job.done.is_set():
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+        yield f"event: commentary\ndata: {json.dumps(job.to_dict())}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/plan/stream")
+async def stream_plan(
+    request: PlanRequest,
+    recipient_emails: Optional[List[str]] = None,
+):
+    """
+    Create a growth plan and stream its AI commentary as server-sent events.
+    
+    Events, in order:
+    - plan: the plan JSON without commentary (funnel insight, experiments, copy)
+    - token: one JSON-encoded text chunk of the commentary, as the model produces it
+    - done: the complete plan JSON, after it has been logged and notified
+    
+    A cached plan is replayed as a single token event. The plan is logged even
+    if the client disconnects mid-stream (then without its commentary);
+    notifications are only sent once the stream ends.
+    """
+    trace_id = str(uuid.uuid4())[:8] if USE_MULTI_AGENT and orchestrator else "stream"
+    namespace = _plan_cache_namespace()
+    started_at = time.time()
+    
+    cached = plan_cache.get(request, namespace)
+    if cached is not None:
+        plan = cached
+    elif USE_MULTI_AGENT and orchestrator:
+        plan = await orchestrator.execute_plan(request, include_commentary=False)
     else:
-        plan = build_growth_plan(
+        plan = build_deterministic_plan(
             business=request.business_profile,
             kpis=request.kpis,
             goal=request.goal,
         )
-        trace_id = "csv-upload"
+    
+    async def events():
+        commentary = plan.llm_strategy_commentary
+        plan.llm_strategy_commentary = None
+        try:
+            yield f"event: plan\ndata: {plan.model_dump_json()}\n\n"
+            
+            if cached is not None:
+                yield f"event: token\ndata: {json.dumps(commentary or '')}\n\n"
+            else:
+                parts = []
+                async for chunk in stream_strategy_commentary(plan):
+                    parts.append(chunk)
+                    yield f"event: token\ndata: {json.dumps(chunk)}\n\n"
+                commentary = "".join(parts).strip()
+            plan.llm_strategy_commentary = commentary
+            
+            # Streamed commentary skips the Judge's annotations, so only the
+            # monolithic pipeline's plans are interchangeable with cached ones
+            if cached is None and not (USE_MULTI_AGENT and orchestrator):
+                plan_cache.put(request, plan, namespace, started_at)
+        finally:
+            # The plan was generated (and its LLM call billed) even if the client went away
+            log_plan(request, plan)
+        slack_notifier.send_plan_notification(plan, trace_id)
+        if recipient_emails:
+            email_notifier.send_plan_email(plan, trace_id, recipient_emails)
+        
+        yield f"event: done\ndata: {plan.model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/plan/from-csv", response_model=GrowthPlan)
+async def create_plan_from_csv(file: UploadFile = File(...)) -> GrowthPlan:
+    """Upload a CSV file with business KPIs and get a growth plan."""
+    request = parse_csv_to_plan_request(file)
+    
+    # Use multi-agent if enabled
+    plan = await _generate_plan(request)
+    trace_id = str(uuid.uuid4())[:8] if USE_MULTI_AGENT and orchestrator else "csv-upload"
     
     log_plan(request, plan)
     
@@ -103,10 +314,126 @@ async def create_plan_from_csv(file: UploadFile = File(...)) -> GrowthPlan:
     
     return plan
 
+@app.post("/plans/batch", response_model=BatchPlanResponse)
+async def create_plans_batch(batch: BatchPlanRequest) -> BatchPlanResponse:
+    """
+    Create growth plans for many businesses in one request.
+    
+    The deterministic pipeline runs in bulk, LLM commentary calls run concurrently
+    (at most PLAN_BATCH_LLM_CONCURRENCY at a time), all plans are logged in one
+    batch and a single Slack summary is sent. Each item reports its own error.
+    """
+    if len(batch.requests) > PLAN_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch has {len(batch.requests)} items; the limit is {PLAN_BATCH_MAX_ITEMS}",
+        )
+    
+    trace_id = str(uuid.uuid4())[:8]
+    semaphore = asyncio.Semaphore(PLAN_BATCH_LLM_CONCURRENCY)
+    namespace = _plan_cache_namespace()
+    
+    # Serve repeated payloads from the plan cache; only misses are generated
+    outcomes: List = [plan_cache.get(r, namespace) for r in batch.requests]
+    missing = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    pending = [batch.requests[i] for i in missing]
+    started_at = time.time()
+    
+    if USE_MULTI_AGENT and orchestrator:
+        async def run_agents(request: PlanRequest) -> GrowthPlan:
+            async with semaphore:
+                return await orchestrator.execute_plan(request)
+        
+        generated = await asyncio.gather(
+            *(run_agents(r) for r in pending), return_exceptions=True
+        )
+    else:
+        generated = build_growth_plans_batch(pending)
+        
+        async def add_commentary(plan: GrowthPlan) -> GrowthPlan:
+            async with semaphore:
+                with plan_deadline():
+                    plan.llm_strategy_commentary = await generate_strategy_commentary_async(plan)
+            return plan
+        
+        ready = [i for i, outcome in enumerate(generated) if isinstance(outcome, GrowthPlan)]
+        commented = await asyncio.gather(
+            *(add_commentary(generated[i]) for i in ready), return_exceptions=True
+        )
+        for i, outcome in zip(ready, commented):
+            generated[i] = outcome
+    
+    for i, outcome in zip(missing, generated):
+        outcomes[i] = outcome
+        if isinstance(outcome, GrowthPlan):
+            plan_cache.put(batch.requests[i], outcome, namespace, started_at)
+    
+    results: List[BatchPlanItemResult] = []
+    logged = []
+    for index, (request, outcome) in enumerate(zip(batch.requests, outcomes)):
+        business_id = request.business_profile.business_id
+        if isinstance(outcome, GrowthPlan):
+            logged.append((request, outcome))
+            results.append(BatchPlanItemResult(index=index, business_id=business_id, success=True, plan=outcome))
+        else:
+            results.append(BatchPlanItemResult(index=index, business_id=business_id, success=False, error=str(outcome)))
+    
+    log_plans(logged)
+    
+    # One Slack summary for the whole batch
+    failed = len(results) - len(logged)
+    slack_notifier.send_batch_summary([plan for _, plan in logged], trace_id, failed)
+    
+    return BatchPlanResponse(
+        trace_id=trace_id,
+        total=len(results),
+        succeeded=len(logged),
+        failed=failed,
+        results=results,
+    )
+
+
 @app.get("/plans/{business_id}")
-def list_plans(business_id: str):
-    """Return all historical plans for a business."""
-    return load_plans_for_business(business_id)
+def list_plans(
+    business_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """
+    Return historical plans for a business, oldest first.
+
+    - limit/cursor: page through results; the next page's cursor is returned
+      in the X-Next-Cursor header (JSON) or on each record (NDJSON).
+    - since: only plans logged at or after this ISO timestamp.
+    - format=ndjson: stream one record per line with flat memory use.
+    """
+    try:
+        records = iter_plans_for_business(business_id, since=since, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        def stream():
+            for count, (position, rec) in enumerate(records, start=1):
+                yield json.dumps({**rec, "cursor": position}) + "\n"
+                if limit and count >= limit:
+                    break
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    plans = []
+    headers = {}
+    last_position = None
+    for position, rec in records:
+        if limit and len(plans) >= limit:
+            headers["X-Next-Cursor"] = last_position
+            break
+        plans.append(rec)
+        last_position = position
+
+    return JSONResponse(plans, headers=headers)
 
 
 @app.post("/experiments/{experiment_id}/result")
@@ -123,30 +450,11 @@ async def webhook_kpis(webhook_data: WebhookKpiData):
     External systems can POST KPI data here to automatically generate growth plans.
     """
     try:
-        # Check if business exists in database, create if needed
-        from .db_utils import ensure_business_exists
-        from . import models
-        from .database import SessionLocal
-        
-        # Build business profile from webhook data
-        db = SessionLocal()
-        business = db.query(models.Business).filter(
-            models.Business.business_id == webhook_data.business_id
-        ).first()
-        
-        if business:
-            # Use existing business data
-            business_profile = BusinessProfile(
-                business_id=business.business_id,
-                name=business.name,
-                industry=business.industry,
-                region="Unknown",  # Not stored in current model
-                main_channels=[],
-                tone_of_voice=business.tone
-            )
-        elif webhook_data.business_name and webhook_data.industry:
-            # Create new business from webhook data
-            business_profile = BusinessProfile(
+        # Business record and strategy memory in one DB round trip, created if
+        # the webhook carries enough data; the plan reuses it
+        new_profile = None
+        if webhook_data.business_name and webhook_data.industry:
+            new_profile = BusinessProfile(
                 business_id=webhook_data.business_id,
                 name=webhook_data.business_name,
                 industry=webhook_data.industry,
@@ -154,16 +462,16 @@ async def webhook_kpis(webhook_data: WebhookKpiData):
                 main_channels=["Website"],
                 tone_of_voice="professional"
             )
-            ensure_business_exists(business_profile)
-        else:
-            db.close()
+        business = await asyncio.to_thread(load_business_context, webhook_data.business_id, new_profile)
+        
+        if business is None:
             return WebhookResponse(
                 success=False,
                 message="Business not found and insufficient data provided to create new business",
                 errors=["Provide business_name and industry for new businesses"]
             )
-        
-        db.close()
+        # Use existing business data, or the new business from webhook data
+        business_profile = new_profile if business.created else business.to_business_profile()
         
         # Build KPI snapshot
         kpis = KpiSnapshot(
@@ -190,16 +498,9 @@ async def webhook_kpis(webhook_data: WebhookKpiData):
         )
         
         # Generate plan
-        if USE_MULTI_AGENT and orchestrator:
-            plan = await orchestrator.execute_plan(request)
-            trace_id = str(uuid.uuid4())[:8]
-        else:
-            plan = build_growth_plan(
-                business=business_profile,
-                kpis=kpis,
-                goal=goal
-            )
-            trace_id = "webhook"
+        # Identical payloads resent by the source are served from the plan cache
+        plan = await _generate_plan(request, business)
+        trace_id = str(uuid.uuid4())[:8] if USE_MULTI_AGENT and orchestrator else "webhook"
         
         # Log plan
         log_plan(request, plan)
@@ -229,16 +530,8 @@ async def create_plan_with_email(
     """Create a growth plan and send via email."""
     
     # Use multi-agent if enabled
-    if USE_MULTI_AGENT and orchestrator:
-        plan = await orchestrator.execute_plan(request)
-        trace_id = str(uuid.uuid4())[:8]
-    else:
-        plan = build_growth_plan(
-            business=request.business_profile,
-            kpis=request.kpis,
-            goal=request.goal,
-        )
-        trace_id = "monolithic"
+    plan = await _generate_plan(request)
+    trace_id = str(uuid.uuid4())[:8] if USE_MULTI_AGENT and orchestrator else "monolithic"
     
     log_plan(request, plan)
     
@@ -266,6 +559,95 @@ def get_specific_agent_performance(agent_name: str, days: int = 7):
     from .monitoring.performance_tracker import PerformanceTracker
     return PerformanceTracker.get_agent_stats(agent_name, days)
 
+
+@app.get("/monitoring/agent-metrics/writer")
+def get_agent_metrics_writer_stats():
+    """Get buffer depth, sampled/dropped rows and flush latency for the agent metrics writer"""
+    return agent_metrics_writer.stats()
+
+@app.post("/catalog/reload")
+def reload_experiment_catalog():
+    """Reload the experiment catalog from disk without a restart"""
+    return reload_catalog(force=True).stats()
+
+
+@app.get("/monitoring/plan-cache")
+def get_plan_cache_stats():
+    """Get hit/miss/eviction counters for the plan cache"""
+    return plan_cache.stats()
+
+
+@app.get("/monitoring/llm-cache")
+def get_llm_cache_stats():
+    """Get hit rate and tokens saved by the LLM response cache"""
+    return llm_response_cache.stats()
+
+
+@app.get("/monitoring/llm-single-flight")
+def get_llm_single_flight_stats():
+    """Get how many LLM calls were coalesced onto an identical in-flight call"""
+    return llm_single_flight.stats()
+
+
+@app.get("/monitoring/llm-clients")
+def get_llm_client_stats():
+    """Get created/reused counts for pooled LLM provider clients"""
+    return llm_clients.stats()
+
+
+@app.post("/llm-models/reload")
+def reload_llm_models():
+    """Reload the LLM routing table from the llm_models table"""
+    return model_router.reload()
+
+
+@app.get("/monitoring/llm-models")
+def get_llm_model_stats():
+    """Get the routing table and per-model call counts, errors and latency"""
+    return model_router.stats()
+
+
+@app.get("/monitoring/llm-failover")
+def get_llm_failover_stats():
+    """Get circuit breaker states, p95 latencies and failover/hedge counts"""
+    return llm_failover.stats()
+
+
+@app.get("/monitoring/commentary-jobs")
+async def get_commentary_job_stats():
+    """Get submitted/pending/failed counts for deferred commentary jobs"""
+    return commentary_jobs.stats()
+
+
+@app.get("/monitoring/commentary-stream")
+def get_commentary_stream_stats():
+    """Get time-to-first-token percentiles and outcomes for streamed commentary"""
+    return commentary_stream_stats.stats()
+
+
+@app.get("/monitoring/llm-usage/models")
+def get_llm_usage_per_model(days: int = 7):
+    """Get LLM calls, tokens, latency and estimated cost per model"""
+    return get_llm_usage_by_model(days)
+
+
+@app.get("/monitoring/llm-usage/businesses")
+def get_llm_usage_per_business(days: int = 7, limit: int = Query(50, ge=1, le=1000)):
+    """Get LLM calls, tokens, latency and estimated cost per business, biggest spenders first"""
+    return get_llm_usage_by_business(days, limit)
+
+
+@app.get("/monitoring/llm-usage/writer")
+def get_llm_usage_writer_stats():
+    """Get buffer depth, dropped rows and flush latency for the LLM call metrics writer"""
+    return llm_metrics_writer.stats()
+
+
+@app.get("/monitoring/plan-log")
+def get_plan_log_stats():
+    """Get queue depth and flush latency for the buffered plan log writer"""
+    return plan_log_writer.stats()
+
 @app.get("/debug/api-key")
 def check_api_key():
     import os
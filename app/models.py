@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Text, DateTime, Date, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Numeric, Text, DateTime, Date, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -77,6 +77,28 @@ class AgentPerformance(Base):
     
     # Optional: link to business
     business_id = Column(String(50), ForeignKey("businesses.business_id"), nullable=True)
+    
+    # Time-window scans for /monitoring/agents, grouped by agent
+    __table_args__ = (
+        Index("ix_agent_performance_created_at_agent_name", "created_at", "agent_name"),
+    )
+
+class LLMCallMetric(Base):
+    """One LLM call (provider request or response-cache hit) for usage and cost accounting"""
+    __tablename__ = "llm_call_metrics"
+    
+    metric_id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+    operation = Column(String(50), nullable=False)  # strategy_commentary, call_llm, ...
+    provider = Column(String(50), nullable=False)
+    model_name = Column(String(100), nullable=False)
+    # No foreign key: plans can be generated for businesses that aren't registered
+    business_id = Column(String(50), nullable=True, index=True)
+    input_tokens = Column(Integer, default=0, nullable=False)  # billed tokens; 0 for cache hits
+    output_tokens = Column(Integer, default=0, nullable=False)
+    latency_ms = Column(Integer, nullable=False)
+    cache_hit = Column(Boolean, default=False, nullable=False)
+    status = Column(String(20), nullable=False)  # SUCCESS, ERROR, TIMEOUT
 
 # --- EXPERIMENT MODEL (EXISTING) ---
 class Experiment(Base):
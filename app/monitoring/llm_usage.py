@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import case, func
+
+from ..database import SessionLocal
+from .. import models
+from .metrics_buffer import BufferedMetricsWriter
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M (input, output) tokens, for the cost estimates.
+# Override or extend with LLM_PRICING_JSON='{"model-name": [input, output]}'
+_DEFAULT_PRICING = {
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gpt-4": (30.00, 60.00),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+def _load_pricing(raw: str) -> Dict[str, Tuple[float, float]]:
+    """Built-in prices updated from a JSON object of model -> [input, output]; bad input keeps the built-in table."""
+    try:
+        overrides = json.loads(raw)
+        if not isinstance(overrides, dict):
+            raise ValueError("expected a JSON object")
+        parsed = {}
+        for name, prices in overrides.items():
+            input_price, output_price = prices
+            parsed[name] = (float(input_price), float(output_price))
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Ignoring LLM_PRICING_JSON={raw!r} ({e}); using the built-in pricing")
+        return dict(_DEFAULT_PRICING)
+    return {**_DEFAULT_PRICING, **parsed}
+
+
+LLM_PRICING: Dict[str, Tuple[float, float]] = _load_pricing(os.getenv("LLM_PRICING_JSON", "{}"))
+
+# Business that LLM calls made in the current context are billed to
+_usage_business_id: ContextVar[Optional[str]] = ContextVar("llm_usage_business_id", default=None)
+
+
+@contextmanager
+def llm_usage_business(business_id: Optional[str]) -> Iterator[None]:
+    """
+    Attribute LLM calls made inside the block to ``business_id``.
+
+    Follows the async context (and asyncio.to_thread), like plan_deadline.
+    None keeps the enclosing attribution.
+    """
+    token = _usage_business_id.set(business_id or _usage_business_id.get())
+    try:
+        yield
+    finally:
+        _usage_business_id.reset(token)
+
+
+# Singleton instance
+llm_metrics_writer = BufferedMetricsWriter(models.LLMCallMetric, "llm-call-metrics")
+
+
+def record_llm_call(
+    operation: str,
+    provider: str,
+    model_name: str,
+    latency_ms: float,
+    input_tokens: int = 0,
+    output_tokens: int = 0,
+    cache_hit: bool = False,
+    status: str = "SUCCESS",
+    business_id: Optional[str] = None,
+) -> None:
+    """Buffer one per-call metrics record; never blocks or raises on the request path."""
+    # created_at is left to the column default (the database's now()), like agent metrics
+    llm_metrics_writer.submit({
+        "operation": operation,
+        "provider": provider.upper(),
+        "model_name": model_name,
+        "business_id": business_id or _usage_business_id.get(),
+        "input_tokens": int(input_tokens or 0),
+        "output_tokens": int(output_tokens or 0),
+        "latency_ms": int(latency_ms),
+        "cache_hit": cache_hit,
+        "status": status,
+    })
+
+
+def estimate_cost(model_name: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """Estimated USD cost, or None for a model without pricing."""
+    prices = LLM_PRICING.get(model_name)
+    if prices is None:
+        return None
+    return (input_tokens * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def _usage_rows(days: int, *group_columns):
+    """Per-group call counts, token sums and provider latency over the last ``days``."""
+    # Include records still waiting in the buffer
+    llm_metrics_writer.flush(timeout=2.0)
+    metric = models.LLMCallMetric
+    provider_call = metric.cache_hit.is_(False)
+    db = SessionLocal()
+    try:
+        return (
+            db.query(
+                *group_columns,
+                func.count(metric.metric_id),
+                func.sum(case((metric.cache_hit.is_(True), 1), else_=0)),
+                func.sum(case((metric.status != "SUCCESS", 1), else_=0)),
+                func.sum(metric.input_tokens),
+                func.sum(metric.output_tokens),
+                func.sum(case((provider_call, metric.latency_ms), else_=0)),
+                func.max(case((provider_call, metric.latency_ms), else_=None)),
+            )
+            .filter(metric.created_at >= datetime.now() - timedelta(days=days))
+            .group_by(*group_columns)
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def _summary(calls, cache_hits, errors, input_tokens, output_tokens, latency_total) -> dict:
+    provider_calls = calls - cache_hits
+    return {
+        "calls": calls,
+        "cache_hits": cache_hits,
+        "cache_hit_rate": round(cache_hits / calls, 4) if calls else 0.0,
+        "errors": errors,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "avg_latency_ms": int(latency_total / provider_calls) if provider_calls else 0,
+    }
+
+
+def get_llm_usage_by_model(days: int = 7) -> List[dict]:
+    """Calls, tokens, latency and estimated cost per model, most expensive first"""
+    metric = models.LLMCallMetric
+    usage = []
+    for provider, model_name, calls, hits, errors, tokens_in, tokens_out, latency, max_latency in _usage_rows(
+        days, metric.provider, metric.model_name
+    ):
+        cost = estimate_cost(model_name, tokens_in or 0, tokens_out or 0)
+        usage.append({
+            "provider": provider,
+            "model_name": model_name,
+            **_summary(calls, hits or 0, errors or 0, tokens_in or 0, tokens_out or 0, latency or 0),
+            "max_latency_ms": max_latency or 0,
+            "estimated_cost_usd": round(cost, 6) if cost is not None else None,
+            "period_days": days,
+        })
+    usage.sort(key=lambda row: (row["estimated_cost_usd"] or 0, row["calls"]), reverse=True)
+    return usage
+
+
+def get_llm_usage_by_business(days: int = 7, limit: int = 50) -> List[dict]:
+    """Calls, tokens, latency and estimated cost per business, biggest spenders first"""
+    metric = models.LLMCallMetric
+    totals: Dict[Optional[str], dict] = {}
+    for business_id, model_name, calls, hits, errors, tokens_in, tokens_out, latency, _ in _usage_rows(
+        days, metric.business_id, metric.model_name
+    ):
+        entry = totals.setdefault(business_id, {
+            "calls": 0, "cache_hits": 0, "errors": 0, "input_tokens": 0,
+            "output_tokens": 0, "latency_total": 0, "cost": 0.0, "models": [],
+        })
+        entry["calls"] += calls
+        entry["cache_hits"] += hits or 0
+        entry["errors"] += errors or 0
+        entry["input_tokens"] += tokens_in or 0
+        entry["output_tokens"] += tokens_out or 0
+        entry["latency_total"] += latency or 0
+        entry["cost"] += estimate_cost(model_name, tokens_in or 0, tokens_out or 0) or 0.0
+        entry["models"].append(model_name)
+
+    usage = [
+        {
+            "business_id": business_id,
+            **_summary(
+                entry["calls"], entry["cache_hits"], entry["errors"],
+                entry["input_tokens"], entry["output_tokens"], entry["latency_total"],
+            ),
+            "estimated_cost_usd": round(entry["cost"], 6),
+            "models": sorted(entry["models"]),
+            "period_days": days,
+        }
+        for business_id, entry in totals.items()
+    ]
+    usage.sort(key=lambda row: (row["estimated_cost_usd"], row["input_tokens"] + row["output_tokens"]), reverse=True)
+    return usage[:limit]
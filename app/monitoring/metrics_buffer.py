@@ -0,0 +1,206 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Rows per bulk insert, and the longest a buffered row waits for one
+METRICS_FLUSH_MAX_RECORDS = int(os.getenv("METRICS_FLUSH_MAX_RECORDS", "200"))
+METRICS_FLUSH_INTERVAL_MS = float(os.getenv("METRICS_FLUSH_INTERVAL_MS", "1000"))
+
+# Rows buffered before new ones are dropped (the database is slow or down)
+METRICS_BUFFER_MAX_PENDING = int(os.getenv("METRICS_BUFFER_MAX_PENDING", "10000"))
+
+# Past this fraction of max_pending, only 1 in METRICS_BUFFER_SAMPLE_EVERY
+# successful rows is kept (1 disables sampling)
+METRICS_BUFFER_SAMPLE_ABOVE = float(os.getenv("METRICS_BUFFER_SAMPLE_ABOVE", "0.5"))
+METRICS_BUFFER_SAMPLE_EVERY = int(os.getenv("METRICS_BUFFER_SAMPLE_EVERY", "10"))
+
+
+class BufferedMetricsWriter:
+    """
+    In-process buffer that bulk-inserts metric rows on a background thread.
+
+    submit() never blocks the caller: rows are queued and written with one
+    INSERT ... executemany and one commit per batch, every ``max_records``
+    rows or ``interval_ms`` after the first buffered row. Once the backlog
+    passes ``sample_above`` of ``max_pending``, only every ``sample_every``-th
+    row with status SUCCESS is kept (errors always are); when ``max_pending``
+    rows are already waiting, new rows are dropped. Both are counted.
+    The table must already exist (see scripts/create_metrics_indexes.py).
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        model,
+        name: str,
+        max_records: int = METRICS_FLUSH_MAX_RECORDS,
+        interval_ms: float = METRICS_FLUSH_INTERVAL_MS,
+        max_pending: int = METRICS_BUFFER_MAX_PENDING,
+        session_factory: Callable[[], Any] = SessionLocal,
+        sample_above: float = METRICS_BUFFER_SAMPLE_ABOVE,
+        sample_every: int = METRICS_BUFFER_SAMPLE_EVERY,
+    ):
+        self.model = model
+        self.name = name
+        self.max_records = max_records
+        self.interval_ms = interval_ms
+        self.session_factory = session_factory
+        # max_pending <= 0 means an unbounded queue, which is never sampled
+        self.sample_every = max(1, sample_every) if max_pending > 0 else 1
+        self.sample_depth = int(max_pending * sample_above)
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._state_lock = threading.Lock()
+        self._closed = False
+        self._sample_seen = 0
+        self._counters = {
+            "submitted": 0, "written": 0, "sampled_out": 0, "dropped": 0, "failed": 0, "batches": 0,
+        }
+        self._flush_ms_last = 0.0
+        self._flush_ms_max = 0.0
+
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """Buffer one row; returns False if it was sampled out or dropped."""
+        with self._state_lock:
+            self._counters["submitted"] += 1
+            closed = self._closed
+            if not closed and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            if (
+                not closed
+                and self.sample_every > 1
+                and row.get("status", "SUCCESS") == "SUCCESS"
+                and self._queue.qsize() >= self.sample_depth
+            ):
+                # The writer is falling behind: keep a sample of the routine rows
+                self._sample_seen += 1
+                if self._sample_seen % self.sample_every:
+                    self._counters["sampled_out"] += 1
+                    return False
+        if closed:
+            # Late rows at shutdown are written directly
+            self._write_batch([row])
+            return True
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            with self._state_lock:
+                self._counters["dropped"] += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every row submitted before this call has been written.
+
+        Returns False if that didn't happen within ``timeout``, including when
+        the buffer stays full for that long.
+        """
+        with self._state_lock:
+            if self._thread is None or self._closed:
+                return True
+            done = threading.Event()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        remaining = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+        return done.wait(remaining)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """
+        Write the remaining rows and stop the background thread.
+
+        Gives up after ``timeout``, including when the buffer stays full for
+        that long; rows still queued then are not written.
+        """
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning(
+                f"{self.name} writer still full after {timeout}s at shutdown; "
+                f"abandoning {self._queue.qsize()} queued row(s)"
+            )
+            return
+        thread.join(max(0.0, deadline - time.monotonic()) if deadline is not None else None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._state_lock:
+            counters = dict(self._counters)
+        batches = counters["batches"]
+        return {
+            **counters,
+            "queue_depth": self._queue.qsize(),
+            "avg_batch_size": round(counters["written"] / batches, 2) if batches else 0,
+            "last_flush_ms": round(self._flush_ms_last, 3),
+            "max_flush_ms": round(self._flush_ms_max, 3),
+        }
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        db = self.session_factory()
+        try:
+            db.bulk_insert_mappings(self.model, batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            with self._state_lock:
+                self._counters["failed"] += len(batch)
+            logger.error(f"Failed to write {len(batch)} {self.name} row(s): {e}")
+            return
+        finally:
+            db.close()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._state_lock:
+            self._counters["written"] += len(batch)
+            self._counters["batches"] += 1
+        self._flush_ms_last = elapsed_ms
+        self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # flush interval elapsed
+
+            if isinstance(item, dict):
+                if not batch:
+                    deadline = time.monotonic() + self.interval_ms / 1000.0
+                batch.append(item)
+                if len(batch) < self.max_records:
+                    continue
+
+            if batch:
+                self._write_batch(batch)
+                batch = []
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is self._STOP:
+                return
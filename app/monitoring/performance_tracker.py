@@ -1,11 +1,15 @@
+import asyncio
 import time
 from typing import Optional
 from contextlib import contextmanager
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import and_, case, func
 from ..database import SessionLocal
 from .. import models
+from .metrics_buffer import BufferedMetricsWriter
+
+# Latency percentiles reported for each agent
+LATENCY_PERCENTILES = (50, 95, 99)
 
 
 class PerformanceTracker:
@@ -32,6 +36,11 @@ class PerformanceTracker:
         
         try:
             yield
+        except asyncio.CancelledError:
+            # A stage timeout (wait_for) or a caller that went away
+            status = "CANCELLED"
+            error_msg = "Cancelled before completion"
+            raise
         except Exception as e:
             status = "ERROR"
             error_msg = str(e)
@@ -61,29 +70,92 @@ class PerformanceTracker:
         error_message: Optional[str],
         business_id: Optional[str]
     ):
-        """Save performance metric to database"""
+        """Buffer a performance metric; it is bulk-inserted in the background"""
+        # created_at is left to the column default (the database's now()), as before
+        agent_metrics_writer.submit({
+            "trace_id": trace_id,
+            "agent_name": agent_name,
+            "execution_time_ms": execution_time_ms,
+            "status": status,
+            "error_message": error_message,
+            "business_id": business_id,
+        })
+        
+        # Log in test mode
+        print(f"📊 {agent_name}: {execution_time_ms}ms ({status})")
+    
+    @staticmethod
+    def _aggregate_stats(days: int, agent_name: Optional[str] = None, per_agent: bool = True) -> list:
+        """
+        Execution counts, successes, avg/min/max and latency percentiles in one query.
+        
+        Window functions rank each row by execution time within its agent (or
+        across all agents), so only one row per group leaves the database.
+        Percentiles use the nearest-rank method.
+        """
+        # Include metrics still waiting in the buffer
+        agent_metrics_writer.flush(timeout=2.0)
+        metric = models.AgentPerformance
+        partition = metric.agent_name if per_agent else None
         db = SessionLocal()
         try:
-            metric = models.AgentPerformance(
-                trace_id=trace_id,
-                agent_name=agent_name,
-                execution_time_ms=execution_time_ms,
-                status=status,
-                error_message=error_message,
-                business_id=business_id
-            )
-            db.add(metric)
-            db.commit()
-            
-            # Log in test mode
-            print(f"📊 {agent_name}: {execution_time_ms}ms ({status})")
+            query = db.query(
+                metric.agent_name,
+                metric.execution_time_ms,
+                metric.status,
+                func.row_number().over(partition_by=partition, order_by=metric.execution_time_ms).label("rank"),
+                func.count().over(partition_by=partition).label("n"),
+            ).filter(metric.created_at >= datetime.now() - timedelta(days=days))
+            if agent_name:
+                query = query.filter(metric.agent_name == agent_name)
+            ranked = query.subquery()
+            
+            def percentile(p: int):
+                # Smallest rank r with r / n >= p / 100
+                at_rank = and_(ranked.c.rank * 100 >= p * ranked.c.n, (ranked.c.rank - 1) * 100 < p * ranked.c.n)
+                return func.max(case((at_rank, ranked.c.execution_time_ms), else_=None))
+            
+            columns = [
+                func.count(),
+                func.sum(case((ranked.c.status == "SUCCESS", 1), else_=0)),
+                func.avg(ranked.c.execution_time_ms),
+                func.min(ranked.c.execution_time_ms),
+                func.max(ranked.c.execution_time_ms),
+                *(percentile(p) for p in LATENCY_PERCENTILES),
+            ]
+            if per_agent:
+                return db.query(ranked.c.agent_name, *columns).group_by(ranked.c.agent_name).all()
+            return [(agent_name or "all", *db.query(*columns).one())]
             
-        except Exception as e:
-            db.rollback()
-            raise e
         finally:
             db.close()
     
+    @staticmethod
+    def _stats_from_row(row, days: int) -> dict:
+        agent_name, total, successes, avg_ms, min_ms, max_ms, *percentiles = row
+        if not total:
+            return {
+                "agent_name": agent_name,
+                "total_executions": 0,
+                "success_rate": 0.0,
+                "avg_execution_time_ms": 0,
+                "min_execution_time_ms": 0,
+                "max_execution_time_ms": 0,
+                **{f"p{p}_execution_time_ms": 0 for p in LATENCY_PERCENTILES},
+                "period_days": days
+            }
+        
+        return {
+            "agent_name": agent_name,
+            "total_executions": total,
+            "success_rate": round((successes / total) * 100, 2),
+            "avg_execution_time_ms": int(avg_ms),
+            "min_execution_time_ms": min_ms,
+            "max_execution_time_ms": max_ms,
+            **{f"p{p}_execution_time_ms": value for p, value in zip(LATENCY_PERCENTILES, percentiles)},
+            "period_days": days
+        }
+    
     @staticmethod
     def get_agent_stats(agent_name: Optional[str] = None, days: int = 7) -> dict:
         """
@@ -94,73 +166,25 @@ class PerformanceTracker:
             days: Number of days to look back
             
         Returns:
-            Dictionary with performance stats
+            Dictionary with performance stats, including p50/p95/p99 latency
         """
-        db = SessionLocal()
-        try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            query = db.query(models.AgentPerformance).filter(
-                models.AgentPerformance.created_at >= cutoff_date
-            )
-            
-            if agent_name:
-                query = query.filter(models.AgentPerformance.agent_name == agent_name)
-            
-            metrics = query.all()
-            
-            if not metrics:
-                return {
-                    "agent_name": agent_name or "all",
-                    "total_executions": 0,
-                    "success_rate": 0.0,
-                    "avg_execution_time_ms": 0,
-                    "min_execution_time_ms": 0,
-                    "max_execution_time_ms": 0
-                }
-            
-            total = len(metrics)
-            successes = sum(1 for m in metrics if m.status == "SUCCESS")
-            execution_times = [m.execution_time_ms for m in metrics]
-            
-            return {
-                "agent_name": agent_name or "all",
-                "total_executions": total,
-                "success_rate": round((successes / total) * 100, 2),
-                "avg_execution_time_ms": int(sum(execution_times) / len(execution_times)),
-                "min_execution_time_ms": min(execution_times),
-                "max_execution_time_ms": max(execution_times),
-                "period_days": days
-            }
-            
-        finally:
-            db.close()
+        row = PerformanceTracker._aggregate_stats(days, agent_name, per_agent=False)[0]
+        return PerformanceTracker._stats_from_row(row, days)
     
     @staticmethod
     def get_all_agents_summary(days: int = 7) -> list:
-        """Get performance summary for all agents"""
-        db = SessionLocal()
-        try:
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            # Get distinct agent names
-            agent_names = db.query(models.AgentPerformance.agent_name).filter(
-                models.AgentPerformance.created_at >= cutoff_date
-            ).distinct().all()
-            
-            summaries = []
-            for (agent_name,) in agent_names:
-                stats = PerformanceTracker.get_agent_stats(agent_name, days)
-                summaries.append(stats)
-            
-            # Sort by total executions (most active first)
-            summaries.sort(key=lambda x: x['total_executions'], reverse=True)
-            
-            return summaries
-            
-        finally:
-            db.close()
+        """Get performance summary for all agents (one GROUP BY query)"""
+        summaries = [
+            PerformanceTracker._stats_from_row(row, days)
+            for row in PerformanceTracker._aggregate_stats(days)
+        ]
+        
+        # Sort by total executions (most active first)
+        summaries.sort(key=lambda x: x['total_executions'], reverse=True)
+        
+        return summaries
 
 
-# Singleton instance
+# Singleton instances
+agent_metrics_writer = BufferedMetricsWriter(models.AgentPerformance, "agent-metrics")
 performance_tracker = PerformanceTracker()
\ No newline at end of file
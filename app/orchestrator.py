@@ -1,5 +1,8 @@
+import json
+import logging
+import os
 import uuid
-from typing import Optional
+from typing import Any, Dict, Optional
 from .agents.base import AgentContext
 from .agents.intake import IntakeAgent
 from .agents.analyst import AnalystAgent
@@ -8,6 +11,45 @@ from .agents.scoring import ScoringAgent
 from .agents.copywriter import CopywriterAgent
 from .agents.judge import JudgeAgent
 from .schemas import PlanRequest, GrowthPlan
+from .db_utils import BusinessContext
+from .stage_graph import Stage, StageGraph
+from .logic import generate_copy, propose_experiments
+from .llm_strategy import fallback_commentary
+from .llm_router import plan_deadline
+from .monitoring.llm_usage import llm_usage_business
+
+logger = logging.getLogger(__name__)
+
+# Whole multi-agent run; stages still running at the deadline use their fallback
+ORCHESTRATOR_DEADLINE_SECONDS = float(os.getenv("ORCHESTRATOR_DEADLINE_SECONDS", "40"))
+
+# Per-stage timeouts in seconds; override with ORCHESTRATOR_STAGE_TIMEOUTS='{"commentary": 20}'
+_DEFAULT_STAGE_TIMEOUTS = {
+    "intake": 2,
+    "memory": 3,
+    "analyst": 2,
+    "strategy": 5,
+    "scoring": 2,
+    "winner": 2,
+    "copy": 5,
+    "commentary": 30,
+}
+
+
+def _load_stage_timeouts(raw: str) -> Dict[str, Optional[float]]:
+    """Defaults updated from a JSON object of stage -> seconds (null: no timeout); bad input keeps the defaults."""
+    try:
+        overrides = json.loads(raw)
+        if not isinstance(overrides, dict):
+            raise ValueError("expected a JSON object")
+        overrides = {stage: None if seconds is None else float(seconds) for stage, seconds in overrides.items()}
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Ignoring ORCHESTRATOR_STAGE_TIMEOUTS={raw!r} ({e}); using the default stage timeouts")
+        return dict(_DEFAULT_STAGE_TIMEOUTS)
+    return {**_DEFAULT_STAGE_TIMEOUTS, **overrides}
+
+
+ORCHESTRATOR_STAGE_TIMEOUTS = _load_stage_timeouts(os.getenv("ORCHESTRATOR_STAGE_TIMEOUTS", "{}"))
 
 
 class GrowthCoPilotOrchestrator:
@@ -22,56 +64,145 @@ class GrowthCoPilotOrchestrator:
         self.copywriter = CopywriterAgent()
         self.judge = JudgeAgent()
         
-    async def execute_plan(self, request: PlanRequest) -> GrowthPlan:
-        """Execute complete multi-agent workflow"""
+        # Stage graph: each stage starts once the stages it names are done, so
+        # the memory lookup overlaps the Analyst and the copy overlaps the commentary.
+        # Stages with a fallback degrade instead of failing the plan.
+        timeouts = ORCHESTRATOR_STAGE_TIMEOUTS
+        self.graph = StageGraph(
+            [
+                Stage("intake", self._intake, ("request",), timeouts.get("intake"),
+                      fallback=lambda inputs, context: inputs['request']),
+                Stage("memory", self._memory, ("request",), timeouts.get("memory"),
+                      fallback=lambda inputs, context: None),
+                Stage("analyst", self._analyst, ("intake",), timeouts.get("analyst")),
+                Stage("strategy", self._strategy, ("intake", "analyst", "memory"), timeouts.get("strategy"),
+                      fallback=self._unfiltered_experiments),
+                Stage("scoring", self._scoring, ("strategy",), timeouts.get("scoring")),
+                Stage("winner", self._winner, ("scoring",), timeouts.get("winner")),
+                Stage("copy", self._copy, ("intake", "winner"), timeouts.get("copy"),
+                      fallback=lambda inputs, context: generate_copy(
+                          inputs['intake'].business_profile, inputs['intake'].goal, inputs['winner'])),
+                Stage("commentary", self._commentary, ("intake", "analyst", "scoring", "winner"),
+                      timeouts.get("commentary"),
+                      fallback=lambda inputs, context: fallback_commentary(self._assemble(inputs))),
+            ],
+            inputs=("request",),
+        )
+        
+    async def execute_plan(
+        self,
+        request: PlanRequest,
+        include_commentary: bool = True,
+        business_context: Optional[BusinessContext] = None,
+        context: Optional[AgentContext] = None,
+    ) -> GrowthPlan:
+        """
+        Execute complete multi-agent workflow
+        
+        With include_commentary=False the Judge's commentary stage is skipped
+        (see generate_commentary for filling it in later, with the same
+        context). A business_context the caller already loaded replaces the
+        memory stage's DB lookup.
+        """
         
         # Create trace context
-        trace_id = str(uuid.uuid4())[:8]
-        context = AgentContext(trace_id)
+        if context is None:
+            trace_id = str(uuid.uuid4())[:8]
+            context = AgentContext(trace_id)
+        context.business_context = business_context
+        
+        # Every LLM call made for this plan shares one deadline and is billed to the business
+        with plan_deadline(), llm_usage_business(request.business_profile.business_id):
+            return await self._run_stages(request, context, include_commentary)
+    
+    async def generate_commentary(self, plan: GrowthPlan, context: Optional[AgentContext] = None) -> str:
+        """
+        Run only the Judge's commentary stage for an already assembled plan
         
+        Pass the context the plan was executed with so the commentary keeps the
+        Intake and Analyst annotations (data warnings, revenue opportunity).
+        """
+        if context is None:
+            context = AgentContext(str(uuid.uuid4())[:8], plan.business_profile.business_id)
+        with plan_deadline(), llm_usage_business(plan.business_profile.business_id):
+            return await self.judge.generate_commentary(plan, context)
+    
+    async def _run_stages(self, request: PlanRequest, context: AgentContext, include_commentary: bool) -> GrowthPlan:
+        """Run the stage graph for one plan and assemble the result"""
         try:
-            # Stage 1: Intake - Validate request
-            validated_request = await self.intake.process_with_tracking(request, context)
-            
-            # Stage 2: Analyst - Diagnose funnel
-            insight = await self.analyst.process_with_tracking(validated_request.kpis, context)
-            
-            # Stage 3: Strategist - Propose experiments
-            experiments = await self.strategist.process_with_tracking({
-                'business': validated_request.business_profile,
-                'goal': validated_request.goal,
-                'insight': insight
-            }, context)
-            
-            # Stage 4: Scorer - Apply ICE framework
-            scored = await self.scorer.process_with_tracking(experiments, context)
-            
-            # Stage 5: Judge - Select winner
-            winner = await self.judge.select_winner(scored, context)
-            
-            # Stage 6: Copywriter - Generate copy
-            copy = await self.copywriter.process_with_tracking({
-                'experiment': winner,
-                'business': validated_request.business_profile,
-                'goal': validated_request.goal
-            }, context)
-            
-            # Assemble plan
-            plan = GrowthPlan(
-                business_profile=validated_request.business_profile,
-                kpis=validated_request.kpis,
-                goal=validated_request.goal,
-                funnel_insight=insight,
-                experiments=scored,
-                chosen_experiment=winner,
-                copy_suggestion=copy,
+            results = await self.graph.run(
+                context,
+                inputs={'request': request},
+                skip=() if include_commentary else ("commentary",),
+                deadline=ORCHESTRATOR_DEADLINE_SECONDS,
             )
             
-            # Stage 7: Judge - Generate strategy commentary
-            plan.llm_strategy_commentary = await self.judge.generate_commentary(plan, context)
-            
+            plan = self._assemble(results)
+            plan.copy_suggestion = results['copy']
+            plan.llm_strategy_commentary = results.get('commentary')
+            plan.degraded_stages = context.metadata.get('degraded_stages')
             return plan
             
         except Exception as e:
             context.log_step("Orchestrator", "ERROR", str(e))
             raise
+    
+    @staticmethod
+    def _assemble(results: Dict[str, Any]) -> GrowthPlan:
+        validated_request = results['intake']
+        return GrowthPlan(
+            business_profile=validated_request.business_profile,
+            kpis=validated_request.kpis,
+            goal=validated_request.goal,
+            funnel_insight=results['analyst'],
+            experiments=results['scoring'],
+            chosen_experiment=results['winner'],
+        )
+    
+    # --- Stages ---
+    
+    async def _intake(self, inputs: Dict[str, Any], context: AgentContext):
+        # Validate request
+        return await self.intake.process_with_tracking(inputs['request'], context)
+    
+    async def _memory(self, inputs: Dict[str, Any], context: AgentContext):
+        # Business record and strategy memory; Intake leaves the profile unchanged
+        return await self.strategist.prefetch_memory(inputs['request'].business_profile, context)
+    
+    async def _analyst(self, inputs: Dict[str, Any], context: AgentContext):
+        # Diagnose funnel
+        return await self.analyst.process_with_tracking(inputs['intake'].kpis, context)
+    
+    async def _strategy(self, inputs: Dict[str, Any], context: AgentContext):
+        # Propose experiments
+        return await self.strategist.process_with_tracking({
+            'business': inputs['intake'].business_profile,
+            'goal': inputs['intake'].goal,
+            'insight': inputs['analyst'],
+            'memory': inputs['memory'],
+        }, context)
+    
+    @staticmethod
+    def _unfiltered_experiments(inputs: Dict[str, Any], context: AgentContext):
+        # Fallback: experiments without the strategy-memory filter
+        return propose_experiments(inputs['intake'].business_profile, inputs['intake'].goal, inputs['analyst'])
+    
+    async def _scoring(self, inputs: Dict[str, Any], context: AgentContext):
+        # Apply ICE framework
+        return await self.scorer.process_with_tracking(inputs['strategy'], context)
+    
+    async def _winner(self, inputs: Dict[str, Any], context: AgentContext):
+        # Judge selects the winner
+        return await self.judge.select_winner(inputs['scoring'], context)
+    
+    async def _copy(self, inputs: Dict[str, Any], context: AgentContext):
+        # Generate copy for the winner
+        return await self.copywriter.process_with_tracking({
+            'experiment': inputs['winner'],
+            'business': inputs['intake'].business_profile,
+            'goal': inputs['intake'].goal
+        }, context)
+    
+    async def _commentary(self, inputs: Dict[str, Any], context: AgentContext):
+        # Judge's strategy commentary doesn't use the copy, so it runs alongside the Copywriter
+        return await self.judge.generate_commentary(self._assemble(inputs), context)
@@ -1,4 +1,3 @@
-import pandas as pd
 from typing import Dict, Any
 from fastapi import UploadFile, HTTPException
 from .schemas import BusinessProfile, KpiSnapshot, GrowthGoal, PlanRequest
@@ -12,6 +11,9 @@ def parse_csv_to_plan_request(file: UploadFile) -> PlanRequest:
     - Either a simple key-value format
     - Or a time-series with the latest row being used
     """
+    # pandas is only needed for CSV uploads; keep it out of app startup
+    import pandas as pd
+    
     try:
         # Read CSV
         df = pd.read_csv(file.file)
@@ -71,6 +73,7 @@ def parse_csv_to_plan_request(file: UploadFile) -> PlanRequest:
 
 def _parse_list_field(value: Any) -> list:
     """Parse comma-separated string into list"""
+    import pandas as pd
     if pd.isna(value):
         return []
     if isinstance(value, str):
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .schemas import GrowthPlan, PlanRequest
+from .storage import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1024"))
+PLAN_CACHE_TTL_SECONDS = float(os.getenv("PLAN_CACHE_TTL_SECONDS", "3600"))
+
+# Optional disk tier shared by all workers using the same directory (off when unset)
+PLAN_CACHE_DIR = os.getenv("PLAN_CACHE_DIR") or None
+
+# Invalidation markers when there is no disk tier, so that every worker on the
+# host still drops a business's plans when one of them invalidates it
+PLAN_CACHE_MARKER_DIR = os.getenv("PLAN_CACHE_MARKER_DIR") or str(DATA_DIR / "plan_cache_invalidations")
+
+
+def plan_request_key(request: PlanRequest, namespace: str = "") -> str:
+    """
+    Canonical hash of a plan request.
+
+    Field order, whitespace and int/float spelling of the payload don't change
+    the key; ``namespace`` separates plans built by different pipelines.
+    """
+    canonical = json.dumps(
+        request.model_dump(mode="json"),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(f"{namespace}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def _business_dir_name(business_id: str) -> str:
+    return hashlib.sha1(business_id.encode("utf-8")).hexdigest()[:16]
+
+
+class PlanCache:
+    """
+    LRU + TTL cache of generated growth plans, keyed by ``plan_request_key``.
+
+    The in-memory tier is per process; the optional disk tier stores one JSON
+    file per plan under ``<cache_dir>/<business>/`` so workers and restarts
+    share hits. Invalidating a business drops both tiers and touches a marker
+    file, which makes other workers discard their older in-memory entries.
+    Markers live in ``marker_dir`` (default: the disk tier, or
+    PLAN_CACHE_MARKER_DIR without one), so this works in memory-only mode too.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = PLAN_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = PLAN_CACHE_TTL_SECONDS,
+        cache_dir: Optional[str] = PLAN_CACHE_DIR,
+        enabled: bool = PLAN_CACHE_ENABLED,
+        marker_dir: Optional[str] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.marker_dir = Path(marker_dir or cache_dir or PLAN_CACHE_MARKER_DIR)
+        self.enabled = enabled and max_entries > 0
+        # key -> (created_at, business_id, plan payload)
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    # --- Disk tier helpers ---
+
+    def _entry_path(self, business_id: str, key: str) -> Path:
+        return self.cache_dir / _business_dir_name(business_id) / f"{key}.json"
+
+    def _marker_path(self, business_id: str) -> Path:
+        return self.marker_dir / f"{_business_dir_name(business_id)}.invalidated"
+
+    def _invalidated_at(self, business_id: str) -> float:
+        try:
+            return self._marker_path(business_id).stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def _is_fresh(self, created_at: float, business_id: str, now: float) -> bool:
+        return now - created_at < self.ttl_seconds and created_at > self._invalidated_at(business_id)
+
+    def _read_disk(self, business_id: str, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        path = self._entry_path(business_id, key)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        created_at = record.get("created_at", 0.0)
+        if not self._is_fresh(created_at, business_id, now):
+            path.unlink(missing_ok=True)
+            return None
+        return created_at, record["plan"]
+
+    def _write_disk(self, business_id: str, key: str, created_at: float, payload: Dict[str, Any]) -> None:
+        path = self._entry_path(business_id, key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump({"created_at": created_at, "business_id": business_id, "plan": payload}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write plan cache entry {path}: {e}")
+            tmp.unlink(missing_ok=True)
+
+    # --- Public API ---
+
+    def get(self, request: PlanRequest, namespace: str = "") -> Optional[GrowthPlan]:
+        """Return a fresh copy of the cached plan for this request, or None."""
+        if not self.enabled:
+            return None
+        key = plan_request_key(request, namespace)
+        business_id = request.business_profile.business_id
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, _, payload = entry
+                if self._is_fresh(created_at, business_id, now):
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return GrowthPlan.model_validate(payload)
+                del self._entries[key]
+                self._counters["expirations"] += 1
+
+        if self.cache_dir is not None:
+            found = self._read_disk(business_id, key, now)
+            if found is not None:
+                created_at, payload = found
+                with self._lock:
+                    self._counters["hits"] += 1
+                    self._counters["disk_hits"] += 1
+                    self._put_locked(key, (created_at, business_id, payload))
+                return GrowthPlan.model_validate(payload)
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def put(
+        self,
+        request: PlanRequest,
+        plan: GrowthPlan,
+        namespace: str = "",
+        started_at: Optional[float] = None,
+    ) -> None:
+        """
+        Cache a generated plan for this request (degraded plans are not cached).
+        
+        ``started_at`` is the time.time() at which generation started; the entry
+        is dated from then, so a plan built from business state that was
+        invalidated while it was generating is not stored.
+        """
+        if not self.enabled or plan.degraded_stages:
+            return
+        key = plan_request_key(request, namespace)
+        business_id = request.business_profile.business_id
+        created_at = time.time() if started_at is None else started_at
+        if not self._is_fresh(created_at, business_id, time.time()):
+            return
+        payload = plan.model_dump(mode="json")
+
+        with self._lock:
+            self._put_locked(key, (created_at, business_id, payload))
+        if self.cache_dir is not None:
+            self._write_disk(business_id, key, created_at, payload)
+
+    def _put_locked(self, key: str, entry: Tuple[float, str, Dict[str, Any]]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def invalidate_business(self, business_id: str) -> int:
+        """Drop every cached plan for a business (e.g. after its strategy memory changed)."""
+        with self._lock:
+            stale = [key for key, (_, bid, _) in self._entries.items() if bid == business_id]
+            for key in stale:
+                del self._entries[key]
+            self._counters["invalidations"] += len(stale)
+
+        try:
+            self.marker_dir.mkdir(parents=True, exist_ok=True)
+            marker = self._marker_path(business_id)
+            marker.touch()
+            # Same clock as the entries' created_at (the filesystem's mtime can lag time.time())
+            now = time.time()
+            os.utime(marker, (now, now))
+        except OSError as e:
+            logger.warning(f"Could not mark plan cache invalidation for {business_id}; other workers keep their copies: {e}")
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir / _business_dir_name(business_id), ignore_errors=True)
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": str(self.cache_dir) if self.cache_dir else None,
+            **counters,
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Singleton instance
+plan_cache = PlanCache()
@@ -96,6 +96,11 @@ class GrowthPlan(BaseModel):
     chosen_experiment: ScoredExperiment
     copy_suggestion: Optional[str] = None
     llm_strategy_commentary: Optional[str] = None
+    # Set when commentary is generated in the background (defer_commentary=true)
+    commentary_id: Optional[str] = None
+    commentary_status: Optional[str] = None  # pending, ready, failed
+    # Multi-agent stages that timed out or failed and used their fallback: stage -> reason
+    degraded_stages: Optional[Dict[str, str]] = None
     
     # CORRECT: Use model_config dictionary
     model_config = COMMON_MODEL_CONFIG
@@ -153,4 +158,42 @@ class WebhookResponse(BaseModel):
     trace_id: Optional[str] = None
     errors: Optional[List[str]] = None
     
-    model_config = COMMON_MODEL_CONFIG
\ No newline at end of file
+    model_config = COMMON_MODEL_CONFIG
+
+
+# --- Batch Schemas ---
+
+class BatchPlanRequest(BaseModel):
+    """Request body for the /plans/batch endpoint."""
+    requests: List[PlanRequest] = Field(..., min_length=1)
+
+
+class BatchPlanItemResult(BaseModel):
+    """Outcome for one request in a batch, in request order."""
+    index: int
+    business_id: str
+    success: bool
+    plan: Optional[GrowthPlan] = None
+    error: Optional[str] = None
+
+
+class BatchPlanResponse(BaseModel):
+    """Response from the /plans/batch endpoint"""
+    trace_id: str
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchPlanItemResult]
+
+
+# --- Deferred Commentary Schemas ---
+
+class CommentaryStatusResponse(BaseModel):
+    """State of a deferred LLM commentary job"""
+    commentary_id: str
+    business_id: str
+    status: str  # pending, ready, failed
+    commentary: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float
+    completed_at: Optional[float] = None
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _SyncCall:
+    """An in-flight blocking call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent identical calls (keyed by e.g. a prompt hash).
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for it and share its result or exception. Nothing is cached
+    once the call finishes - that is the response cache's job.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> [shared task, number of waiters]
+        self._tasks: Dict[str, List[Any]] = {}
+        self._sync_calls: Dict[str, _SyncCall] = {}
+        self._counters = {"executed": 0, "coalesced": 0}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Await ``factory()`` once per key across concurrent callers.
+
+        The shared call runs as its own task: a cancelled waiter leaves it
+        running for the others, and it is only cancelled once every waiter
+        has gone away.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flight = self._tasks.get(key)
+            if flight is not None and flight[0].get_loop() is loop and not flight[0].done():
+                flight[1] += 1
+                self._counters["coalesced"] += 1
+            else:
+                flight = [loop.create_task(factory()), 1]
+                self._tasks[key] = flight
+                self._counters["executed"] += 1
+                flight[0].add_done_callback(lambda t, key=key: self._forget_task(key, t))
+        task = flight[0]
+
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            with self._lock:
+                flight[1] -= 1
+                abandoned = flight[1] == 0
+            if abandoned:
+                task.cancel()
+            raise
+
+    def _forget_task(self, key: str, task: "asyncio.Task[Any]") -> None:
+        with self._lock:
+            flight = self._tasks.get(key)
+            if flight is not None and flight[0] is task:
+                del self._tasks[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def do_sync(self, key: str, fn: Callable[[], T]) -> T:
+        """Blocking counterpart of ``do`` for calls made from worker threads."""
+        with self._lock:
+            call = self._sync_calls.get(key)
+            leader = call is None
+            if leader:
+                call = _SyncCall()
+                self._sync_calls[key] = call
+                self._counters["executed"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._sync_calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": len(self._tasks) + len(self._sync_calls),
+            }
+
+
+# Singleton shared by all LLM call sites
+llm_single_flight = SingleFlight()
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .agents.base import AgentContext
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One step of a plan pipeline.
+
+    ``run(inputs, context)`` receives the results of ``depends_on`` (stage
+    names or initial inputs) keyed by name and returns this stage's result.
+    If it fails or takes longer than ``timeout`` seconds and the stage has a
+    ``fallback(inputs, context)``, the fallback's result is used instead and
+    the stage is recorded as degraded.
+    """
+    name: str
+    run: Callable[[Dict[str, Any], AgentContext], Awaitable[Any]]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    fallback: Optional[Callable[[Dict[str, Any], AgentContext], Any]] = None
+
+
+class StageGraph:
+    """
+    Runs stages as soon as their dependencies are done, independent ones concurrently.
+
+    Stages run as tasks on the caller's event loop, so they share the
+    AgentContext without locking (and inherit context variables such as
+    the plan deadline); blocking work inside a stage belongs in
+    asyncio.to_thread and shouldn't touch the context. A failed or timed-out
+    stage with a fallback degrades (``context.metadata["degraded_stages"]``
+    maps it to the reason); without one the other stages are cancelled and
+    the error is raised. Each run also records per-stage timings and the
+    critical path in ``context.metadata``.
+    """
+
+    def __init__(self, stages: Iterable[Stage], inputs: Iterable[str] = ()):
+        self.stages: Dict[str, Stage] = {}
+        self.inputs = frozenset(inputs)
+        for stage in stages:
+            if stage.name in self.stages or stage.name in self.inputs:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in self.stages.values():
+            unknown = [dep for dep in stage.depends_on if dep not in self.stages and dep not in self.inputs]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage(s): {', '.join(unknown)}")
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str, path: Tuple[str, ...]) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Stage graph has a cycle: {' -> '.join(path + (name,))}")
+            state[name] = "visiting"
+            for dep in self.stages[name].depends_on:
+                if dep in self.stages:
+                    visit(dep, path + (name,))
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, ())
+        return order
+
+    def _selected(self, skip: Iterable[str]) -> List[str]:
+        """Stages to run: everything except ``skip`` and the stages that depend on them."""
+        skipped: Set[str] = set(skip)
+        selected = []
+        for name in self.order:
+            if name in skipped or any(dep in skipped for dep in self.stages[name].depends_on):
+                skipped.add(name)
+            else:
+                selected.append(name)
+        return selected
+
+    async def run(
+        self,
+        context: AgentContext,
+        inputs: Optional[Dict[str, Any]] = None,
+        skip: Iterable[str] = (),
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the graph; returns the initial inputs plus every stage's result.
+
+        ``deadline`` (seconds) bounds the whole run: each stage's timeout is
+        capped by the time left, so late stages fall back instead of waiting.
+        """
+        results: Dict[str, Any] = dict(inputs or {})
+        missing = self.inputs - results.keys()
+        if missing:
+            raise ValueError(f"Missing stage graph input(s): {', '.join(sorted(missing))}")
+
+        pending = self._selected(skip)
+        running: Dict["asyncio.Task[Any]", str] = {}
+        timings: Dict[str, Tuple[float, float]] = {}
+        started = time.perf_counter()
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
+
+        def launch_ready() -> None:
+            for name in list(pending):
+                stage = self.stages[name]
+                if all(dep in results for dep in stage.depends_on):
+                    pending.remove(name)
+                    stage_inputs = {dep: results[dep] for dep in stage.depends_on}
+                    task = asyncio.ensure_future(self._run_stage(stage, stage_inputs, context, deadline_at))
+                    running[task] = name
+                    timings[name] = (time.perf_counter() - started, 0.0)
+
+        try:
+            launch_ready()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                errors = []
+                for task in done:
+                    name = running.pop(task)
+                    timings[name] = (timings[name][0], time.perf_counter() - started)
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                    else:
+                        results[name] = task.result()
+                if errors:
+                    raise errors[0]
+                launch_ready()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        self._record_trace(context, timings, time.perf_counter() - started)
+        return results
+
+    async def _run_stage(
+        self,
+        stage: Stage,
+        inputs: Dict[str, Any],
+        context: AgentContext,
+        deadline_at: Optional[float],
+    ) -> Any:
+        remaining = deadline_at - time.monotonic() if deadline_at is not None else None
+        budgets = [b for b in (stage.timeout, remaining) if b is not None]
+        timeout = max(min(budgets), 0.0) if budgets else None
+        try:
+            return await asyncio.wait_for(stage.run(inputs, context), timeout)
+        except asyncio.TimeoutError:
+            if stage.fallback is None:
+                raise TimeoutError(f"Stage {stage.name} timed out after {timeout:.1f}s")
+            reason = f"timed out after {timeout:.1f}s"
+        except Exception as e:
+            if stage.fallback is None:
+                raise
+            reason = f"{type(e).__name__}: {e}"
+
+        context.metadata.setdefault("degraded_stages", {})[stage.name] = reason
+        context.log_step("Orchestrator", "Stage degraded", f"{stage.name}: {reason}")
+        logger.warning(f"[{context.trace_id}] Stage {stage.name} degraded ({reason}); using its fallback")
+        return stage.fallback(inputs, context)
+
+    def critical_path(self, timings: Dict[str, Tuple[float, float]]) -> List[str]:
+        """Chain of stages that determined the total latency, first to last."""
+        if not timings:
+            return []
+        path = [max(timings, key=lambda name: timings[name][1])]
+        while True:
+            deps = [dep for dep in self.stages[path[-1]].depends_on if dep in timings]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda name: timings[name][1]))
+        return path[::-1]
+
+    def _record_trace(self, context: AgentContext, timings: Dict[str, Tuple[float, float]], total: float) -> None:
+        path = self.critical_path(timings)
+        context.metadata["stage_timings_ms"] = {
+            name: {"start": round(start * 1000, 2), "end": round(end * 1000, 2)}
+            for name, (start, end) in sorted(timings.items(), key=lambda item: item[1][0])
+        }
+        context.metadata["critical_path"] = path
+        summary = " → ".join(
+            f"{name} ({(timings[name][1] - timings[name][0]) * 1000:.0f}ms)" for name in path
+        )
+        context.log_step("Orchestrator", "Critical path", f"{summary}; total {total * 1000:.0f}ms")
+        logger.info(f"[{context.trace_id}] Critical path: {summary}; total {total * 1000:.0f}ms")
@@ -1,43 +1,871 @@
 from __future__ import annotations
+import atexit
+import gzip
 import json
-from datetime import datetime, timezone
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 
 from .schemas import PlanRequest, GrowthPlan
 
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
 # Data folder (will sit next to your app/)
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
+# Plans are written to bounded JSONL segments; sealed ones are gzipped in the background
+LOG_DIR = DATA_DIR / "plan_log"
+
+# Legacy single-file log, migrated into LOG_DIR as segment 0 on first use
 LOG_FILE = DATA_DIR / "plan_log.jsonl"
 
+SEGMENT_MAX_BYTES = int(os.getenv("PLAN_LOG_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+SEGMENT_MAX_AGE_HOURS = float(os.getenv("PLAN_LOG_SEGMENT_MAX_AGE_HOURS", "24"))
 
-def log_plan(request: PlanRequest, plan: GrowthPlan) -> None:
-    """Append a single request/plan pair to a JSONL log file."""
-    record: Dict[str, Any] = {
+# Retention is off unless configured; only whole sealed segments are ever dropped
+RETENTION_DAYS = float(os.getenv("PLAN_LOG_RETENTION_DAYS", "0")) or None
+RETENTION_MAX_BYTES = int(os.getenv("PLAN_LOG_RETENTION_MAX_BYTES", "0")) or None
+
+# Group commit: records are flushed every N records or T ms, whichever comes first
+FLUSH_MAX_RECORDS = int(os.getenv("PLAN_LOG_FLUSH_MAX_RECORDS", "256"))
+FLUSH_INTERVAL_MS = float(os.getenv("PLAN_LOG_FLUSH_INTERVAL_MS", "50"))
+FSYNC_POLICY = os.getenv("PLAN_LOG_FSYNC", "none").lower()  # 'none' or 'batch'
+
+_SEGMENT_RE = re.compile(r"^segment-(\d{6})\.jsonl(\.gz)?$")
+
+
+# --- Cross-process locking ---
+
+_lock_mutex = threading.RLock()
+_lock_depth = 0
+_lock_fd: Optional[int] = None
+
+
+@contextmanager
+def _log_lock():
+    """
+    Exclusive, reentrant lock over plan log mutations, across threads and processes.
+
+    Every append, rotation, index write and compaction step happens under this
+    lock (an flock on ``LOG_DIR/.lock``), so uvicorn workers sharing a data
+    directory never interleave records or race on segment/sidecar files.
+    """
+    global _lock_depth, _lock_fd
+    with _lock_mutex:
+        if _lock_depth == 0:
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
+            _lock_fd = os.open(LOG_DIR / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(_lock_fd, fcntl.LOCK_EX)
+        _lock_depth += 1
+        try:
+            yield
+        finally:
+            _lock_depth -= 1
+            if _lock_depth == 0:
+                if fcntl is not None:
+                    fcntl.flock(_lock_fd, fcntl.LOCK_UN)
+                os.close(_lock_fd)
+                _lock_fd = None
+
+
+class _OffsetIndex:
+    """
+    Sidecar index mapping business_id -> byte offsets of its records in a JSONL log.
+
+    The sidecar (``<segment>.idx``) is append-only, one ``[business_id, offset, length]``
+    entry per line. It covers the log up to the end of its last entry; anything
+    written after that is picked up by scanning only the uncovered tail of the log.
+    A missing, truncated or inconsistent sidecar is rebuilt from scratch and
+    swapped in atomically, so other processes notice the new inode and reload.
+
+    Lock order is always _log_lock() before self._lock.
+    """
+
+    def __init__(self, log_path: Path):
+        self.log_path = log_path
+        self.index_path = log_path.with_suffix(".idx")
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._offsets: Dict[str, List[int]] = {}
+        self._end = 0          # byte position in the log covered by the index
+        self._index_pos = 0    # byte position in the sidecar already loaded
+        self._index_ino: Optional[int] = None
+
+    def _add(self, business_id: str, offset: int, length: int) -> None:
+        self._offsets.setdefault(business_id, []).append(offset)
+        self._end = offset + length
+
+    @staticmethod
+    def _encode(entries: List[list]) -> bytes:
+        return "".join(json.dumps(e) + "\n" for e in entries).encode("utf-8")
+
+    def _append_entries(self, entries: List[list]) -> None:
+        if not entries:
+            return
+        with self.index_path.open("ab") as f:
+            f.write(self._encode(entries))
+            self._index_pos = f.tell()
+            self._index_ino = os.fstat(f.fileno()).st_ino
+
+    def _log_size(self) -> int:
+        return self.log_path.stat().st_size if self.log_path.exists() else 0
+
+    def _load_sidecar(self, log_size: int) -> bool:
+        """Read sidecar entries we haven't seen yet. Returns False if it is stale."""
+        try:
+            f = self.index_path.open("rb")
+        except FileNotFoundError:
+            return self._index_pos == 0 and self._end == 0
+
+        with f:
+            st = os.fstat(f.fileno())
+            if self._index_ino is not None and st.st_ino != self._index_ino:
+                # Sidecar was rebuilt (maybe by another worker); reload it from scratch
+                self._reset()
+            if st.st_size < self._index_pos:
+                return False
+            self._index_ino = st.st_ino
+
+            f.seek(self._index_pos)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # Partial trailing entry (interrupted write); ignore it
+                    break
+                try:
+                    business_id, offset, length = json.loads(raw)
+                except (ValueError, TypeError):
+                    return False
+                if offset < self._end or offset + length > log_size:
+                    return False
+                self._add(business_id, offset, length)
+                self._index_pos += len(raw)
+        return True
+
+    def _scan_log(self, log_size: int) -> List[list]:
+        """Index log records from the current end of coverage up to log_size."""
+        entries: List[list] = []
+        with self.log_path.open("rb") as f:
+            f.seek(self._end)
+            offset = self._end
+            for raw in f:
+                if offset + len(raw) > log_size or not raw.endswith(b"\n"):
+                    break
+                rec = _parse_record(raw) if raw.strip() else None
+                if rec is not None:
+                    business_id = rec.get("business_id")
+                    entries.append([business_id, offset, len(raw)])
+                    self._add(business_id, offset, len(raw))
+                else:
+                    # Blank or torn line (e.g. a partial write); nothing to index
+                    self._end = offset + len(raw)
+                offset += len(raw)
+        return entries
+
+    def _rebuild_locked(self) -> None:
+        self._reset()
+        if not self.log_path.exists():
+            self.index_path.unlink(missing_ok=True)
+            return
+        _write_atomic(self.index_path, self._encode(self._scan_log(self._log_size())))
+        st = self.index_path.stat()
+        self._index_pos, self._index_ino = st.st_size, st.st_ino
+
+    def sync(self) -> None:
+        """Catch up with the sidecar and the log tail. Caller must hold _log_lock()."""
+        with self._lock:
+            log_size = self._log_size()
+            if log_size < self._end or not self._load_sidecar(log_size):
+                self._rebuild_locked()
+            elif self._end < log_size:
+                self._append_entries(self._scan_log(log_size))
+
+    def rebuild(self) -> None:
+        """Discard the sidecar and re-index the whole log."""
+        with _log_lock(), self._lock:
+            self._rebuild_locked()
+
+    def refresh(self) -> None:
+        """Bring the index up to date, only taking the log lock if it has to write."""
+        with self._lock:
+            log_size = self._log_size()
+            if log_size >= self._end and self._load_sidecar(log_size) and self._end >= log_size:
+                return
+        with _log_lock():
+            self.sync()
+
+    def record_appends(self, entries: List[list]) -> None:
+        """
+        Register contiguous [business_id, offset, length] records just appended
+        to the log. Caller must hold _log_lock() and have called sync() first.
+        """
+        with self._lock:
+            if not entries or entries[0][1] != self._end:
+                # Index is behind; the next sync() will catch up from the log
+                return
+            for business_id, offset, length in entries:
+                self._add(business_id, offset, length)
+            self._append_entries(entries)
+
+    def offsets_for(self, business_id: str) -> List[int]:
+        with self._lock:
+            return list(self._offsets.get(business_id, []))
+
+
+_indexes: Dict[Path, _OffsetIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _get_index(log_path: Path) -> _OffsetIndex:
+    with _indexes_lock:
+        index = _indexes.get(log_path)
+        if index is None:
+            index = _indexes[log_path] = _OffsetIndex(log_path)
+        return index
+
+
+def _drop_index(log_path: Path) -> None:
+    with _indexes_lock:
+        _indexes.pop(log_path, None)
+
+
+# --- Segments ---
+
+class Segment:
+    """One file of the plan log, plus its summary once it has been sealed."""
+
+    def __init__(self, number: int, path: Path, meta: Optional[Dict[str, Any]] = None):
+        self.number = number
+        self.path = path
+        self.meta = meta
+
+    @property
+    def compressed(self) -> bool:
+        return self.path.suffix == ".gz"
+
+    def may_contain(
+        self,
+        business_id: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> bool:
+        """False only when the segment summary proves no record can match."""
+        if self.meta is None:
+            return True
+        if business_id is not None and business_id not in self.meta["business_ids"]:
+            return False
+        if since is not None and _parse_ts(self.meta["last_ts"]) < since:
+            return False
+        if until is not None and _parse_ts(self.meta["first_ts"]) > until:
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"Segment({self.number}, {self.path.name!r})"
+
+
+def _segment_path(number: int, compressed: bool = False) -> Path:
+    return LOG_DIR / f"segment-{number:06d}.jsonl{'.gz' if compressed else ''}"
+
+
+def _meta_path(number: int) -> Path:
+    return LOG_DIR / f"segment-{number:06d}.meta.json"
+
+
+def _parse_ts(value: Union[str, datetime]) -> datetime:
+    ts = datetime.fromisoformat(value) if isinstance(value, str) else value
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+# Sealed segment summaries never change, so they are cached by path
+_meta_cache: Dict[Path, Dict[str, Any]] = {}
+
+
+def _load_meta(number: int) -> Optional[Dict[str, Any]]:
+    path = _meta_path(number)
+    meta = _meta_cache.get(path)
+    if meta is None and path.exists():
+        meta = json.loads(path.read_text(encoding="utf-8"))
+        meta["business_ids"] = frozenset(meta["business_ids"])
+        _meta_cache[path] = meta
+    return meta
+
+
+def _migrate_legacy_log() -> None:
+    """Adopt a pre-segmentation plan_log.jsonl as segment 0."""
+    if not LOG_FILE.exists():
+        return
+    with _log_lock():
+        if not LOG_FILE.exists():
+            return
+        if any(_SEGMENT_RE.match(name) for name in os.listdir(LOG_DIR)):
+            logger.warning(f"Ignoring legacy {LOG_FILE}: {LOG_DIR} already has segments")
+            return
+        os.replace(LOG_FILE, _segment_path(0))
+        legacy_index = LOG_FILE.with_suffix(".idx")
+        if legacy_index.exists():
+            os.replace(legacy_index, _segment_path(0).with_suffix(".idx"))
+
+
+def _segment_files() -> List[Segment]:
+    """All segments on disk, oldest first. A gzipped copy wins over the plain file."""
+    _migrate_legacy_log()
+    if not LOG_DIR.exists():
+        return []
+
+    found: Dict[int, Path] = {}
+    for name in os.listdir(LOG_DIR):
+        match = _SEGMENT_RE.match(name)
+        if not match:
+            continue
+        number = int(match.group(1))
+        if match.group(2) or number not in found:
+            found[number] = LOG_DIR / name
+
+    return [Segment(n, found[n], _load_meta(n)) for n in sorted(found)]
+
+
+def list_segments(
+    business_id: Optional[str] = None,
+    since: Optional[Union[str, datetime]] = None,
+    until: Optional[Union[str, datetime]] = None,
+) -> List[Segment]:
+    """Segments (oldest first) that may hold records for the given business/time range."""
+    # Readers should see everything logged before they asked
+    plan_log_writer.flush()
+
+    since_ts = _parse_ts(since) if since is not None else None
+    until_ts = _parse_ts(until) if until is not None else None
+    return [
+        seg for seg in _segment_files()
+        if seg.may_contain(business_id, since_ts, until_ts)
+    ]
+
+
+# --- Writing ---
+
+_segment_started: Dict[Path, datetime] = {}
+
+
+def _segment_started_at(path: Path) -> Optional[datetime]:
+    """Timestamp of the first record in a segment (cached per path)."""
+    started = _segment_started.get(path)
+    if started is None:
+        with path.open("rb") as f:
+            # The first readable record; torn lines are skipped
+            first = next((rec for rec in map(_parse_record, f) if rec and rec.get("ts")), None)
+        if first is None:
+            return None
+        started = _segment_started[path] = _parse_ts(first["ts"])
+    return started
+
+
+def _should_rotate(path: Path, size: int, incoming: int) -> bool:
+    if size == 0:
+        return False
+    if size + incoming > SEGMENT_MAX_BYTES:
+        return True
+    started = _segment_started_at(path) if path.exists() else None
+    max_age = timedelta(hours=SEGMENT_MAX_AGE_HOURS)
+    return started is not None and datetime.now(timezone.utc) - started > max_age
+
+
+def _active_segment_path() -> Path:
+    segments = _segment_files()
+    if not segments:
+        return _segment_path(1)
+    last = segments[-1]
+    return _segment_path(last.number + 1) if last.compressed else last.path
+
+
+_O_APPEND_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+
+def _write_chunk(path: Path, chunk: List[tuple], fsync: bool) -> None:
+    """
+    Append (business_id, line) pairs to one segment. Caller must hold _log_lock().
+
+    The chunk goes out through one O_APPEND descriptor with no userspace
+    buffering, so a record is never split around another worker's write.
+    """
+    if not chunk:
+        return
+    index = _get_index(path)
+    index.sync()
+
+    data = memoryview(b"".join(line for _, line in chunk))
+    fd = os.open(path, _O_APPEND_FLAGS, 0o644)
+    try:
+        offset = os.fstat(fd).st_size
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    entries: List[list] = []
+    for business_id, line in chunk:
+        entries.append([business_id, offset, len(line)])
+        offset += len(line)
+    index.record_appends(entries)
+
+
+def _append_records(records: List[Dict[str, Any]], fsync: bool = False) -> None:
+    """Serialize records and append them to the active segment, rotating as needed."""
+    lines = [(rec["business_id"], (json.dumps(rec) + "\n").encode("utf-8")) for rec in records]
+
+    rotated = False
+    with _log_lock():
+        path = _active_segment_path()
+        size = path.stat().st_size if path.exists() else 0
+        chunk: List[tuple] = []
+
+        for business_id, line in lines:
+            if _should_rotate(path, size, len(line)):
+                _write_chunk(path, chunk, fsync)
+                path = _segment_path(int(_SEGMENT_RE.match(path.name).group(1)) + 1)
+                size, chunk, rotated = 0, [], True
+            chunk.append((business_id, line))
+            size += len(line)
+
+        _write_chunk(path, chunk, fsync)
+
+    if rotated:
+        _schedule_compaction()
+
+
+class PlanLogWriter:
+    """
+    Buffered plan log writer with group commit on a dedicated thread.
+
+    Callers only enqueue records; the writer thread serializes and appends them
+    in batches, flushing when FLUSH_MAX_RECORDS are pending, FLUSH_INTERVAL_MS
+    after the first pending record, or when flush()/close() is called. With
+    FSYNC_POLICY='batch' each batch is fsynced before it counts as written.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        max_records: Optional[int] = None,
+        interval_ms: Optional[float] = None,
+        fsync_policy: Optional[str] = None,
+    ):
+        self.max_records = max_records or FLUSH_MAX_RECORDS
+        self.interval_ms = interval_ms if interval_ms is not None else FLUSH_INTERVAL_MS
+        self.fsync = (fsync_policy or FSYNC_POLICY) == "batch"
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._state_lock = threading.Lock()
+        self._closed = False
+
+        self._records_written = 0
+        self._records_failed = 0
+        self._batches = 0
+        self._flush_ms_total = 0.0
+        self._flush_ms_max = 0.0
+        self._flush_ms_last = 0.0
+
+    def submit(self, record: Dict[str, Any]) -> None:
+        """Queue a record for the next batch (written synchronously once closed)."""
+        self._enqueue(record)
+
+    def submit_many(self, records: List[Dict[str, Any]]) -> None:
+        """Queue several records so they are always written in the same batch."""
+        if records:
+            self._enqueue(list(records))
+
+    def _enqueue(self, item: Union[Dict[str, Any], List[Dict[str, Any]]]) -> None:
+        with self._state_lock:
+            if self._closed:
+                self._write_batch(item if isinstance(item, list) else [item])
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="plan-log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        self._queue.put(item)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every record submitted before this call has been written."""
+        with self._state_lock:
+            if self._thread is None or self._closed:
+                return True
+            done = threading.Event()
+            self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Drain the queue and stop the writer thread."""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(self._STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        batches = self._batches
+        return {
+            "queue_depth": self._queue.qsize(),
+            "records_written": self._records_written,
+            "records_failed": self._records_failed,
+            "batches_flushed": batches,
+            "avg_batch_size": round(self._records_written / batches, 2) if batches else 0,
+            "last_flush_ms": round(self._flush_ms_last, 3),
+            "avg_flush_ms": round(self._flush_ms_total / batches, 3) if batches else 0,
+            "max_flush_ms": round(self._flush_ms_max, 3),
+            "fsync_policy": "batch" if self.fsync else "none",
+        }
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        try:
+            _append_records(batch, fsync=self.fsync)
+        except Exception as e:
+            self._records_failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} plan log record(s): {e}")
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._records_written += len(batch)
+        self._batches += 1
+        self._flush_ms_last = elapsed_ms
+        self._flush_ms_total += elapsed_ms
+        self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # flush interval elapsed
+
+            if isinstance(item, (dict, list)):
+                if not batch:
+                    deadline = time.monotonic() + self.interval_ms / 1000.0
+                if isinstance(item, list):
+                    batch.extend(item)
+                else:
+                    batch.append(item)
+                if len(batch) < self.max_records:
+                    continue
+
+            if batch:
+                self._write_batch(batch)
+                batch = []
+
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is self._STOP:
+                return
+
+
+plan_log_writer = PlanLogWriter()
+
+
+def _plan_record(request: PlanRequest, plan: GrowthPlan) -> Dict[str, Any]:
+    return {
         "ts": datetime.now(timezone.utc).isoformat(),
         "business_id": request.business_profile.business_id,
         "request": request.model_dump(),
         "plan": plan.model_dump(),
     }
-    
-    with LOG_FILE.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record) + "\n")
 
 
-def load_plans_for_business(business_id: str) -> List[Dict[str, Any]]:
-    """Return all logged plans for a given business_id."""
-    if not LOG_FILE.exists():
+def log_plan(request: PlanRequest, plan: GrowthPlan) -> None:
+    """Queue a single request/plan pair for the plan log writer."""
+    plan_log_writer.submit(_plan_record(request, plan))
+
+
+def log_plans(pairs: List[Tuple[PlanRequest, GrowthPlan]]) -> None:
+    """Queue many request/plan pairs to be written together in one batch."""
+    plan_log_writer.submit_many([_plan_record(request, plan) for request, plan in pairs])
+
+
+# --- Compaction & retention ---
+
+_compact_lock = threading.Lock()
+
+
+@contextmanager
+def _try_compaction_lock():
+    """Non-blocking flock so only one worker compacts at a time. Yields whether it was acquired."""
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    fd = os.open(LOG_DIR / ".compact.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+        yield True
+    finally:
+        os.close(fd)
+
+
+def _summarize_segment(path: Path) -> Dict[str, Any]:
+    business_ids = set()
+    first_ts = last_ts = None
+    records = 0
+    with path.open("rb") as f:
+        for raw in f:
+            rec = _parse_record(raw) if raw.strip() else None
+            if rec is None or not rec.get("ts"):
+                continue
+            business_ids.add(rec.get("business_id"))
+            first_ts = first_ts or rec["ts"]
+            last_ts = rec["ts"]
+            records += 1
+    return {
+        "records": records,
+        "first_ts": first_ts,
+        "last_ts": last_ts,
+        "business_ids": sorted(b for b in business_ids if b is not None),
+    }
+
+
+def _tmp_path(path: Path) -> Path:
+    # Per-process name so two workers never write the same temporary file
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = _tmp_path(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def compact_sealed_segments() -> int:
+    """
+    Summarize and gzip every sealed (non-active) plain segment.
+
+    Compression runs outside the log lock; only the swap takes it. The summary
+    is written before the compressed copy appears, so a reader always sees
+    either the plain segment or a complete .gz with metadata. Safe to run from
+    several workers at once. Returns the number of segments compacted.
+    """
+    compacted = 0
+    with _compact_lock, _try_compaction_lock() as acquired:
+        if not acquired:
+            return 0  # another worker is already compacting
+        segments = _segment_files()
+        for seg in segments[:-1]:
+            if seg.compressed:
+                continue
+            gz_path = _segment_path(seg.number, compressed=True)
+            tmp = _tmp_path(gz_path)
+            try:
+                summary = _summarize_segment(seg.path)
+                if summary["records"]:
+                    with seg.path.open("rb") as src, gzip.open(tmp, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+            except FileNotFoundError:
+                continue  # another worker got there first
+
+            with _log_lock():
+                if not seg.path.exists():
+                    tmp.unlink(missing_ok=True)
+                    continue
+                if summary["records"]:
+                    _write_atomic(_meta_path(seg.number), json.dumps(summary).encode("utf-8"))
+                    os.replace(tmp, gz_path)
+                    compacted += 1
+                seg.path.unlink()
+                seg.path.with_suffix(".idx").unlink(missing_ok=True)
+                _drop_index(seg.path)
+                _segment_started.pop(seg.path, None)
+
+        apply_retention()
+    return compacted
+
+
+def apply_retention(
+    max_age_days: Optional[float] = None,
+    max_total_bytes: Optional[int] = None,
+) -> List[Path]:
+    """
+    Drop whole sealed segments that fall outside the retention policy.
+
+    Segments older than max_age_days (by their newest record) are removed, then
+    the oldest sealed segments go until the log fits in max_total_bytes. The
+    active segment is never touched. Returns the removed segment paths.
+    """
+    max_age_days = max_age_days if max_age_days is not None else RETENTION_DAYS
+    max_total_bytes = max_total_bytes if max_total_bytes is not None else RETENTION_MAX_BYTES
+    if not max_age_days and not max_total_bytes:
         return []
-    
-    results: List[Dict[str, Any]] = []
-    with LOG_FILE.open("r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
+
+    segments = _segment_files()
+    sealed = [seg for seg in segments[:-1] if seg.meta is not None]
+    total = sum(seg.path.stat().st_size for seg in segments if seg.path.exists())
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days or 0)
+
+    removed: List[Path] = []
+    for seg in sealed:
+        expired = bool(max_age_days) and _parse_ts(seg.meta["last_ts"]) < cutoff
+        oversized = bool(max_total_bytes) and total > max_total_bytes
+        if not (expired or oversized):
+            continue
+        with _log_lock():
+            if not seg.path.exists():
+                continue
+            total -= seg.path.stat().st_size
+            seg.path.unlink()
+            _meta_path(seg.number).unlink(missing_ok=True)
+        _meta_cache.pop(_meta_path(seg.number), None)
+        removed.append(seg.path)
+
+    if removed:
+        logger.info(f"Plan log retention dropped {len(removed)} segment(s)")
+    return removed
+
+
+def _compact_in_background() -> None:
+    try:
+        compact_sealed_segments()
+    except Exception as e:
+        logger.warning(f"Plan log compaction failed: {e}")
+
+
+def _schedule_compaction() -> None:
+    # Explicitly not a daemon (the writer thread that calls this is one): let an
+    # in-progress compaction finish at exit rather than leave temp files behind
+    threading.Thread(target=_compact_in_background, name="plan-log-compactor", daemon=False).start()
+
+
+# --- Reading ---
+
+def _parse_record(raw: bytes) -> Optional[Dict[str, Any]]:
+    """A log record, or None for a line that isn't one (e.g. torn by a partial write)."""
+    try:
+        rec = json.loads(raw)
+    except ValueError:
+        return None
+    return rec if isinstance(rec, dict) else None
+
+
+def _iter_plain_segment(path: Path, business_id: str, after: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (offset, record) for a business via the offset index, past byte offset `after`."""
+    index = _get_index(path)
+    index.refresh()
+
+    for _ in range(2):
+        stale = False
+        offsets = [o for o in index.offsets_for(business_id) if o > after]
+        with path.open("rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                rec = _parse_record(f.readline())
+                if rec is None or rec.get("business_id") != business_id:
+                    stale = True
+                    break
+                yield offset, rec
+                after = offset
+        if not stale:
+            return
+        # Segment was rewritten underneath the index; rebuild once and resume
+        index.rebuild()
+
+
+def _iter_compressed_segment(path: Path, business_id: str, after: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (offset, record) from a gzipped segment; offsets match the plain file's."""
+    needle = json.dumps(business_id).encode("utf-8")
+    offset = 0
+    with gzip.open(path, "rb") as f:
+        for raw in f:
+            # Cheap byte check before paying for json.loads
+            if offset > after and needle in raw:
+                rec = _parse_record(raw)
+                if rec is not None and rec.get("business_id") == business_id:
+                    yield offset, rec
+            offset += len(raw)
+
+
+def _iter_segment(seg: Segment, business_id: str, after: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if not seg.compressed:
+        try:
+            for offset, rec in _iter_plain_segment(seg.path, business_id, after):
+                yield offset, rec
+                after = offset
+            return
+        except FileNotFoundError:
+            # Compacted while we were looking at it; resume from the gzipped copy
+            pass
+    try:
+        yield from _iter_compressed_segment(_segment_path(seg.number, compressed=True), business_id, after)
+    except FileNotFoundError:
+        # Dropped by retention
+        return
+
+
+def _encode_cursor(segment: int, offset: int) -> str:
+    return f"{segment}:{offset}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        segment, offset = cursor.split(":")
+        return int(segment), int(offset)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def iter_plans_for_business(
+    business_id: str,
+    since: Optional[Union[str, datetime]] = None,
+    cursor: Optional[str] = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Lazily yield (cursor, record) for a business's logged plans, oldest first.
+
+    Only one record is held in memory at a time. Pass a yielded cursor back in
+    to resume after that record; `since` skips records logged before it.
+    Invalid `since`/`cursor` values raise ValueError before iteration starts.
+    """
+    since_ts = _parse_ts(since) if since is not None else None
+    resume = _decode_cursor(cursor) if cursor else None
+
+    def generate() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for seg in list_segments(business_id=business_id, since=since_ts):
+            if resume and seg.number < resume[0]:
                 continue
-            rec = json.loads(line)
-            if rec.get("business_id") == business_id:
-                results.append(rec)
-    
-    return results
\ No newline at end of file
+            after = resume[1] if resume and seg.number == resume[0] else -1
+            for offset, rec in _iter_segment(seg, business_id, after):
+                if since_ts is not None and _parse_ts(rec["ts"]) < since_ts:
+                    continue
+                yield _encode_cursor(seg.number, offset), rec
+
+    return generate()
+
+
+def load_plans_for_business(business_id: str) -> List[Dict[str, Any]]:
+    """Return all logged plans for a given business_id."""
+    return [rec for _, rec in iter_plans_for_business(business_id)]
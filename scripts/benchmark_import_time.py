@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).parent.parent
+
+# Cold import budget for the API module (python -X importtime, cumulative)
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1800"))
+
+# Dependencies that must only load on first use, never at app startup
+LAZY_MODULES = ("pandas", "google.genai", "slack_sdk", "sendgrid", "openai", "anthropic")
+
+
+def measure_import_time(module: str = "app.main") -> Dict[str, float]:
+    """Import ``module`` in a fresh interpreter; returns cumulative ms per imported module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative) / 1000
+    return timings
+
+
+def eagerly_imported(module: str = "app.main") -> List[str]:
+    """LAZY_MODULES that importing ``module`` in a fresh interpreter loads"""
+    check = f"import sys, {module}; print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.split()
+
+
+if __name__ == "__main__":
+    # --lazy-only: just the deterministic lazy-import check, no timing budget
+    if "--lazy-only" in sys.argv[1:]:
+        eager = eagerly_imported()
+        if eager:
+            print(f"❌ Imported at startup but should be lazy: {', '.join(eager)}")
+        sys.exit(1 if eager else 0)
+
+    timings = measure_import_time()
+    total = timings["app.main"]
+    print(f"📊 import app.main: {total:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
+    print("   Slowest imports:")
+    for name, ms in sorted(timings.items(), key=lambda item: -item[1])[1:11]:
+        print(f"   {ms:8.1f} ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in timings]
+    if eager:
+        print(f"❌ Imported at startup but should be lazy: {', '.join(eager)}")
+    if total > IMPORT_TIME_BUDGET_MS:
+        print("❌ Import time over budget")
+    sys.exit(1 if eager or total > IMPORT_TIME_BUDGET_MS else 0)
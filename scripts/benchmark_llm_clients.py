@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.llm_router import LLMClientRegistry, _create_client
+
+
+def benchmark_client_setup(calls: int = 200, provider: str = "GOOGLE"):
+    """Compare per-call client construction with the pooled client registry"""
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-key")
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark-key")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark-key")
+    model = SimpleNamespace(provider=provider)
+    api_key = os.environ[f"{provider}_API_KEY"]
+
+    # Warm the SDK import so both sides pay the same one-time cost
+    _create_client(provider, api_key)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        _create_client(provider, api_key)
+    fresh = (time.perf_counter() - start) / calls
+
+    registry = LLMClientRegistry()
+    registry.get(model.provider)
+    start = time.perf_counter()
+    for _ in range(calls):
+        registry.get(model.provider)
+    pooled = (time.perf_counter() - start) / calls
+    registry.close()
+
+    print(f"📊 {provider} client setup over {calls} calls")
+    print(f"   New client per call: {fresh * 1000:.3f} ms")
+    print(f"   Pooled client:       {pooled * 1000:.3f} ms")
+    print(f"   Saved per call:      {(fresh - pooled) * 1000:.3f} ms ({fresh / pooled:.0f}x)")
+    print("   (excludes the TCP/TLS handshakes a fresh client also pays on its first request)")
+
+
+if __name__ == "__main__":
+    benchmark_client_setup(provider=sys.argv[1].upper() if len(sys.argv) > 1 else "GOOGLE")
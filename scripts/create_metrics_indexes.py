@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import engine, Base
+from app.models import AgentPerformance, LLMCallMetric
+
+# Metric tables that may predate an index added to their model
+METRIC_TABLES = [AgentPerformance.__table__, LLMCallMetric.__table__]
+
+Base.metadata.create_all(bind=engine)
+
+def create_metrics_indexes():
+    """
+    Add indexes missing from metric tables created before the index existed.
+
+    create_all only creates indexes together with a new table. On PostgreSQL
+    the index is built with CREATE INDEX CONCURRENTLY, so inserts from running
+    workers are not blocked while it builds.
+    """
+    for table in METRIC_TABLES:
+        for index in table.indexes:
+            if engine.dialect.name == "postgresql":
+                columns = ", ".join(column.name for column in index.columns)
+                unique = "UNIQUE " if index.unique else ""
+                # CONCURRENTLY can't run inside a transaction block
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    conn.exec_driver_sql(
+                        f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {index.name} ON {table.name} ({columns})"
+                    )
+            else:
+                index.create(bind=engine, checkfirst=True)
+            print(f"Index ready: {index.name} on {table.name}")
+
+if __name__ == "__main__":
+    create_metrics_indexes()
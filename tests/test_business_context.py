@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app import db_utils, models
+from app.agents.base import AgentContext
+from app.agents.strategy import StrategyAgent
+from app.database import Base
+from app.plan_cache import PlanCache
+from app.schemas import BusinessProfile
+
+
+@pytest.fixture
+def business_db(tmp_path, monkeypatch):
+    """Businesses stored in a throwaway SQLite database; yields the executed SQL statements"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'business.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[models.Business.__table__])
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    monkeypatch.setattr(db_utils, "SessionLocal", sessionmaker(bind=engine))
+    # Strategy memory updates invalidate cached plans; keep the markers out of data/
+    monkeypatch.setattr(db_utils, "plan_cache", PlanCache(cache_dir=None, marker_dir=str(tmp_path / "markers")))
+    yield statements
+    engine.dispose()
+
+
+def _profile(business_id: str = "biz-1") -> BusinessProfile:
+    return BusinessProfile(business_id=business_id, name="Test Co", industry="Retail", region="Toronto")
+
+
+class TestBusinessContext:
+    """Test loading a business and its strategy memory in one round trip"""
+
+    def test_missing_business_created_from_profile(self, business_db):
+        loaded = db_utils.load_business_context("biz-1", _profile())
+
+        assert loaded.created and loaded.tone == "professional"
+        assert loaded.strategy_memory == {}
+        assert [sql.split()[0] for sql in business_db] == ["SELECT", "INSERT"]
+        assert db_utils.load_business_context("biz-1", _profile()).created is False
+
+    def test_missing_business_without_profile(self, business_db):
+        assert db_utils.load_business_context("unknown") is None
+
+    def test_existing_business_loaded_with_one_query(self, business_db):
+        db_utils.load_business_context("biz-1", _profile())
+        db_utils.update_business_strategy_memory("biz-1", "Referral Program")
+        business_db.clear()
+
+        loaded = db_utils.load_business_context("biz-1", _profile())
+
+        assert loaded.failed_experiments == ["Referral Program"]
+        assert len(business_db) == 1
+        assert loaded.to_business_profile().name == "Test Co"
+
+    def test_strategy_agent_reuses_context_business(self, business_db):
+        context = AgentContext("t1")
+        context.business_context = db_utils.BusinessContext(
+            "biz-1", "Test Co", "Retail", "warm", {"failed_experiments": ["Lead Magnet"]}
+        )
+
+        memory = asyncio.run(StrategyAgent().prefetch_memory(_profile(), context))
+
+        assert memory == {"failed_experiments": ["Lead Magnet"]}
+        assert business_db == []
@@ -0,0 +1,68 @@
+import json
+import pytest
+from app import catalog
+from app.catalog import ExperimentCatalog
+
+
+CATALOG = {
+    "version": 1,
+    "default_bottleneck": ["signups", "purchases"],
+    "experiments": [
+        {"from_step": "visits", "to_step": "leads", "name": "Referral Program", "channel": "email", "hypothesis": "H"},
+        {"from_step": "visits", "to_step": "leads", "industry": "Retail", "name": "Window Display", "channel": "in-store", "hypothesis": "H"},
+        {"from_step": "signups", "to_step": "purchases", "name": "Win-Back Campaign", "channel": "email", "hypothesis": "H"},
+    ],
+    "fallback": [{"name": "Customer Feedback Survey", "channel": "email", "hypothesis": "H"}],
+}
+
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch):
+    """Point the catalog at a temporary file and reset the loaded index"""
+    path = tmp_path / "experiments.json"
+    path.write_text(json.dumps(CATALOG), encoding="utf-8")
+    monkeypatch.setattr(catalog, "CATALOG_PATH", path)
+    monkeypatch.setattr(catalog, "_catalog", None)
+    monkeypatch.setattr(catalog, "_catalog_mtime", None)
+    return path
+
+
+def test_industry_specific_entries_come_first():
+    exps = ExperimentCatalog.from_dict(CATALOG).lookup("visits", "leads", "retail")
+
+    assert [e.name for e in exps] == ["Window Display", "Referral Program"]
+
+
+def test_unknown_industry_uses_generic_entries():
+    exps = ExperimentCatalog.from_dict(CATALOG).lookup("visits", "leads", "Software")
+
+    assert [e.name for e in exps] == ["Referral Program"]
+
+
+def test_unknown_bottleneck_uses_default_then_fallback():
+    cat = ExperimentCatalog.from_dict(CATALOG)
+    assert [e.name for e in cat.lookup("foo", "bar")] == ["Win-Back Campaign"]
+
+    empty = ExperimentCatalog.from_dict({**CATALOG, "experiments": []})
+    assert [e.name for e in empty.lookup("foo", "bar")] == ["Customer Feedback Survey"]
+
+
+def test_lookup_returns_prebuilt_instances():
+    cat = ExperimentCatalog.from_dict(CATALOG)
+
+    assert cat.lookup("visits", "leads")[0] is cat.lookup("visits", "leads")[0]
+
+
+def test_hot_reload_picks_up_file_changes(catalog_file):
+    assert catalog.get_catalog().version == 1
+
+    catalog_file.write_text(json.dumps({**CATALOG, "version": 2}), encoding="utf-8")
+
+    assert catalog.reload_catalog(force=True).version == 2
+
+
+def test_invalid_file_keeps_previous_catalog(catalog_file):
+    catalog.reload_catalog()
+    catalog_file.write_text("{not json", encoding="utf-8")
+
+    assert catalog.reload_catalog(force=True).version == 1
@@ -0,0 +1,106 @@
+import asyncio
+from app.commentary_jobs import CommentaryJobManager
+from app.logic import build_deterministic_plan
+from app.schemas import BusinessProfile, GrowthGoal, KpiSnapshot
+
+
+def _plan():
+    business = BusinessProfile(business_id="b1", name="Test Co", industry="Retail", region="Toronto")
+    kpis = KpiSnapshot(visits=1000, leads=100, signups=50, purchases=20, revenue=5000.0)
+    return build_deterministic_plan(business, kpis, GrowthGoal(objective="grow"))
+
+
+class TestCommentaryJobs:
+    """Test deferred commentary generation"""
+
+    def test_submit_returns_pending_then_completes(self):
+        manager = CommentaryJobManager(concurrency=2)
+        completed = []
+
+        async def generate(plan):
+            await asyncio.sleep(0.01)
+            return "LLM commentary"
+
+        async def run():
+            plan = _plan()
+            job = manager.submit(plan, generate, completed.append)
+            assert plan.commentary_status == "pending" and plan.llm_strategy_commentary is None
+            await job.done.wait()
+            return job
+
+        job = asyncio.run(run())
+
+        assert job.status == "ready"
+        assert manager.get(job.commentary_id).to_dict()["commentary"] == "LLM commentary"
+        assert [p.commentary_status for p in completed] == ["ready"]
+        assert completed[0].commentary_id == job.commentary_id
+
+    def test_generator_error_marks_job_failed(self):
+        manager = CommentaryJobManager()
+        completed = []
+
+        async def generate(plan):
+            raise RuntimeError("provider down")
+
+        async def run():
+            job = manager.submit(_plan(), generate, completed.append)
+            await job.done.wait()
+            return job
+
+        job = asyncio.run(run())
+
+        assert job.status == "failed" and "provider down" in job.error
+        assert len(completed) == 1
+        assert manager.stats()["failed"] == 1
+
+    def test_close_cancels_slow_jobs_but_still_completes_them(self):
+        manager = CommentaryJobManager()
+        completed = []
+
+        async def generate(plan):
+            await asyncio.sleep(10)
+            return "never"
+
+        async def run():
+            job = manager.submit(_plan(), generate, completed.append)
+            await manager.close(timeout=0.01)
+            return job
+
+        job = asyncio.run(run())
+
+        assert job.status == "failed"
+        assert [p.commentary_status for p in completed] == ["failed"]
+
+    def test_concurrency_is_bounded(self):
+        manager = CommentaryJobManager(concurrency=2)
+        running, peak = [0], [0]
+
+        async def generate(plan):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.01)
+            running[0] -= 1
+            return "ok"
+
+        async def run():
+            jobs = [manager.submit(_plan(), generate) for _ in range(6)]
+            await asyncio.gather(*(job.done.wait() for job in jobs))
+
+        asyncio.run(run())
+
+        assert peak[0] == 2
+
+    def test_finished_jobs_expire(self):
+        manager = CommentaryJobManager(ttl_seconds=0)
+
+        async def generate(plan):
+            return "ok"
+
+        async def run():
+            job = manager.submit(_plan(), generate)
+            await job.done.wait()
+            return job
+
+        job = asyncio.run(run())
+
+        assert manager.get(job.commentary_id) is None
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+class TestStartupImports:
+    """Guard that heavy SDKs stay out of the API module's startup imports"""
+
+    def test_heavy_sdks_lazy(self):
+        # The wall-clock budget is a separate benchmark: python scripts/benchmark_import_time.py
+        result = subprocess.run(
+            [sys.executable, str(ROOT / "scripts" / "benchmark_import_time.py"), "--lazy-only"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+
+        assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,59 @@
+import sqlite3
+from app import llm_cache
+from app.llm_cache import LLMResponseCache, response_cache_key
+
+CONFIG = {"temperature": 0.7, "max_output_tokens": 1024}
+
+
+def test_key_depends_on_model_prompt_and_config():
+    base = response_cache_key("m1", "prompt", CONFIG)
+
+    assert base == response_cache_key("m1", "prompt", dict(reversed(list(CONFIG.items()))))
+    assert base != response_cache_key("m2", "prompt", CONFIG)
+    assert base != response_cache_key("m1", "prompt!", CONFIG)
+    assert base != response_cache_key("m1", "prompt", {**CONFIG, "temperature": 0.2})
+
+
+def test_sqlite_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    LLMResponseCache(path=path).put("m", "p", CONFIG, "answer", output_tokens=300)
+
+    other = LLMResponseCache(path=path)
+
+    assert other.get("m", "p", CONFIG) == "answer"
+    stats = other.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["tokens_saved"] == 300
+    assert stats["hit_rate"] == 1.0
+
+
+def test_ttl_expires_both_tiers(tmp_path, monkeypatch):
+    cache = LLMResponseCache(path=str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    cache.put("m", "p", CONFIG, "answer")
+    now = llm_cache.time.time()
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 120)
+
+    assert cache.get("m", "p", CONFIG) is None
+    assert LLMResponseCache(path=str(tmp_path / "llm.sqlite3"), ttl_seconds=60).get("m", "p", CONFIG) is None
+
+
+def test_size_limits_evict_least_recently_used(tmp_path):
+    path = tmp_path / "llm.sqlite3"
+    cache = LLMResponseCache(path=str(path), max_entries=2, max_disk_entries=3)
+    for i in range(5):
+        cache.put("m", f"p{i}", CONFIG, f"answer {i}")
+
+    rows = sqlite3.connect(str(path)).execute("SELECT response FROM llm_responses").fetchall()
+
+    assert sorted(r[0] for r in rows) == ["answer 2", "answer 3", "answer 4"]
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("m", "p0", CONFIG) is None
+
+
+def test_bypass_and_disabled_skip_lookup():
+    cache = LLMResponseCache(path=None)
+    cache.put("m", "p", CONFIG, "answer")
+
+    assert cache.get("m", "p", CONFIG, bypass=True) is None
+    assert LLMResponseCache(path=None, enabled=False).get("m", "p", CONFIG) is None
+    assert cache.stats()["bypassed"] == 1
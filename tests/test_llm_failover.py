@@ -0,0 +1,160 @@
+import asyncio
+import time
+import pytest
+from app.llm_router import (
+    CircuitBreaker,
+    FailoverPolicy,
+    LLMUnavailableError,
+    ModelRoutingTable,
+    RoutedModel,
+    plan_deadline,
+    remaining_plan_budget,
+)
+
+
+def _model(name, provider, weight):
+    return RoutedModel(model_id=0, model_name=name, provider=provider, agent_type="JudgeAgent", traffic_weight=weight)
+
+
+PRIMARY = _model("primary", "GOOGLE", 1.0)
+BACKUP = _model("backup", "OPENAI", 0.0)
+
+
+class FakeProviders:
+    """Local fake providers: per-model delay and optional error"""
+
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = set(failing)
+        self.calls = []
+
+    def __call__(self, model, prompt, system_prompt):
+        self.calls.append(model.model_name)
+        time.sleep(self.delays.get(model.model_name, 0.0))
+        if model.model_name in self.failing:
+            raise ConnectionError(f"{model.model_name} down")
+        return f"answer from {model.model_name}"
+
+
+async def _timed(coro):
+    """Time a call inside the loop (asyncio.run also waits for abandoned worker threads)"""
+    started = time.perf_counter()
+    text, model = await coro
+    return text, model, time.perf_counter() - started
+
+
+def _policy(providers, **kwargs):
+    router = ModelRoutingTable(loader=lambda: [PRIMARY, BACKUP], refresh_seconds=3600)
+    kwargs.setdefault("default_hedge_delay", 0.1)
+    return FailoverPolicy(router=router, call=providers, **kwargs)
+
+
+class TestFailover:
+    """Test failover, hedging and deadlines against fake providers"""
+
+    def test_primary_serves_when_healthy(self):
+        providers = FakeProviders({"primary": 0.01})
+        policy = _policy(providers)
+
+        text, model = asyncio.run(policy.call("JudgeAgent", "prompt"))
+
+        assert (text, model) == ("answer from primary", PRIMARY)
+        assert providers.calls == ["primary"]
+
+    def test_error_fails_over_immediately(self):
+        providers = FakeProviders({}, failing={"primary"})
+        policy = _policy(providers, default_hedge_delay=10)
+
+        started = time.perf_counter()
+        text, model = asyncio.run(policy.call("JudgeAgent", "prompt"))
+
+        assert model == BACKUP
+        assert time.perf_counter() - started < 1.0
+        assert policy.stats()["failovers"] == 1
+
+    def test_slow_primary_is_hedged(self):
+        providers = FakeProviders({"primary": 1.0, "backup": 0.01})
+        policy = _policy(providers, default_hedge_delay=0.05)
+
+        text, model, elapsed = asyncio.run(_timed(policy.call("JudgeAgent", "prompt")))
+
+        assert model == BACKUP
+        # Tail latency is the hedge delay plus the backup, not the slow primary
+        assert elapsed < 0.5
+        assert policy.stats()["hedges"] == 1 and policy.stats()["hedge_wins"] == 1
+
+    def test_hedge_waits_for_learned_p95(self):
+        providers = FakeProviders({"primary": 0.02, "backup": 0.0})
+        policy = _policy(providers, default_hedge_delay=0.001, min_samples=5)
+        for _ in range(5):
+            policy._window(PRIMARY).add(0.1)
+
+        text, model = asyncio.run(policy.call("JudgeAgent", "prompt"))
+
+        assert model == PRIMARY
+        assert providers.calls == ["primary"]
+
+    def test_breaker_opens_and_skips_provider(self):
+        providers = FakeProviders({}, failing={"primary"})
+        policy = _policy(providers, failure_threshold=2, reset_seconds=60)
+
+        for _ in range(3):
+            asyncio.run(policy.call("JudgeAgent", "prompt"))
+
+        assert providers.calls.count("primary") == 2
+        assert policy.stats()["breakers"]["GOOGLE"]["state"] == "open"
+
+    def test_all_providers_failing_raises(self):
+        policy = _policy(FakeProviders({}, failing={"primary", "backup"}))
+
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(policy.call("JudgeAgent", "prompt"))
+
+    def test_plan_deadline_bounds_the_call(self):
+        policy = _policy(FakeProviders({"primary": 1.0, "backup": 1.0}), default_hedge_delay=0.01)
+
+        async def run():
+            started = time.perf_counter()
+            with plan_deadline(0.1):
+                with pytest.raises(LLMUnavailableError):
+                    await policy.call("JudgeAgent", "prompt")
+            return time.perf_counter() - started
+
+        assert asyncio.run(run()) < 0.5
+        assert policy.stats()["deadline_exceeded"] == 1
+
+    def test_deadline_does_not_trip_breakers(self):
+        policy = _policy(FakeProviders({"primary": 1.0, "backup": 1.0}), failure_threshold=1)
+
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(policy.call("JudgeAgent", "prompt", timeout=0.05))
+
+        assert all(b["state"] == "closed" for b in policy.stats()["breakers"].values())
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def test_half_open_allows_single_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+        breaker.record_failure()
+
+        assert breaker.allow() is True
+        assert breaker.allow() is False
+        breaker.record_success()
+        assert breaker.state == "closed" and breaker.allow()
+
+    def test_cancelled_probe_is_released(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+        breaker.record_failure()
+
+        assert breaker.allow() is True
+        breaker.record_cancelled()
+        assert breaker.allow() is True
+
+
+def test_nested_deadline_only_shortens():
+    with plan_deadline(10):
+        with plan_deadline(100):
+            assert remaining_plan_budget() <= 10
+    assert remaining_plan_budget() is None
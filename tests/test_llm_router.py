@@ -0,0 +1,184 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app import llm_router
+from app.llm_router import LLMClientRegistry
+
+
+class FakeClient:
+    def __init__(self, provider, api_key):
+        self.provider = provider
+        self.api_key = api_key
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_sdk(monkeypatch):
+    created = []
+
+    def create(provider, api_key):
+        client = FakeClient(provider, api_key)
+        created.append(client)
+        return client
+
+    monkeypatch.setattr(llm_router, "_create_client", create)
+    monkeypatch.setenv("GOOGLE_API_KEY", "key-1")
+    monkeypatch.setenv("OPENAI_API_KEY", "key-2")
+    return created
+
+
+class TestLLMClientRegistry:
+    """Test pooling of provider clients"""
+
+    def test_client_reused_across_calls(self, fake_sdk):
+        registry = LLMClientRegistry()
+
+        first = registry.get("google")
+        second = registry.get("GOOGLE")
+
+        assert first is second
+        assert len(fake_sdk) == 1
+        assert registry.stats()["reused"] == 1
+
+    def test_providers_get_separate_clients(self, fake_sdk):
+        registry = LLMClientRegistry()
+
+        assert registry.get("GOOGLE") is not registry.get("OPENAI")
+        assert registry.stats()["providers"] == ["GOOGLE", "OPENAI"]
+
+    def test_rotated_key_creates_new_client(self, fake_sdk, monkeypatch):
+        registry = LLMClientRegistry()
+        old = registry.get("GOOGLE")
+
+        monkeypatch.setenv("GOOGLE_API_KEY", "key-rotated")
+        new = registry.get("GOOGLE")
+
+        assert new is not old and new.api_key == "key-rotated"
+        # The old client stays open for calls still using it
+        assert not old.closed
+        registry.close()
+        assert old.closed and new.closed
+
+    def test_missing_key_and_unknown_provider_raise(self, fake_sdk, monkeypatch):
+        registry = LLMClientRegistry()
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+
+        with pytest.raises(ValueError):
+            registry.get("ANTHROPIC")
+        with pytest.raises(ValueError):
+            registry.get("MISTRAL")
+
+    def test_aclose_closes_async_transport(self, fake_sdk):
+        registry = LLMClientRegistry()
+        client = registry.get("GOOGLE")
+        closed = []
+
+        async def aclose():
+            closed.append(True)
+
+        client.aio = SimpleNamespace(aclose=aclose)
+        asyncio.run(registry.aclose())
+
+        assert closed == [True] and client.closed
+        assert registry.stats()["providers"] == []
+
+
+def _model(name, weight, agent="JudgeAgent", provider="GOOGLE", model_id=None):
+    return llm_router.RoutedModel(
+        model_id=model_id or hash(name) % 1000,
+        model_name=name,
+        provider=provider,
+        agent_type=agent,
+        traffic_weight=weight,
+    )
+
+
+class TestModelRoutingTable:
+    """Test cached, weighted model selection"""
+
+    def test_loads_once_and_refreshes_on_interval(self):
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return [_model("a", 1.0)]
+
+        table = llm_router.ModelRoutingTable(loader=loader, refresh_seconds=3600)
+        for _ in range(50):
+            table.select("JudgeAgent")
+
+        assert len(loads) == 1
+        table.reload()
+        assert len(loads) == 2
+
+    def test_selection_follows_traffic_weights(self):
+        table = llm_router.ModelRoutingTable(
+            loader=lambda: [_model("a", 0.8), _model("b", 0.2), _model("off", 0.0)],
+            refresh_seconds=3600,
+        )
+        llm_router.random.seed(7)
+
+        picks = [table.select("JudgeAgent").model_name for _ in range(5000)]
+
+        assert 0.75 < picks.count("a") / len(picks) < 0.85
+        assert "off" not in picks
+
+    def test_business_assignment_is_sticky(self):
+        table = llm_router.ModelRoutingTable(
+            loader=lambda: [_model("a", 0.5), _model("b", 0.5)], refresh_seconds=3600
+        )
+
+        picks = {bid: table.select("JudgeAgent", bid).model_name for bid in map(str, range(200))}
+
+        assert all(table.select("JudgeAgent", bid).model_name == m for bid, m in picks.items())
+        assert set(picks.values()) == {"a", "b"}
+
+    def test_unknown_agent_raises_and_failed_reload_keeps_table(self):
+        rows = [_model("a", 1.0)]
+
+        def loader():
+            if not rows:
+                raise RuntimeError("db down")
+            return list(rows)
+
+        table = llm_router.ModelRoutingTable(loader=loader, refresh_seconds=3600)
+        with pytest.raises(ValueError):
+            table.select("CopywriterAgent")
+
+        rows.clear()
+        table.reload()
+
+        assert table.select("JudgeAgent").model_name == "a"
+
+    def test_failed_first_load_is_retried_after_interval(self):
+        loads = []
+
+        def loader():
+            loads.append(1)
+            raise RuntimeError("no such table: llm_models")
+
+        table = llm_router.ModelRoutingTable(loader=loader, refresh_seconds=3600)
+        for _ in range(20):
+            with pytest.raises(ValueError):
+                table.select("JudgeAgent")
+
+        assert len(loads) == 1
+
+    def test_calls_record_serving_model(self, monkeypatch):
+        table = llm_router.ModelRoutingTable(loader=lambda: [_model("a", 1.0)], refresh_seconds=3600)
+        monkeypatch.setattr(llm_router, "model_router", table)
+        monkeypatch.setattr(llm_router, "_call_provider", lambda model, prompt, system: "answer")
+        records = []
+        monkeypatch.setattr(llm_router, "record_llm_call", lambda *args, **kwargs: records.append((args, kwargs)))
+
+        with llm_router.llm_usage_business("biz-1"):
+            llm_router.call_llm(table.select("JudgeAgent"), "prompt")
+
+        stats = table.stats()["calls"]["GOOGLE/a"]
+        assert stats["calls"] == 1 and stats["errors"] == 0
+        (operation, provider, model_name, _), kwargs = records[0]
+        assert (operation, provider, model_name) == ("call_llm", "GOOGLE", "a")
+        assert kwargs["status"] == "SUCCESS" and kwargs["output_tokens"] > 0
@@ -0,0 +1,303 @@
+import asyncio
+import time
+from typing import Optional
+from types import SimpleNamespace
+import pytest
+from app import llm_router, llm_strategy
+from app.llm_cache import LLMResponseCache
+from app.single_flight import SingleFlight
+from app.logic import _assemble_plan, diagnose_funnel
+from app.schemas import BusinessProfile, GrowthGoal, KpiSnapshot
+
+
+def _plan():
+    business = BusinessProfile(business_id="b1", name="Test Co", industry="Retail", region="Toronto")
+    kpis = KpiSnapshot(visits=1000, leads=100, signups=50, purchases=20, revenue=5000.0)
+    return _assemble_plan(business, kpis, GrowthGoal(objective="grow"), diagnose_funnel(kpis))
+
+
+class FakeAsyncModels:
+    """Stands in for genai's client.aio.models with a configurable delay"""
+
+    def __init__(self, delay: float, text: str = "LLM commentary"):
+        self.delay = delay
+        self.text = text
+        self.cancelled = False
+        self.calls = 0
+        self.fail_after: Optional[int] = None
+        self.stream_closed = False
+
+    async def generate_content(self, model, contents, config):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return SimpleNamespace(text=self.text, usage_metadata=SimpleNamespace(candidates_token_count=700))
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls += 1
+
+        async def chunks():
+            try:
+                for i, word in enumerate(self.text.split(" ")):
+                    await asyncio.sleep(self.delay)
+                    if self.fail_after is not None and i >= self.fail_after:
+                        raise RuntimeError("stream reset")
+                    yield SimpleNamespace(text=word if i == 0 else " " + word, usage_metadata=None)
+            finally:
+                self.stream_closed = True
+        return chunks()
+
+
+@pytest.fixture(autouse=True)
+def response_cache(monkeypatch):
+    """Fresh in-memory LLM response cache for each test"""
+    cache = LLMResponseCache(path=None, ttl_seconds=60, max_entries=10)
+    monkeypatch.setattr(llm_strategy, "llm_response_cache", cache)
+    monkeypatch.setattr(llm_strategy, "llm_single_flight", SingleFlight())
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def usage_records(monkeypatch):
+    """Capture per-call LLM metrics instead of writing them to the database"""
+    records = []
+    monkeypatch.setattr(llm_strategy, "record_llm_call", lambda *args, **kwargs: records.append(kwargs))
+    return records
+
+
+@pytest.fixture(autouse=True)
+def failover(monkeypatch):
+    """Route commentary to the default Gemini model without reading llm_models"""
+    router = llm_router.ModelRoutingTable(loader=lambda: [llm_strategy._DEFAULT_COMMENTARY_MODEL], refresh_seconds=3600)
+    policy = llm_router.FailoverPolicy(router=router)
+    monkeypatch.setattr(llm_router, "llm_failover", policy)
+    return policy
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    def install(delay: float, text: str = "LLM commentary") -> FakeAsyncModels:
+        models = FakeAsyncModels(delay, text)
+        monkeypatch.setattr(llm_strategy, "_client", SimpleNamespace(aio=SimpleNamespace(models=models)))
+        return models
+    return install
+
+
+class TestAsyncCommentary:
+    """Test the non-blocking commentary path"""
+
+    def test_returns_llm_text(self, fake_models):
+        fake_models(0.0, "  Strategic brief  ")
+
+        assert asyncio.run(llm_strategy.generate_strategy_commentary_async(_plan())) == "Strategic brief"
+
+    def test_timeout_cancels_call_and_falls_back(self, fake_models):
+        models = fake_models(5.0)
+        plan = _plan()
+
+        started = time.perf_counter()
+        text = asyncio.run(llm_strategy.generate_strategy_commentary_async(plan, timeout=0.05))
+
+        assert time.perf_counter() - started < 1.0
+        assert text == llm_strategy.fallback_commentary(plan)
+        assert models.cancelled
+
+    def test_slow_call_does_not_block_event_loop(self, fake_models):
+        fake_models(0.2)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+
+        async def run():
+            await asyncio.gather(llm_strategy.generate_strategy_commentary_async(_plan()), ticker())
+
+        asyncio.run(run())
+
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.2
+
+    def test_caller_cancellation_propagates(self, fake_models):
+        models = fake_models(5.0)
+
+        async def run():
+            task = asyncio.create_task(llm_strategy.generate_strategy_commentary_async(_plan()))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+
+        assert models.cancelled
+
+    def test_no_client_uses_fallback(self, monkeypatch):
+        monkeypatch.setattr(llm_strategy, "_client", None)
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+
+        def no_routing(*args):
+            raise AssertionError("routing table consulted without a provider client")
+
+        monkeypatch.setattr(llm_strategy, "failover_candidates", no_routing)
+        plan = _plan()
+
+        assert asyncio.run(llm_strategy.generate_strategy_commentary_async(plan)) == llm_strategy.fallback_commentary(plan)
+
+
+class TestCommentaryResponseCache:
+    """Test that identical prompts reuse the cached completion"""
+
+    def test_identical_prompt_served_from_cache(self, fake_models, response_cache):
+        models = fake_models(0.0)
+        plan = _plan()
+
+        first = asyncio.run(llm_strategy.generate_strategy_commentary_async(plan))
+        second = asyncio.run(llm_strategy.generate_strategy_commentary_async(plan))
+
+        assert first == second == "LLM commentary"
+        assert models.calls == 1
+        assert response_cache.stats()["tokens_saved"] == 700
+
+    def test_calls_and_cache_hits_are_metered(self, fake_models, usage_records):
+        fake_models(0.0)
+        plan = _plan()
+
+        asyncio.run(llm_strategy.generate_strategy_commentary_async(plan))
+        asyncio.run(llm_strategy.generate_strategy_commentary_async(plan))
+
+        call, hit = usage_records
+        assert call["business_id"] == hit["business_id"] == "b1"
+        assert (call["cache_hit"], call["status"], call["output_tokens"]) == (False, "SUCCESS", 700)
+        assert call["input_tokens"] > 0
+        assert (hit["cache_hit"], hit["input_tokens"], hit["output_tokens"]) == (True, 0, 0)
+
+    def test_bypass_flag_forces_fresh_call(self, fake_models, response_cache):
+        models = fake_models(0.0)
+        plan = _plan()
+
+        asyncio.run(llm_strategy.generate_strategy_commentary_async(plan))
+        asyncio.run(llm_strategy.generate_strategy_commentary_async(plan, bypass_cache=True))
+
+        assert models.calls == 2
+        assert response_cache.stats()["bypassed"] == 1
+
+    def test_fallback_text_is_not_cached(self, fake_models, response_cache):
+        models = fake_models(5.0)
+        plan = _plan()
+
+        asyncio.run(llm_strategy.generate_strategy_commentary_async(plan, timeout=0.01))
+        models.delay = 0.0
+        text = asyncio.run(llm_strategy.generate_strategy_commentary_async(plan))
+
+        assert text == "LLM commentary"
+        assert response_cache.stats()["stores"] == 1
+
+
+class TestCommentaryCoalescing:
+    """Test that concurrent identical prompts share one Gemini call"""
+
+    def test_concurrent_identical_prompts_make_one_call(self, fake_models):
+        models = fake_models(0.05)
+        plan = _plan()
+
+        async def run():
+            return await asyncio.gather(
+                *(llm_strategy.generate_strategy_commentary_async(plan) for _ in range(5))
+            )
+
+        assert asyncio.run(run()) == ["LLM commentary"] * 5
+        assert models.calls == 1
+        assert llm_strategy.llm_single_flight.stats()["coalesced"] == 4
+
+
+async def _collect(plan, **kwargs):
+    return [chunk async for chunk in llm_strategy.stream_strategy_commentary(plan, **kwargs)]
+
+
+@pytest.fixture
+def stream_stats(monkeypatch):
+    stats = llm_strategy.CommentaryStreamStats()
+    monkeypatch.setattr(llm_strategy, "commentary_stream_stats", stats)
+    return stats
+
+
+class TestCommentaryStreaming:
+    """Test token-by-token commentary streaming"""
+
+    def test_streams_chunks_and_caches_full_text(self, fake_models, response_cache, stream_stats):
+        models = fake_models(0.0, "Your growth is constrained")
+        plan = _plan()
+
+        chunks = asyncio.run(_collect(plan))
+
+        assert chunks == ["Your", " growth", " is", " constrained"]
+        # A later non-streaming call for the same prompt is served from the cache
+        assert asyncio.run(llm_strategy.generate_strategy_commentary_async(plan)) == "Your growth is constrained"
+        assert models.calls == 1
+        stats = stream_stats.stats()
+        assert stats["completed"] == 1
+        assert stats["ttft_seconds"]["samples"] == 1
+
+    def test_cached_commentary_is_one_chunk(self, fake_models, stream_stats):
+        models = fake_models(0.0, "Cached brief")
+        plan = _plan()
+        asyncio.run(llm_strategy.generate_strategy_commentary_async(plan))
+
+        assert asyncio.run(_collect(plan)) == ["Cached brief"]
+        assert models.calls == 1
+        assert stream_stats.stats()["cached"] == 1
+
+    def test_timeout_before_first_token_yields_fallback(self, fake_models, response_cache, stream_stats, usage_records):
+        fake_models(5.0)
+        plan = _plan()
+
+        started = time.perf_counter()
+        chunks = asyncio.run(_collect(plan, timeout=0.05))
+
+        assert time.perf_counter() - started < 1.0
+        assert chunks == [llm_strategy.fallback_commentary(plan)]
+        assert stream_stats.stats()["fallbacks"] == 1
+        assert response_cache.stats()["stores"] == 0
+        assert usage_records[0]["status"] == "TIMEOUT"
+
+    def test_broken_stream_appends_fallback(self, fake_models, response_cache, stream_stats):
+        models = fake_models(0.0, "one two three")
+        models.fail_after = 2
+        plan = _plan()
+
+        chunks = asyncio.run(_collect(plan))
+
+        assert chunks[:2] == ["one", " two"]
+        assert chunks[2].endswith(llm_strategy.fallback_commentary(plan))
+        assert stream_stats.stats()["truncated"] == 1
+        assert response_cache.stats()["stores"] == 0
+
+    def test_upstream_stream_closed_when_consumer_stops(self, fake_models, stream_stats):
+        models = fake_models(0.0, "one two three")
+
+        async def run():
+            stream = llm_strategy.stream_strategy_commentary(_plan())
+            assert await stream.__anext__() == "one"
+            await stream.aclose()
+            # Before asyncio.run's shutdown would finalize the upstream generator
+            assert models.stream_closed
+
+        asyncio.run(run())
+
+        assert models.calls == 1
+
+    def test_ttft_percentiles(self):
+        stats = llm_strategy.CommentaryStreamStats()
+        for ttft in [0.1, 0.2, 0.3, 0.4]:
+            stats.record("completed", ttft, 1.0)
+
+        ttft = stats.stats()["ttft_seconds"]
+
+        assert ttft["p50"] == 0.3
+        assert ttft["max"] == 0.4
@@ -0,0 +1,148 @@
+import time
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.monitoring import llm_usage
+from app.monitoring.metrics_buffer import BufferedMetricsWriter
+from app import models
+from app.database import Base
+
+
+@pytest.fixture
+def usage_engine(tmp_path):
+    """Throwaway SQLite database with the LLM call metrics table"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[models.LLMCallMetric.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def usage_db(usage_engine, monkeypatch):
+    """LLM call metrics written to and aggregated from the throwaway database"""
+    session_factory = sessionmaker(bind=usage_engine)
+    writer = BufferedMetricsWriter(models.LLMCallMetric, "test-llm-metrics", session_factory=session_factory)
+    monkeypatch.setattr(llm_usage, "SessionLocal", session_factory)
+    monkeypatch.setattr(llm_usage, "llm_metrics_writer", writer)
+    yield writer
+    writer.close()
+
+
+def _record(model="gemini-2.0-flash-exp", business="biz-a", tokens=(1000, 500), latency=200, **kwargs):
+    llm_usage.record_llm_call(
+        "strategy_commentary", "google", model, latency,
+        input_tokens=tokens[0], output_tokens=tokens[1], business_id=business, **kwargs,
+    )
+
+
+def _row() -> dict:
+    return {
+        "created_at": datetime.now(), "operation": "op", "provider": "GOOGLE", "model_name": "m",
+        "business_id": None, "input_tokens": 1, "output_tokens": 1, "latency_ms": 1,
+        "cache_hit": False, "status": "SUCCESS",
+    }
+
+
+class TestBufferedMetricsWriter:
+    """Test bulk writes from the in-process buffer"""
+
+    def test_rows_written_in_one_batch(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'w.db'}")
+        Base.metadata.create_all(engine, tables=[models.LLMCallMetric.__table__])
+        writer = BufferedMetricsWriter(
+            models.LLMCallMetric, "w", max_records=3, interval_ms=10_000, session_factory=sessionmaker(bind=engine)
+        )
+        for _ in range(3):
+            writer.submit(_row())
+
+        assert writer.flush(timeout=5)
+        writer.close()
+
+        stats = writer.stats()
+        assert (stats["written"], stats["batches"], stats["dropped"]) == (3, 1, 0)
+
+    def test_full_buffer_drops_instead_of_blocking(self):
+        writer = BufferedMetricsWriter(models.LLMCallMetric, "w", max_pending=1, sample_every=1)
+        # Pretend the writer thread is running but stuck on a slow database
+        writer._thread = object()
+
+        assert writer.submit(_row()) is True
+        assert writer.submit(_row()) is False
+        assert writer.stats()["dropped"] == 1
+
+    def test_flush_gives_up_when_buffer_stays_full(self):
+        writer = BufferedMetricsWriter(models.LLMCallMetric, "w", max_pending=1, sample_every=1)
+        writer._thread = object()
+        writer.submit(_row())
+
+        started = time.perf_counter()
+        assert writer.flush(timeout=0.05) is False
+        assert time.perf_counter() - started < 1
+
+    def test_close_gives_up_when_buffer_stays_full(self):
+        writer = BufferedMetricsWriter(models.LLMCallMetric, "w", max_pending=1, sample_every=1)
+        writer._thread = object()
+        writer.submit(_row())
+
+        started = time.perf_counter()
+        writer.close(timeout=0.05)
+        assert time.perf_counter() - started < 1
+
+    def test_backlog_samples_successful_rows(self):
+        writer = BufferedMetricsWriter(models.LLMCallMetric, "w", max_pending=4, sample_above=0.5, sample_every=2)
+        writer._thread = object()
+
+        kept = [writer.submit(_row()) for _ in range(4)]
+        error_kept = writer.submit({**_row(), "status": "ERROR"})
+
+        # Rows 1-2 fill the buffer to the watermark; after that every 2nd success is kept
+        assert kept == [True, True, False, True]
+        assert error_kept is True
+        assert writer.stats()["sampled_out"] == 1
+
+
+class TestLLMUsageAggregation:
+    """Test per-model and per-business LLM usage rollups"""
+
+    def test_usage_by_model(self, usage_db, usage_engine):
+        _record()
+        _record(latency=400)
+        _record(tokens=(0, 0), latency=1, cache_hit=True)
+        _record(model="gpt-4", tokens=(100, 100), status="ERROR")
+
+        usage = {row["model_name"]: row for row in llm_usage.get_llm_usage_by_model(days=1)}
+
+        gemini = usage["gemini-2.0-flash-exp"]
+        assert (gemini["calls"], gemini["cache_hits"], gemini["errors"]) == (3, 1, 0)
+        assert (gemini["input_tokens"], gemini["output_tokens"]) == (2000, 1000)
+        # Cache hits don't count towards provider latency
+        assert gemini["avg_latency_ms"] == 300 and gemini["max_latency_ms"] == 400
+        assert gemini["estimated_cost_usd"] == pytest.approx((2000 * 0.10 + 1000 * 0.40) / 1e6)
+        assert usage["gpt-4"]["errors"] == 1
+        # Timestamps come from the column default, the same clock as agent metrics
+        with usage_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM llm_call_metrics WHERE created_at IS NULL").scalar() == 0
+
+    def test_usage_by_business_ranks_spenders(self, usage_db):
+        _record(business="small")
+        _record(business="big", model="gpt-4", tokens=(10_000, 5_000))
+        with llm_usage.llm_usage_business("big"):
+            _record(business=None)
+
+        usage = llm_usage.get_llm_usage_by_business(days=1)
+
+        assert [row["business_id"] for row in usage] == ["big", "small"]
+        assert usage[0]["calls"] == 2
+        assert usage[0]["models"] == ["gemini-2.0-flash-exp", "gpt-4"]
+        assert llm_usage.get_llm_usage_by_business(days=1, limit=1)[0]["business_id"] == "big"
+
+    def test_unpriced_model_has_no_cost(self, usage_db):
+        _record(model="in-house-llm")
+
+        assert llm_usage.get_llm_usage_by_model(days=1)[0]["estimated_cost_usd"] is None
+
+    def test_malformed_pricing_keeps_built_in_table(self):
+        assert llm_usage._load_pricing('{"in-house-llm": [1, 2]}')["in-house-llm"] == (1.0, 2.0)
+        for raw in ['{"gpt-4": [30', '[1, 2]', '{"gpt-4": 30}', '{"gpt-4": ["cheap", 1]}']:
+            assert llm_usage._load_pricing(raw) == llm_usage._DEFAULT_PRICING
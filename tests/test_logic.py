@@ -1,5 +1,6 @@
 import pytest
 from app.schemas import (
+    PlanRequest,
     KpiSnapshot,
     BusinessProfile,
     GrowthGoal,
@@ -8,13 +9,29 @@ from app.schemas import (
 )
 from app.logic import (
     diagnose_funnel,
+    diagnose_funnel_batch,
+    funnel_insights_from_batch,
     propose_experiments,
     score_experiments_ice,
+    ice_score_arrays,
+    top_k_experiments,
     generate_copy,
     build_growth_plan,
+    build_growth_plans_batch,
 )
 
 
+@pytest.fixture(autouse=True)
+def offline_llm(monkeypatch):
+    """Commentary without a model client, routing table or usage rows in the database"""
+    from app import llm_router, llm_strategy
+
+    router = llm_router.ModelRoutingTable(loader=lambda: [llm_strategy._DEFAULT_COMMENTARY_MODEL], refresh_seconds=3600)
+    monkeypatch.setattr(llm_router, "llm_failover", llm_router.FailoverPolicy(router=router))
+    monkeypatch.setattr(llm_strategy, "_client", None)
+    monkeypatch.setattr(llm_strategy, "record_llm_call", lambda *args, **kwargs: None)
+
+
 class TestFunnelDiagnosis:
     """Test funnel analysis across all bottleneck scenarios"""
 
@@ -81,6 +98,39 @@ class TestFunnelDiagnosis:
         assert insight.drop_rate >= 0
 
 
+class TestFunnelDiagnosisBatch:
+    """Test vectorized funnel diagnosis against the scalar version"""
+
+    def test_batch_matches_scalar(self):
+        """Every row matches diagnose_funnel, including zero denominators and ties"""
+        import random
+        rng = random.Random(42)
+        rows = [(0, 0, 0, 0), (100, 0, 0, 0), (100, 50, 0, 0), (100, 50, 25, 0), (10, 5, 5, 5)]
+        rows += [tuple(rng.randint(0, 1000) for _ in range(4)) for _ in range(500)]
+        columns = list(zip(*rows))
+
+        batch = diagnose_funnel_batch(*columns)
+        insights = funnel_insights_from_batch(batch)
+
+        for (visits, leads, signups, purchases), batched in zip(rows, insights):
+            scalar = diagnose_funnel(KpiSnapshot(
+                visits=visits, leads=leads, signups=signups, purchases=purchases, revenue=0.0
+            ))
+            assert batched == scalar
+
+    def test_batch_exposes_all_conversion_rates(self):
+        """Conversion columns and bottleneck indices are returned as arrays"""
+        batch = diagnose_funnel_batch([1000, 0], [100, 0], [80, 0], [60, 0])
+
+        assert batch["visit_to_lead"].tolist() == [0.1, 0.0]
+        assert batch["bottleneck"].tolist() == [0, 0]
+        assert batch["drop_rate"].tolist() == [0.9, 1.0]
+
+    def test_batch_rejects_mismatched_columns(self):
+        with pytest.raises(ValueError):
+            diagnose_funnel_batch([1, 2], [1], [1], [1])
+
+
 class TestExperimentProposal:
     """Test experiment generation for all bottleneck types"""
 
@@ -243,6 +293,74 @@ class TestICEScoring:
             assert exp.priority_score > 0
 
 
+class TestICEScoringRules:
+    """Test the compiled ICE rule matcher against the original if/elif chain"""
+
+    @staticmethod
+    def _legacy_scores(name, channel):
+        name, channel = name.lower(), channel.lower()
+        impact, confidence = 4, 3
+        if "referral" in name:
+            impact, confidence = 5, 3
+        elif "loyalty" in name or "punch card" in name:
+            impact, confidence = 4, 4
+        elif "win-back" in name or "winback" in name:
+            impact, confidence = 4, 3
+        elif "onboarding" in name or "nurture" in name:
+            impact, confidence = 5, 4
+        elif "demo" in name or "live" in name:
+            impact, confidence = 4, 3
+        elif "lead magnet" in name or "landing page" in name:
+            impact, confidence = 5, 4
+        elif "feedback" in name or "survey" in name:
+            impact, confidence = 3, 5
+        effort = 2 if channel == "email" else 3 if channel in {"website", "online"} else 4
+        return impact, confidence, effort
+
+    NAMES = [
+        "Referral Program", "Live Referral Night", "Survey then Loyalty", "Delivery Feedback",
+        "Winback Nurture", "Landing Page Demo", "Onboarding Survey", "Punch Card Live",
+        "Olive Oil Tasting", "Plain Experiment", "LEAD MAGNET", "win-back referral",
+    ]
+    CHANNELS = ["email", "Website", "online", "in-store", "events", "EMAIL"]
+
+    def _candidates(self, n):
+        return [
+            GrowthExperiment(
+                name=self.NAMES[i % len(self.NAMES)],
+                channel=self.CHANNELS[(i * 7) % len(self.CHANNELS)],
+                hypothesis="Test",
+            )
+            for i in range(n)
+        ]
+
+    def test_scores_match_legacy_rules(self):
+        """Overlapping keywords resolve by rule priority, not position"""
+        for exp in self._candidates(len(self.NAMES) * len(self.CHANNELS)):
+            scored = score_experiments_ice([exp])[0]
+            assert (scored.impact, scored.confidence, scored.effort) == self._legacy_scores(exp.name, exp.channel)
+
+    def test_vectorized_scores_match_scalar(self):
+        candidates = self._candidates(200)
+
+        arrays = ice_score_arrays(candidates)
+        scalar = [score_experiments_ice([exp])[0] for exp in candidates]
+
+        assert arrays["priority_score"].tolist() == [s.priority_score for s in scalar]
+        assert arrays["effort"].tolist() == [s.effort for s in scalar]
+
+    def test_top_k_matches_full_sort(self):
+        candidates = self._candidates(500)
+
+        top = top_k_experiments(candidates, 25)
+        full = score_experiments_ice(candidates)[:25]
+
+        assert [(t.experiment.name, t.experiment.channel, t.priority_score) for t in top] == [
+            (f.experiment.name, f.experiment.channel, f.priority_score) for f in full
+        ]
+        assert top_k_experiments(candidates, 0) == []
+
+
 class TestCopyGeneration:
     """Test copy generation for all channels"""
 
@@ -342,5 +460,29 @@ class TestEndToEndPlan:
             )
 
 
+    def test_batch_plans_match_single_plans(self):
+        """Bulk deterministic pipeline matches build_growth_plan minus commentary"""
+        goal = GrowthGoal(objective="grow", horizon_weeks=6)
+        requests = [
+            PlanRequest(
+                business_profile=BusinessProfile(
+                    business_id=f"batch_{i}", name=f"Biz {i}", industry="Retail", region="Toronto"
+                ),
+                kpis=KpiSnapshot(visits=v, leads=l, signups=s, purchases=p, revenue=100.0),
+                goal=goal,
+            )
+            for i, (v, l, s, p) in enumerate([(1000, 100, 80, 60), (1000, 800, 100, 80), (0, 0, 0, 0)])
+        ]
+
+        plans = build_growth_plans_batch(requests)
+
+        assert len(plans) == 3
+        for request, plan in zip(requests, plans):
+            single = build_growth_plan(request.business_profile, request.kpis, request.goal)
+            assert plan.llm_strategy_commentary is None
+            assert plan.model_dump(exclude={"llm_strategy_commentary"}) == single.model_dump(
+                exclude={"llm_strategy_commentary"}
+            )
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
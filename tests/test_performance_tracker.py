@@ -0,0 +1,145 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import sessionmaker
+from app import models
+from app.agents.base import AgentContext, BaseAgent
+from app.database import Base
+from app.monitoring import performance_tracker
+from app.monitoring.metrics_buffer import BufferedMetricsWriter
+from app.monitoring.performance_tracker import PerformanceTracker
+from app.stage_graph import Stage, StageGraph
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def agent_engine(tmp_path):
+    """Throwaway SQLite database with the agent metrics table"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'agents.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[models.Business.__table__, models.AgentPerformance.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def agent_db(agent_engine, monkeypatch):
+    """Agent metrics written to and read from the throwaway database"""
+    session_factory = sessionmaker(bind=agent_engine)
+    writer = BufferedMetricsWriter(
+        models.AgentPerformance, "test-agent-metrics", interval_ms=10_000, session_factory=session_factory
+    )
+    monkeypatch.setattr(performance_tracker, "SessionLocal", session_factory)
+    monkeypatch.setattr(performance_tracker, "agent_metrics_writer", writer)
+    yield writer
+    writer.close()
+
+
+def _step(agent_name: str, execution_time_ms: int, status: str = "SUCCESS") -> dict:
+    return {
+        "created_at": datetime.now(), "trace_id": "t", "agent_name": agent_name,
+        "execution_time_ms": execution_time_ms, "status": status, "error_message": None, "business_id": None,
+    }
+
+
+class TestAgentMetricsBuffer:
+    """Test that agent metrics are buffered off the request path"""
+
+    def test_tracked_steps_written_in_one_batch(self, agent_db):
+        for agent in ("Intake", "Analyst", "Strategy"):
+            with PerformanceTracker.track_agent(agent, "trace-1"):
+                pass
+        with pytest.raises(ValueError):
+            with PerformanceTracker.track_agent("Scoring", "trace-1"):
+                raise ValueError("bad input")
+
+        assert agent_db.stats()["written"] == 0
+        stats = PerformanceTracker.get_agent_stats(days=1)
+
+        assert stats["total_executions"] == 4
+        assert stats["success_rate"] == 75.0
+        assert (agent_db.stats()["written"], agent_db.stats()["batches"]) == (4, 1)
+
+    def test_timed_out_stage_recorded_as_cancelled(self, monkeypatch):
+        saved = []
+        monkeypatch.setattr(PerformanceTracker, "_save_metric", staticmethod(lambda **kwargs: saved.append(kwargs)))
+
+        class SlowAgent(BaseAgent):
+            async def process(self, input_data, context):
+                await asyncio.sleep(5)
+
+        agent = SlowAgent("Slow")
+        graph = StageGraph([
+            Stage("slow", lambda inputs, context: agent.process_with_tracking(None, context),
+                  timeout=0.05, fallback=lambda inputs, context: None),
+        ])
+
+        asyncio.run(graph.run(AgentContext("trace-3")))
+
+        assert [(m["agent_name"], m["status"]) for m in saved] == [("Slow", "CANCELLED")]
+
+    def test_close_drains_buffer(self, agent_db, agent_engine):
+        with PerformanceTracker.track_agent("Intake", "trace-2"):
+            pass
+
+        agent_db.close()
+
+        assert agent_db.stats()["written"] == 1
+        assert PerformanceTracker.get_agent_stats("Intake", days=1)["total_executions"] == 1
+        # Timestamps still come from the column default
+        with agent_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT created_at FROM agent_performance").scalar() is not None
+
+
+class TestAgentStatsAggregation:
+    """Test SQL-side agent stats with latency percentiles"""
+
+    def test_summary_percentiles_in_one_query(self, agent_db, agent_engine):
+        for ms in range(1, 101):
+            agent_db.submit(_step("Strategy", ms, "ERROR" if ms % 10 == 0 else "SUCCESS"))
+        for ms in range(1, 11):
+            agent_db.submit(_step("Intake", ms))
+        agent_db.flush(timeout=5)
+        statements = []
+        event.listen(agent_engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+
+        summary = {row["agent_name"]: row for row in PerformanceTracker.get_all_agents_summary(days=1)}
+
+        assert len(statements) == 1
+        strategy = summary["Strategy"]
+        assert (strategy["total_executions"], strategy["success_rate"]) == (100, 90.0)
+        assert (strategy["min_execution_time_ms"], strategy["avg_execution_time_ms"], strategy["max_execution_time_ms"]) == (1, 50, 100)
+        assert (strategy["p50_execution_time_ms"], strategy["p95_execution_time_ms"], strategy["p99_execution_time_ms"]) == (50, 95, 99)
+        assert (summary["Intake"]["p50_execution_time_ms"], summary["Intake"]["p99_execution_time_ms"]) == (5, 10)
+        assert PerformanceTracker.get_agent_stats(days=1)["total_executions"] == 110
+
+    def test_empty_window(self, agent_db):
+        stats = PerformanceTracker.get_agent_stats("Judge", days=1)
+
+        assert stats["total_executions"] == 0
+        assert stats["p95_execution_time_ms"] == 0
+        assert PerformanceTracker.get_all_agents_summary(days=1) == []
+
+    def test_index_script_adds_index_to_existing_table(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        table = models.AgentPerformance.__table__
+        # A table created before the composite index existed
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE agent_performance (metric_id INTEGER PRIMARY KEY, trace_id VARCHAR(100), "
+                "agent_name VARCHAR(50), execution_time_ms INTEGER, status VARCHAR(20), error_message TEXT, "
+                "created_at DATETIME, business_id VARCHAR(50))"
+            )
+        subprocess.run(
+            [sys.executable, str(ROOT / "scripts" / "create_metrics_indexes.py")],
+            env={**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'old.db'}"},
+            check=True, capture_output=True,
+        )
+
+        indexes = {index["name"] for index in inspect(engine).get_indexes(table.name)}
+        assert "ix_agent_performance_created_at_agent_name" in indexes
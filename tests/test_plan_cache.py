@@ -0,0 +1,131 @@
+import json
+import time
+from app.logic import _assemble_plan, diagnose_funnel
+from app.plan_cache import PlanCache, plan_request_key
+from app.schemas import BusinessProfile, GrowthGoal, KpiSnapshot, PlanRequest
+
+
+def _request(business_id: str = "biz-1", visits: int = 1000) -> PlanRequest:
+    return PlanRequest(
+        business_profile=BusinessProfile(
+            business_id=business_id, name="Test Co", industry="Retail", region="Toronto"
+        ),
+        kpis=KpiSnapshot(visits=visits, leads=100, signups=50, purchases=20, revenue=5000.0),
+        goal=GrowthGoal(objective="grow", horizon_weeks=4),
+    )
+
+
+def _plan(request: PlanRequest):
+    return _assemble_plan(
+        request.business_profile, request.kpis, request.goal, diagnose_funnel(request.kpis)
+    )
+
+
+def test_key_ignores_field_order_and_number_spelling():
+    payload = _request().model_dump()
+    reordered = json.loads(json.dumps({
+        "goal": payload["goal"],
+        "kpis": {**payload["kpis"], "revenue": 5000},
+        "business_profile": payload["business_profile"],
+    }))
+
+    assert plan_request_key(PlanRequest(**reordered)) == plan_request_key(_request())
+    assert plan_request_key(_request(visits=1001)) != plan_request_key(_request())
+    assert plan_request_key(_request(), "multi-agent") != plan_request_key(_request(), "monolithic")
+
+
+def test_hit_returns_independent_copy():
+    cache = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=None)
+    request = _request()
+    cache.put(request, _plan(request))
+
+    first = cache.get(request)
+    first.copy_suggestion = "mutated"
+
+    assert cache.get(request).copy_suggestion != "mutated"
+    assert cache.stats()["hits"] == 2
+
+
+def test_lru_eviction_and_ttl_expiry(monkeypatch):
+    cache = PlanCache(max_entries=2, ttl_seconds=60, cache_dir=None)
+    for bid in ["a", "b", "c"]:
+        cache.put(_request(bid), _plan(_request(bid)))
+
+    assert cache.get(_request("a")) is None
+    assert cache.stats()["evictions"] == 1
+
+    import app.plan_cache as plan_cache_module
+    now = plan_cache_module.time.time()
+    monkeypatch.setattr(plan_cache_module.time, "time", lambda: now + 120)
+
+    assert cache.get(_request("b")) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disk_tier_shared_between_instances(tmp_path):
+    request = _request()
+    PlanCache(max_entries=10, ttl_seconds=60, cache_dir=str(tmp_path)).put(request, _plan(request))
+
+    other = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=str(tmp_path))
+
+    assert other.get(request) is not None
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_invalidate_business_drops_both_tiers(tmp_path):
+    writer = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=str(tmp_path))
+    reader = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=str(tmp_path))
+    for bid in ["a", "b"]:
+        writer.put(_request(bid), _plan(_request(bid)))
+    assert reader.get(_request("a")) is not None
+
+    assert writer.invalidate_business("a") == 1
+
+    assert writer.get(_request("a")) is None
+    # The other worker's in-memory copy is older than the invalidation marker
+    assert reader.get(_request("a")) is None
+    assert reader.get(_request("b")) is not None
+
+
+def test_invalidation_reaches_memory_only_workers(tmp_path):
+    writer = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=None, marker_dir=str(tmp_path))
+    reader = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=None, marker_dir=str(tmp_path))
+    request = _request("a")
+    reader.put(request, _plan(request))
+
+    writer.invalidate_business("a")
+
+    # No disk tier, but the shared marker still expires the other worker's copy
+    assert reader.get(request) is None
+
+
+def test_plan_started_before_invalidation_not_cached(tmp_path):
+    cache = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=None, marker_dir=str(tmp_path))
+    request = _request("a")
+    started_at = time.time()
+    # Strategy memory changes while the plan is being generated
+    cache.invalidate_business("a")
+
+    cache.put(request, _plan(request), started_at=started_at)
+
+    assert cache.get(request) is None
+    cache.put(request, _plan(request), started_at=time.time())
+    assert cache.get(request) is not None
+
+
+def test_disabled_cache_never_hits():
+    cache = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=None, enabled=False)
+    request = _request()
+    cache.put(request, _plan(request))
+
+    assert cache.get(request) is None
+
+
+def test_degraded_plans_not_cached():
+    cache = PlanCache(max_entries=10, ttl_seconds=60, cache_dir=None)
+    request = _request()
+    plan = _plan(request)
+    plan.degraded_stages = {"commentary": "timed out after 30.0s"}
+    cache.put(request, plan)
+
+    assert cache.get(request) is None
@@ -0,0 +1,131 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi.testclient import TestClient
+from app import llm_router, llm_strategy, main
+from app.llm_cache import LLMResponseCache
+from app.llm_router import FailoverPolicy, ModelRoutingTable, RoutedModel
+from app.plan_cache import PlanCache
+from app.single_flight import SingleFlight
+
+
+PRIMARY = RoutedModel(model_id=1, model_name="gemini-primary", provider="GOOGLE", agent_type="JudgeAgent", traffic_weight=1.0)
+SECONDARY = RoutedModel(model_id=2, model_name="gemini-secondary", provider="GOOGLE", agent_type="JudgeAgent", traffic_weight=0.0)
+
+PAYLOAD = {
+    "business_profile": {"business_id": "b1", "name": "Test Co", "industry": "Retail", "region": "Toronto"},
+    "kpis": {"visits": 1000, "leads": 100, "signups": 50, "purchases": 20, "revenue": 5000.0},
+    "goal": {"objective": "grow", "horizon_weeks": 4},
+}
+
+
+class FakeGemini:
+    """Async Gemini models API: per-model delay, answers with the model name"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.calls = []
+        self.cancelled = []
+
+    async def generate_content(self, model, contents, config):
+        self.calls.append(model)
+        try:
+            await asyncio.sleep(self.delays.get(model, 0.0))
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        return SimpleNamespace(text=f"commentary from {model}", usage_metadata=None)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """/plan with fresh caches, no plan log or notifications, and a fake Gemini client"""
+    logged = []
+    monkeypatch.setattr(main, "log_plan", lambda request, plan: logged.append(plan))
+    monkeypatch.setattr(main, "plan_cache", PlanCache(max_entries=10, ttl_seconds=60, cache_dir=None))
+    monkeypatch.setattr(llm_strategy, "llm_response_cache", LLMResponseCache(path=None, ttl_seconds=60, max_entries=10))
+    monkeypatch.setattr(llm_strategy, "llm_single_flight", SingleFlight())
+    monkeypatch.setattr(llm_strategy, "record_llm_call", lambda *args, **kwargs: None)
+    test_client = TestClient(main.app)
+    test_client.logged = logged
+    return test_client
+
+
+def _install(monkeypatch, delays, **policy_kwargs):
+    gemini = FakeGemini(delays)
+    monkeypatch.setattr(llm_strategy, "_client", SimpleNamespace(aio=SimpleNamespace(models=gemini)))
+    router = ModelRoutingTable(loader=lambda: [PRIMARY, SECONDARY], refresh_seconds=3600)
+    policy = FailoverPolicy(router=router, **policy_kwargs)
+    monkeypatch.setattr(llm_router, "llm_failover", policy)
+    return gemini, policy
+
+
+def test_slow_primary_fails_over_to_secondary(client, monkeypatch):
+    gemini, policy = _install(monkeypatch, {"gemini-primary": 30.0}, default_hedge_delay=0.05)
+
+    response = client.post("/plan", json={"request": PAYLOAD})
+
+    assert response.status_code == 200
+    assert response.json()["llm_strategy_commentary"] == "commentary from gemini-secondary"
+    assert gemini.calls == ["gemini-primary", "gemini-secondary"]
+    assert gemini.cancelled == ["gemini-primary"]
+    assert policy.stats()["hedge_wins"] == 1
+    assert len(client.logged) == 1
+
+
+def test_every_model_failing_uses_fallback(client, monkeypatch):
+    _install(monkeypatch, {"gemini-primary": 30.0, "gemini-secondary": 30.0}, default_hedge_delay=0.01)
+    monkeypatch.setattr(llm_strategy, "LLM_COMMENTARY_TIMEOUT_SECONDS", 0.1)
+
+    response = client.post("/plan", json={"request": PAYLOAD})
+
+    assert response.status_code == 200
+    assert response.json()["llm_strategy_commentary"].startswith("## Strategic Recommendation")
+
+
+def test_commentary_job_endpoints_run_on_the_event_loop():
+    # Plain def endpoints run in the threadpool and would race submit() on the jobs dict
+    assert asyncio.iscoroutinefunction(main.get_deferred_commentary)
+    assert asyncio.iscoroutinefunction(main.get_commentary_job_stats)
+
+
+def test_stream_logs_plan_when_client_disconnects(client):
+    from app.schemas import PlanRequest
+
+    async def run():
+        response = await main.stream_plan(PlanRequest(**PAYLOAD))
+        events = response.body_iterator
+        first = await events.__anext__()
+        # The client goes away after the plan event, before any commentary
+        await events.aclose()
+        return first
+
+    assert asyncio.run(run()).startswith("event: plan")
+    assert len(client.logged) == 1
+    assert client.logged[0].llm_strategy_commentary is None
+
+
+def test_deferred_multi_agent_commentary_keeps_judge_annotations(client, monkeypatch):
+    from app.agents import strategy
+    from app.db_utils import BusinessContext
+    from app.monitoring.performance_tracker import PerformanceTracker
+    from app.orchestrator import GrowthCoPilotOrchestrator
+    from app.schemas import PlanRequest
+
+    _install(monkeypatch, {})
+    monkeypatch.setattr(main, "USE_MULTI_AGENT", True)
+    monkeypatch.setattr(main, "orchestrator", GrowthCoPilotOrchestrator())
+    monkeypatch.setattr(strategy, "load_business_context",
+                        lambda business_id, profile: BusinessContext(business_id, "Test Co", "Retail", "professional"))
+    monkeypatch.setattr(PerformanceTracker, "_save_metric", staticmethod(lambda **kwargs: None))
+
+    async def run():
+        plan = await main._generate_plan_deferred(PlanRequest(**PAYLOAD), "trace-d")
+        await main.commentary_jobs.get(plan.commentary_id).task
+
+    asyncio.run(run())
+
+    commentary = client.logged[0].llm_strategy_commentary
+    assert commentary.startswith("commentary from gemini-primary")
+    assert "Revenue Opportunity" in commentary
+    assert "[Trace: trace-d]" in commentary
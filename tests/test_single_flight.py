@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.single_flight import SingleFlight
+
+
+class TestAsyncSingleFlight:
+    """Test coalescing of concurrent coroutine calls"""
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def run():
+            return await asyncio.gather(*(flight.do("k", fetch) for _ in range(10)))
+
+        assert asyncio.run(run()) == ["result"] * 10
+        assert len(calls) == 1
+        assert flight.stats() == {"executed": 1, "coalesced": 9, "in_flight": 0}
+
+    def test_error_is_shared_and_not_remembered(self):
+        flight = SingleFlight()
+
+        async def boom():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        async def run():
+            return await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        # The next call after the failure runs again
+        async def ok():
+            return "ok"
+        assert asyncio.run(flight.do("k", ok)) == "ok"
+        assert flight.stats()["executed"] == 2
+
+    def test_cancelled_waiter_does_not_cancel_others(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def run():
+            first = asyncio.create_task(flight.do("k", fetch))
+            second = asyncio.create_task(flight.do("k", fetch))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(run()) == "result"
+
+    def test_call_cancelled_when_all_waiters_leave(self):
+        flight = SingleFlight()
+        cancelled = []
+
+        async def fetch():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run():
+            waiter = asyncio.create_task(flight.do("k", fetch))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+
+        assert cancelled == [True]
+
+
+class TestSyncSingleFlight:
+    """Test coalescing of concurrent blocking calls"""
+
+    def test_threads_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        start = threading.Barrier(8)
+        results = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return "result"
+
+        def worker():
+            start.wait()
+            results.append(flight.do_sync("k", fetch))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert results == ["result"] * 8
+        assert len(calls) == 1
+        assert flight.stats()["coalesced"] == 7
+
+    def test_error_propagates_to_leader(self):
+        flight = SingleFlight()
+
+        def boom():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            flight.do_sync("k", boom)
+        assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,222 @@
+import asyncio
+import time
+import pytest
+from app.agents.base import AgentContext
+from app.stage_graph import Stage, StageGraph
+
+
+def _sleeper(seconds: float, log: list = None):
+    async def run(inputs, context):
+        if log is not None:
+            log.append(("start", sorted(inputs)))
+        await asyncio.sleep(seconds)
+        return sum(v for v in inputs.values() if isinstance(v, (int, float))) + 1
+    return run
+
+
+class TestStageGraph:
+    """Test dependency-driven concurrent stage execution"""
+
+    def test_independent_stages_run_concurrently(self):
+        graph = StageGraph([
+            Stage("a", _sleeper(0.1), ("seed",)),
+            Stage("b", _sleeper(0.1), ("seed",)),
+            Stage("c", _sleeper(0.0), ("a", "b")),
+        ], inputs=("seed",))
+        context = AgentContext("t1")
+
+        async def run():
+            started = time.perf_counter()
+            results = await graph.run(context, inputs={"seed": 0})
+            return results, time.perf_counter() - started
+
+        results, elapsed = asyncio.run(run())
+
+        assert results["c"] == 3
+        assert elapsed < 0.18
+        assert set(context.metadata["stage_timings_ms"]) == {"a", "b", "c"}
+
+    def test_critical_path_follows_slowest_chain(self):
+        graph = StageGraph([
+            Stage("fast", _sleeper(0.01)),
+            Stage("slow", _sleeper(0.08)),
+            Stage("join", _sleeper(0.0), ("fast", "slow")),
+            Stage("side", _sleeper(0.0), ("fast",)),
+        ])
+        context = AgentContext("t2")
+
+        asyncio.run(graph.run(context))
+
+        assert context.metadata["critical_path"] == ["slow", "join"]
+        assert context.history[-1]["action"] == "Critical path"
+
+    def test_skip_drops_dependents(self):
+        log = []
+        graph = StageGraph([
+            Stage("a", _sleeper(0.0, log)),
+            Stage("b", _sleeper(0.0, log), ("a",)),
+            Stage("c", _sleeper(0.0, log)),
+        ])
+
+        results = asyncio.run(graph.run(AgentContext("t3"), skip=("a",)))
+
+        assert set(results) == {"c"}
+        assert len(log) == 1
+
+    def test_failure_cancels_running_stages(self):
+        cancelled = []
+
+        async def boom(inputs, context):
+            await asyncio.sleep(0.01)
+            raise RuntimeError("stage failed")
+
+        async def slow(inputs, context):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        graph = StageGraph([Stage("boom", boom), Stage("slow", slow)])
+
+        with pytest.raises(RuntimeError, match="stage failed"):
+            asyncio.run(graph.run(AgentContext("t4")))
+        assert cancelled == [True]
+
+    def test_timed_out_stage_uses_fallback(self):
+        graph = StageGraph([
+            Stage("slow", _sleeper(5), timeout=0.05, fallback=lambda inputs, context: 41),
+            Stage("after", _sleeper(0), ("slow",)),
+        ])
+        context = AgentContext("t6")
+
+        results = asyncio.run(graph.run(context))
+
+        assert results == {"slow": 41, "after": 42}
+        assert "timed out" in context.metadata["degraded_stages"]["slow"]
+
+    def test_failed_stage_uses_fallback(self):
+        async def boom(inputs, context):
+            raise RuntimeError("provider down")
+
+        graph = StageGraph([Stage("boom", boom, fallback=lambda inputs, context: "default")])
+        context = AgentContext("t7")
+
+        assert asyncio.run(graph.run(context))["boom"] == "default"
+        assert context.metadata["degraded_stages"] == {"boom": "RuntimeError: provider down"}
+
+    def test_deadline_caps_stage_timeouts(self):
+        graph = StageGraph([
+            Stage("a", _sleeper(0.05), timeout=1),
+            Stage("b", _sleeper(5), ("a",), timeout=10, fallback=lambda inputs, context: None),
+        ])
+        context = AgentContext("t8")
+
+        async def run():
+            started = time.perf_counter()
+            await graph.run(context, deadline=0.15)
+            return time.perf_counter() - started
+
+        assert asyncio.run(run()) < 0.5
+        assert set(context.metadata["degraded_stages"]) == {"b"}
+
+    def test_timeout_without_fallback_raises(self):
+        graph = StageGraph([Stage("slow", _sleeper(5), timeout=0.05)])
+
+        with pytest.raises(TimeoutError, match="Stage slow timed out"):
+            asyncio.run(graph.run(AgentContext("t9")))
+
+    def test_invalid_graphs_rejected(self):
+        with pytest.raises(ValueError, match="unknown"):
+            StageGraph([Stage("a", _sleeper(0), ("missing",))])
+        with pytest.raises(ValueError, match="cycle"):
+            StageGraph([Stage("a", _sleeper(0), ("b",)), Stage("b", _sleeper(0), ("a",))])
+        with pytest.raises(ValueError, match="Missing"):
+            asyncio.run(StageGraph([Stage("a", _sleeper(0), ("x",))], inputs=("x",)).run(AgentContext("t5")))
+
+
+class TestOrchestratorGraph:
+    """Test the multi-agent plan pipeline on the stage graph"""
+
+    @pytest.fixture(autouse=True)
+    def offline(self, monkeypatch):
+        """No model client, routing table, agent metrics or usage rows in the database"""
+        from app import llm_router, llm_strategy
+        from app.monitoring.performance_tracker import PerformanceTracker
+
+        router = llm_router.ModelRoutingTable(loader=lambda: [llm_strategy._DEFAULT_COMMENTARY_MODEL], refresh_seconds=3600)
+        monkeypatch.setattr(llm_router, "llm_failover", llm_router.FailoverPolicy(router=router))
+        monkeypatch.setattr(llm_strategy, "_client", None)
+        monkeypatch.setattr(llm_strategy, "record_llm_call", lambda *args, **kwargs: None)
+        monkeypatch.setattr(PerformanceTracker, "_save_metric", staticmethod(lambda **kwargs: None))
+
+    def test_plan_with_memory_filter_and_overlapping_stages(self, monkeypatch):
+        from app import orchestrator as orchestrator_module
+        from app.agents import strategy
+        from app.db_utils import BusinessContext
+        from app.logic import diagnose_funnel, propose_experiments
+        from app.schemas import BusinessProfile, GrowthGoal, KpiSnapshot, PlanRequest
+
+        request = PlanRequest(
+            business_profile=BusinessProfile(business_id="b1", name="Test Co", industry="Retail", region="Toronto"),
+            kpis=KpiSnapshot(visits=1000, leads=100, signups=50, purchases=20, revenue=5000.0),
+            goal=GrowthGoal(objective="grow"),
+        )
+        orchestrator = orchestrator_module.GrowthCoPilotOrchestrator()
+        # The first proposal has failed before and must be filtered out
+        first = propose_experiments(request.business_profile, request.goal, diagnose_funnel(request.kpis))[0]
+        monkeypatch.setattr(strategy, "load_business_context", lambda business_id, profile: BusinessContext(
+            business_id, "Test Co", "Retail", "professional", {"failed_experiments": [first.name]}))
+        contexts = []
+        original_run = orchestrator.graph.run
+
+        async def capture(context, **kwargs):
+            contexts.append(context)
+            return await original_run(context, **kwargs)
+        monkeypatch.setattr(orchestrator.graph, "run", capture)
+
+        plan = asyncio.run(orchestrator.execute_plan(request))
+
+        assert first.name not in [se.experiment.name for se in plan.experiments]
+        assert plan.copy_suggestion
+        assert plan.llm_strategy_commentary.startswith("## Strategic Recommendation")
+        timings = contexts[0].metadata["stage_timings_ms"]
+        # Memory lookup starts before the Analyst finishes; copy and commentary overlap
+        assert timings["memory"]["start"] <= timings["analyst"]["end"]
+        assert timings["copy"]["start"] < timings["commentary"]["end"]
+        assert timings["commentary"]["start"] < timings["copy"]["end"]
+
+    def test_slow_commentary_degrades_to_deterministic(self, monkeypatch):
+        from app import orchestrator as orchestrator_module
+        from app.agents import strategy
+        from app.agents.judge import JudgeAgent
+        from app.db_utils import BusinessContext
+        from app.schemas import BusinessProfile, GrowthGoal, KpiSnapshot, PlanRequest
+
+        request = PlanRequest(
+            business_profile=BusinessProfile(business_id="b2", name="Test Co", industry="Retail", region="Toronto"),
+            kpis=KpiSnapshot(visits=1000, leads=100, signups=50, purchases=20, revenue=5000.0),
+            goal=GrowthGoal(objective="grow"),
+        )
+        monkeypatch.setattr(strategy, "load_business_context",
+                            lambda business_id, profile: BusinessContext(business_id, "Test Co", "Retail", "professional"))
+        monkeypatch.setitem(orchestrator_module.ORCHESTRATOR_STAGE_TIMEOUTS, "commentary", 0.05)
+
+        async def hang(self, plan, context):
+            await asyncio.sleep(5)
+        monkeypatch.setattr(JudgeAgent, "generate_commentary", hang)
+
+        plan = asyncio.run(orchestrator_module.GrowthCoPilotOrchestrator().execute_plan(request))
+
+        assert plan.llm_strategy_commentary.startswith("## Strategic Recommendation")
+        assert list(plan.degraded_stages) == ["commentary"]
+        assert plan.copy_suggestion
+
+
+def test_malformed_stage_timeouts_keep_defaults():
+    from app.orchestrator import _DEFAULT_STAGE_TIMEOUTS, _load_stage_timeouts
+
+    assert _load_stage_timeouts('{"commentary": 20, "copy": null}')["commentary"] == 20.0
+    assert _load_stage_timeouts('{"commentary": 20, "copy": null}')["copy"] is None
+    for raw in ['{"commentary": 20', '[20]', '{"commentary": "soon"}']:
+        assert _load_stage_timeouts(raw) == _DEFAULT_STAGE_TIMEOUTS
@@ -0,0 +1,324 @@
+import gzip
+import json
+import multiprocessing
+import pytest
+from app import storage
+from app.schemas import (
+    BusinessProfile,
+    GrowthGoal,
+    KpiSnapshot,
+    PlanRequest,
+)
+from app.logic import diagnose_funnel, propose_experiments, score_experiments_ice
+from app.schemas import GrowthPlan
+
+
+def _make_pair(business_id: str):
+    business = BusinessProfile(
+        business_id=business_id,
+        name=f"Business {business_id}",
+        industry="Retail",
+        region="Toronto",
+    )
+    kpis = KpiSnapshot(visits=1000, leads=100, signups=80, purchases=60, revenue=6000.0)
+    goal = GrowthGoal(objective="grow", horizon_weeks=4)
+    insight = diagnose_funnel(kpis)
+    scored = score_experiments_ice(propose_experiments(business, goal, insight))
+    plan = GrowthPlan(
+        business_profile=business,
+        kpis=kpis,
+        goal=goal,
+        funnel_insight=insight,
+        experiments=scored,
+        chosen_experiment=scored[0],
+        copy_suggestion="copy",
+    )
+    return PlanRequest(business_profile=business, kpis=kpis, goal=goal), plan
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Point the plan log at a temporary directory with fresh caches"""
+    monkeypatch.setattr(storage, "LOG_DIR", tmp_path / "plan_log")
+    monkeypatch.setattr(storage, "LOG_FILE", tmp_path / "plan_log.jsonl")
+    monkeypatch.setattr(storage, "_indexes", {})
+    monkeypatch.setattr(storage, "_meta_cache", {})
+    monkeypatch.setattr(storage, "_segment_started", {})
+    # Compact explicitly in tests instead of on a background thread
+    monkeypatch.setattr(storage, "_schedule_compaction", lambda: None)
+    writer = storage.PlanLogWriter()
+    monkeypatch.setattr(storage, "plan_log_writer", writer)
+    yield tmp_path / "plan_log"
+    writer.close()
+
+
+def _log_all(business_ids):
+    for bid in business_ids:
+        storage.log_plan(*_make_pair(bid))
+    storage.plan_log_writer.flush()
+
+
+def _active_segment():
+    return storage.list_segments()[-1].path
+
+
+class TestPlanLogIndex:
+    """Test the business_id -> offset sidecar index"""
+
+    def test_load_returns_only_matching_business(self, log_dir):
+        for bid in ["a", "b", "a", "c", "a"]:
+            storage.log_plan(*_make_pair(bid))
+
+        plans = storage.load_plans_for_business("a")
+
+        assert len(plans) == 3
+        assert all(p["business_id"] == "a" for p in plans)
+        assert storage.load_plans_for_business("missing") == []
+
+    def test_sidecar_written_incrementally(self, log_dir):
+        storage.log_plan(*_make_pair("a"))
+        storage.load_plans_for_business("a")
+        storage.log_plan(*_make_pair("b"))
+
+        index_file = _active_segment().with_suffix(".idx")
+        entries = [json.loads(l) for l in index_file.read_text().splitlines()]
+
+        assert [e[0] for e in entries] == ["a", "b"]
+        assert entries[1][1] == entries[0][1] + entries[0][2]
+
+    def test_index_rebuilt_when_missing(self, log_dir, monkeypatch):
+        for bid in ["a", "b", "a"]:
+            storage.log_plan(*_make_pair(bid))
+        index_file = _active_segment().with_suffix(".idx")
+        index_file.unlink()
+        monkeypatch.setattr(storage, "_indexes", {})
+
+        assert len(storage.load_plans_for_business("a")) == 2
+        assert index_file.exists()
+
+    def test_index_catches_up_with_unindexed_tail(self, log_dir, monkeypatch):
+        storage.log_plan(*_make_pair("a"))
+        # Simulate a record appended without an index entry (e.g. crash)
+        with _active_segment().open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"business_id": "a", "plan": {}}) + "\n")
+        monkeypatch.setattr(storage, "_indexes", {})
+
+        assert len(storage.load_plans_for_business("a")) == 2
+
+    def test_stale_index_is_rebuilt(self, log_dir):
+        for bid in ["a", "b"]:
+            storage.log_plan(*_make_pair(bid))
+        storage.load_plans_for_business("a")
+
+        # Rewrite the log so old offsets point at the wrong records
+        log_file = _active_segment()
+        lines = log_file.read_text(encoding="utf-8").splitlines(keepends=True)
+        log_file.write_text("".join(reversed(lines)) + lines[0], encoding="utf-8")
+
+        plans = storage.load_plans_for_business("a")
+
+        assert len(plans) == 2
+        assert all(p["business_id"] == "a" for p in plans)
+
+
+class TestPlanLogSegments:
+    """Test segment rotation, compaction, pruning and retention"""
+
+    def test_rotates_when_segment_is_full(self, log_dir, monkeypatch):
+        monkeypatch.setattr(storage, "SEGMENT_MAX_BYTES", 1)
+
+        for bid in ["a", "b", "c"]:
+            storage.log_plan(*_make_pair(bid))
+
+        assert [seg.number for seg in storage.list_segments()] == [1, 2, 3]
+
+    def test_compaction_gzips_sealed_segments_only(self, log_dir, monkeypatch):
+        monkeypatch.setattr(storage, "SEGMENT_MAX_BYTES", 1)
+        _log_all(["a", "b", "a"])
+
+        assert storage.compact_sealed_segments() == 2
+
+        segments = storage.list_segments()
+        assert [seg.compressed for seg in segments] == [True, True, False]
+        assert segments[0].meta["business_ids"] == {"a"}
+        assert len(storage.load_plans_for_business("a")) == 2
+        assert len(storage.load_plans_for_business("b")) == 1
+
+    def test_list_segments_skips_by_business_and_time(self, log_dir, monkeypatch):
+        monkeypatch.setattr(storage, "SEGMENT_MAX_BYTES", 1)
+        _log_all(["a", "b", "c"])
+        storage.compact_sealed_segments()
+
+        assert [s.number for s in storage.list_segments(business_id="b")] == [2, 3]
+        assert [s.number for s in storage.list_segments(since="2999-01-01T00:00:00+00:00")] == [3]
+
+    def test_retention_drops_old_sealed_segments(self, log_dir, monkeypatch):
+        monkeypatch.setattr(storage, "SEGMENT_MAX_BYTES", 1)
+        _log_all(["a", "b", "c"])
+        storage.compact_sealed_segments()
+
+        removed = storage.apply_retention(max_total_bytes=1)
+
+        assert len(removed) == 2
+        assert [s.number for s in storage.list_segments()] == [3]
+        assert len(storage.load_plans_for_business("c")) == 1
+
+    def test_torn_write_does_not_break_the_log(self, log_dir, monkeypatch):
+        _log_all(["a"])
+        # A partial write (e.g. ENOSPC) leaves a torn line the next append is glued onto
+        with _active_segment().open("ab") as f:
+            f.write(b'{"ts": "2025-01-01T00:00:00+00:00", "business_id": "a", "pl')
+        _log_all(["b", "a"])
+        monkeypatch.setattr(storage, "_indexes", {})
+
+        assert len(storage.load_plans_for_business("a")) == 2
+
+        monkeypatch.setattr(storage, "SEGMENT_MAX_BYTES", 1)
+        _log_all(["c"])
+        assert storage.compact_sealed_segments() == 1
+        assert storage.list_segments()[0].meta["business_ids"] == {"a"}
+        assert len(storage.load_plans_for_business("c")) == 1
+
+    def test_torn_first_line_does_not_block_rotation(self, log_dir):
+        _log_all(["a"])
+        segment = _active_segment()
+        segment.write_bytes(b'{"ts": "2025-\n' + segment.read_bytes())
+        storage._segment_started.clear()
+
+        _log_all(["b"])
+
+        assert len(storage.load_plans_for_business("b")) == 1
+
+    def test_legacy_log_is_adopted(self, log_dir):
+        request, plan = _make_pair("legacy")
+        record = {"ts": "2025-01-01T00:00:00+00:00", "business_id": "legacy", "plan": plan.model_dump()}
+        storage.LOG_FILE.write_text(json.dumps(record) + "\n", encoding="utf-8")
+
+        storage.log_plan(request, plan)
+        storage.plan_log_writer.flush()
+
+        assert not storage.LOG_FILE.exists()
+        assert len(storage.load_plans_for_business("legacy")) == 2
+
+
+class TestPlanLogWriter:
+    """Test the buffered group-commit writer"""
+
+    def test_batches_records_into_few_flushes(self, log_dir, monkeypatch):
+        writer = storage.PlanLogWriter(max_records=10, interval_ms=1000)
+        monkeypatch.setattr(storage, "plan_log_writer", writer)
+
+        for i in range(25):
+            storage.log_plan(*_make_pair(f"b{i % 3}"))
+        writer.flush()
+
+        stats = writer.stats()
+        assert stats["records_written"] == 25
+        assert stats["batches_flushed"] == 3
+        assert stats["queue_depth"] == 0
+        assert len(storage.load_plans_for_business("b0")) == 9
+
+    def test_close_drains_pending_records(self, log_dir, monkeypatch):
+        writer = storage.PlanLogWriter(max_records=1000, interval_ms=60_000)
+        monkeypatch.setattr(storage, "plan_log_writer", writer)
+        for _ in range(5):
+            storage.log_plan(*_make_pair("a"))
+
+        writer.close()
+
+        assert writer.stats()["records_written"] == 5
+        assert len(storage.load_plans_for_business("a")) == 5
+
+    def test_interval_flushes_without_explicit_flush(self, log_dir, monkeypatch):
+        import time
+        writer = storage.PlanLogWriter(max_records=1000, interval_ms=10)
+        monkeypatch.setattr(storage, "plan_log_writer", writer)
+        storage.log_plan(*_make_pair("a"))
+
+        for _ in range(100):
+            if writer.stats()["records_written"]:
+                break
+            time.sleep(0.01)
+
+        assert writer.stats()["records_written"] == 1
+
+
+class TestPlanLogPagination:
+    """Test cursor-based iteration over a business's plans"""
+
+    def test_cursor_resumes_after_last_record(self, log_dir):
+        _log_all(["a", "b", "a", "a"])
+
+        first = list(storage.iter_plans_for_business("a"))
+        resumed = list(storage.iter_plans_for_business("a", cursor=first[0][0]))
+
+        assert len(first) == 3
+        assert [c for c, _ in resumed] == [c for c, _ in first[1:]]
+
+    def test_cursor_survives_compaction(self, log_dir, monkeypatch):
+        monkeypatch.setattr(storage, "SEGMENT_MAX_BYTES", 1)
+        _log_all(["a", "a", "a"])
+        cursor = next(storage.iter_plans_for_business("a"))[0]
+
+        storage.compact_sealed_segments()
+
+        assert len(list(storage.iter_plans_for_business("a", cursor=cursor))) == 2
+
+    def test_since_filters_older_records(self, log_dir):
+        _log_all(["a", "a"])
+
+        assert list(storage.iter_plans_for_business("a", since="2999-01-01T00:00:00")) == []
+        assert len(list(storage.iter_plans_for_business("a", since="2000-01-01T00:00:00"))) == 2
+
+    def test_invalid_cursor_raises_eagerly(self, log_dir):
+        with pytest.raises(ValueError):
+            storage.iter_plans_for_business("a", cursor="not-a-cursor")
+
+
+def _stress_worker(tmp_path, worker, count, max_segment_bytes):
+    """Child process: log `count` large plans through the normal writer"""
+    from pathlib import Path
+    from app import storage as child_storage
+
+    child_storage.LOG_DIR = Path(tmp_path) / "plan_log"
+    child_storage.LOG_FILE = Path(tmp_path) / "plan_log.jsonl"
+    child_storage.SEGMENT_MAX_BYTES = max_segment_bytes
+    child_storage.plan_log_writer = child_storage.PlanLogWriter(max_records=4, interval_ms=1)
+
+    request, plan = _make_pair(f"worker-{worker}")
+    # Records well past PIPE_BUF / page size so torn writes would show up
+    plan.copy_suggestion = f"w{worker}-" + "x" * 100_000
+    for _ in range(count):
+        child_storage.log_plan(request, plan)
+    child_storage.plan_log_writer.close()
+
+
+class TestPlanLogConcurrency:
+    """Test appends from several processes sharing one data directory"""
+
+    def test_many_processes_never_interleave_records(self, log_dir, tmp_path):
+        workers, per_worker = 4, 12
+        ctx = multiprocessing.get_context("spawn")
+        procs = [
+            ctx.Process(target=_stress_worker, args=(str(tmp_path), w, per_worker, 500_000))
+            for w in range(workers)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(60)
+            assert p.exitcode == 0
+
+        total = 0
+        segments = list(log_dir.glob("segment-*.jsonl")) + list(log_dir.glob("segment-*.jsonl.gz"))
+        for seg in segments:
+            data = gzip.decompress(seg.read_bytes()) if seg.suffix == ".gz" else seg.read_bytes()
+            for line in data.splitlines():
+                rec = json.loads(line)  # every line must parse
+                assert rec["plan"]["copy_suggestion"].startswith(rec["business_id"].replace("orker-", ""))
+                total += 1
+
+        assert total == workers * per_worker
+        assert len(storage.list_segments()) > 1
+        for w in range(workers):
+            assert len(storage.load_plans_for_business(f"worker-{w}")) == per_worker